@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from models.schemas import PolicyDraftRequest, PolicyDraft, PolicyAnalysis
 from services.llm_service import LLMService
+from services.service_container import get_llm_service
 from utils.logger import setup_logger
 from utils.stats_tracker import stats_tracker
 
@@ -8,7 +9,7 @@ router = APIRouter()
 logger = setup_logger(__name__)
 
 @router.post("/draft", response_model=PolicyDraft)
-async def draft_policy(request: PolicyDraftRequest):
+async def draft_policy(request: PolicyDraftRequest, llm_service: LLMService = Depends(get_llm_service)):
     """Generate a policy draft based on requirements"""
     try:
         logger.info(f"Drafting policy for topic: {request.topic}")
@@ -16,8 +17,6 @@ async def draft_policy(request: PolicyDraftRequest):
         # Track draft count
         stats_tracker.increment_draft_count()
         
-        llm_service = LLMService()
-        
         # Generate policy draft
         draft_response = llm_service.draft_policy(
             topic=request.topic,
@@ -44,12 +43,11 @@ async def draft_policy(request: PolicyDraftRequest):
 @router.post("/analyze", response_model=PolicyAnalysis)
 async def analyze_policy(
     policy_content: str,
-    reference_policies: list[str] = []
+    reference_policies: list[str] = [],
+    llm_service: LLMService = Depends(get_llm_service)
 ):
     """Analyze a policy for compliance and gaps"""
     try:
-        llm_service = LLMService()
-        
         # Analyze policy compliance
         analysis_response = llm_service.analyze_policy_compliance(
             policy_content=policy_content,
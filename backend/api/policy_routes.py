@@ -1,7 +1,8 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Form
-from models.schemas import PolicyDocument, UploadResponse
-from services.vector_store_factory import VectorStoreFactory
-from services.document_processor import DocumentProcessor
+from fastapi import APIRouter, File, UploadFile, HTTPException, Form, Depends, Request, Query
+from models.schemas import PolicyDocument, UploadResponse, IngestionJobStatus
+from services.service_container import get_vector_store, get_ingestion_queue
+from services.ingestion_queue import IngestionQueue, IngestionQueueFullError
+from utils.upload_spool import spool_upload, spool_size, UploadTooLargeError, upload_max_bytes
 from utils.logger import setup_logger
 import os
 from datetime import datetime
@@ -9,17 +10,20 @@ from datetime import datetime
 router = APIRouter()
 logger = setup_logger(__name__)
 
-@router.post("/upload", response_model=UploadResponse)
+@router.post("/upload", response_model=UploadResponse, status_code=202)
 async def upload_policy_document(
+    request: Request,
     file: UploadFile = File(...),
     title: str = Form(None),
     category: str = Form("general"),
     policy_type: str = Form("regulation"),
     instansi_penerbit: str = Form(None),
     tahun_terbit: int = Form(None),
-    status: str = Form("aktif")
+    status: str = Form("aktif"),
+    ingestion_queue: IngestionQueue = Depends(get_ingestion_queue)
 ):
-    """Upload and process a policy document"""
+    """Upload a policy document and queue it for background processing"""
+    spool = None
     try:
         # Validate file type
         if not file.filename.endswith(('.pdf', '.docx', '.txt')):
@@ -35,12 +39,18 @@ async def upload_policy_document(
                 detail="Status must be either 'aktif' or 'tidak_aktif'"
             )
         
-        # Read file content
-        content = await file.read()
+        # Reject oversized uploads before reading them (multipart framing adds a little)
+        content_length = request.headers.get("content-length")
+        max_bytes = upload_max_bytes()
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes + 64 * 1024:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
         
-        # Process document
-        processor = DocumentProcessor()
-        extracted_text = processor.extract_text(content, file.filename)
+        # Stream the upload into a spooled temp file instead of holding it in memory
+        try:
+            spool = await spool_upload(file, max_bytes=max_bytes)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        file_size = spool_size(spool)
         
         # Use filename as title if not provided
         if not title:
@@ -53,34 +63,48 @@ async def upload_policy_document(
             "source": file.filename,
             "date_created": datetime.now().isoformat(),
             "language": "id",  # Could be detected automatically
-            "file_size": len(content),
+            "file_size": file_size,
             "instansi_penerbit": instansi_penerbit,
             "tahun_terbit": tahun_terbit,
             "status": status
         }
         
-        # Add to vector store
-        vector_store = VectorStoreFactory.create_vector_store()
-        await vector_store.initialize()
-        document_id = await vector_store.add_document(title, extracted_text, metadata)
+        # Extraction, embedding and indexing run in the background; the job owns the spool from here
+        try:
+            job = ingestion_queue.submit(spool, file.filename, title, metadata)
+        except IngestionQueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+        spool = None
         
         return UploadResponse(
             success=True,
-            message=f"Document '{title}' uploaded and processed successfully",
-            document_id=document_id,
-            processed_chunks=len(extracted_text) // 1000 + 1  # Rough estimate
+            message=f"Document '{title}' queued for processing",
+            job_id=job.job_id,
+            status=job.status
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading document: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if spool is not None:
+            spool.close()
+        await file.close()
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobStatus)
+async def get_ingestion_job(job_id: str, ingestion_queue: IngestionQueue = Depends(get_ingestion_queue)):
+    """Stage, chunk counts and timings of an upload job"""
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return IngestionJobStatus(**job.to_dict())
 
 @router.get("/")
-async def list_policies():
+async def list_policies(vector_store = Depends(get_vector_store)):
     """List all policies in the system"""
     try:
-        vector_store = VectorStoreFactory.create_vector_store()
-        await vector_store.initialize()
         stats = await vector_store.get_collection_stats()
         
         return {
@@ -93,31 +117,107 @@ async def list_policies():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/documents")
-async def get_all_policy_documents():
-    """Get list of all uploaded policy documents"""
+async def get_all_policy_documents(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str = None,
+    sort: str = "date_created",
+    order: str = "desc",
+    category: str = None,
+    vector_store = Depends(get_vector_store)
+):
+    """Get one page of uploaded policy documents; pass next_cursor back to get the next page"""
+    try:
+        if order not in ("asc", "desc"):
+            raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+        
+        try:
+            return await vector_store.list_documents(
+                limit=limit,
+                cursor=cursor,
+                sort=sort,
+                descending=order == "desc",
+                category=category
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting policy documents: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/documents/{document_id}")
+async def get_policy_document(document_id: str, vector_store = Depends(get_vector_store)):
+    """Get a document's metadata and its chunks in order"""
+    try:
+        document = await vector_store.get_document(document_id)
+        if document is None:
+            raise HTTPException(status_code=404, detail=f"Document '{document_id}' not found")
+        return document
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting document {document_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/documents/{document_id}")
+async def delete_policy_document(document_id: str, vector_store = Depends(get_vector_store)):
+    """Delete one uploaded document by its ID"""
+    try:
+        result = await vector_store.delete_document(document_id)
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "message": result["message"],
+                "deleted_chunks": result["deleted_chunks"]
+            }
+        else:
+            raise HTTPException(status_code=404, detail=result["message"])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting document {document_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/index-report")
+async def get_index_report(
+    modes: str = None,
+    sample_size: int = Query(200, ge=1, le=2000),
+    k: int = Query(10, ge=1, le=100),
+    vector_store = Depends(get_vector_store)
+):
+    """Compare memory footprint and recall of FAISS index modes against the flat baseline"""
     try:
-        vector_store = VectorStoreFactory.create_vector_store()
-        await vector_store.initialize()
-        documents = await vector_store.get_all_documents()
+        if not hasattr(vector_store, "evaluate_index_modes"):
+            raise HTTPException(status_code=400, detail="Index report is only available for the FAISS vector store")
+        
+        reports = await vector_store.evaluate_index_modes(
+            modes=modes.split(",") if modes else None,
+            sample_size=sample_size,
+            k=k
+        )
         
         return {
-            "documents": documents,
-            "total": len(documents)
+            "reports": reports,
+            "total": len(reports)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error getting policy documents: {e}")
+        logger.error(f"Error building index report: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{document_id}")
-async def delete_policy(document_id: str):
+async def delete_policy(document_id: str, vector_store = Depends(get_vector_store)):
     """Delete a policy document"""
     try:
-        vector_store = VectorStoreFactory.create_vector_store()
-        await vector_store.initialize()
-        
         # Use document_id as title (since we're using title as identifier)
-        result = vector_store.delete_document_by_title(document_id)
+        result = await vector_store.delete_document_by_title(document_id)
         
         if result["success"]:
             return {
@@ -1,32 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any
+import json
+import os
 import time
-from models.schemas import PolicyQuery, PolicyAnswer
-from services.vector_store_factory import VectorStoreFactory
+from models.schemas import PolicyQuery, PolicyAnswer, BatchSearchRequest
 from services.llm_service import LLMService
 from services.pipeline_service import OptimizedPipelineService
 from services.optimized_llm_service import TaskType
+from services.service_container import get_vector_store, get_llm_service, get_pipeline_service
 from utils.logger import setup_logger
 from utils.stats_tracker import stats_tracker
 
 router = APIRouter()
 logger = setup_logger(__name__)
 
-# Initialize pipeline service
-pipeline_service = OptimizedPipelineService()
-
-# Dependency
-def get_vector_store():
-    return VectorStoreFactory.create_vector_store()
-
-def get_llm_service():
-    return LLMService()
-
-def get_pipeline_service():
-    return OptimizedPipelineService()
-
 @router.post("/ask", response_model=PolicyAnswer)
-async def ask_policy_question(query: PolicyQuery):
+async def ask_policy_question(
+    query: PolicyQuery,
+    request: Request,
+    pipeline_service: OptimizedPipelineService = Depends(get_pipeline_service)
+):
     """
     Ask a question about policies with optimized pipeline
     """
@@ -47,20 +41,12 @@ async def ask_policy_question(query: PolicyQuery):
             language=query.language,
             category=query.category,
             limit=query.limit,
-            task_type=task_type
+            task_type=task_type,
+            caller=_caller(request)
         )
         
         # Check for low confidence scores and provide better messaging
-        if result.confidence_score < 0.2:  # Very low confidence threshold
-            query_lower = query.query.lower()
-            
-            if any(term in query_lower for term in ["layanan konsultasi digital", "konsultasi digital", "digital consultation"]):
-                result.answer = "Maaf, informasi mengenai Layanan Konsultasi Digital tidak tersedia dalam knowledge base kami saat ini. Silakan hubungi pihak terkait untuk informasi lebih lanjut."
-            elif result.confidence_score < 0.01:  # Nearly zero confidence
-                result.answer = "Maaf, tidak ditemukan dokumen yang relevan untuk pertanyaan Anda dalam knowledge base kami."
-            else:
-                # Add disclaimer for low confidence
-                result.answer = f"⚠️ Informasi yang ditemukan mungkin kurang relevan (confidence: {result.confidence_score:.1%}).\n\n{result.answer}\n\nSilakan verifikasi informasi ini dengan sumber resmi."
+        result.answer = _low_confidence_answer(query.query, result.answer, result.confidence_score)
         
         # Calculate processing time
         processing_time = time.time() - start_time
@@ -77,9 +63,75 @@ async def ask_policy_question(query: PolicyQuery):
         logger.error(f"Error processing policy question: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ask-stream")
+async def ask_policy_question_stream(
+    query: PolicyQuery,
+    request: Request,
+    pipeline_service: OptimizedPipelineService = Depends(get_pipeline_service)
+):
+    """
+    Ask a question and receive the answer as Server-Sent Events
+
+    Events: "sources" once retrieval finishes, "token" for each piece of
+    generated text, then "done" with the final answer, confidence score and
+    timings (or "error").
+    """
+    logger.info(f"Processing streamed query: {query.query}")
+    stats_tracker.increment_query_count()
+    task_type = _determine_task_type(query.query)
+    
+    async def event_stream():
+        try:
+            async for event in pipeline_service.stream_query_pipeline(
+                query=query.query,
+                language=query.language,
+                category=query.category,
+                limit=query.limit,
+                task_type=task_type,
+                caller=_caller(request)
+            ):
+                if event["type"] == "done":
+                    event["answer"] = _low_confidence_answer(query.query, event["answer"], event["confidence_score"])
+                yield _sse(event)
+        except Exception as e:
+            # Headers are already sent; report the failure in the stream
+            logger.error(f"Error streaming policy question: {e}")
+            yield _sse({"type": "error", "detail": str(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _caller(request: Request) -> str:
+    """Client identity used by the LLM scheduler to share slots fairly between clients"""
+    return request.client.host if request.client else "anonymous"
+
+def _sse(event: Dict[str, Any]) -> str:
+    """Format a pipeline event as a Server-Sent Event"""
+    event_type = event.pop("type")
+    return f"event: {event_type}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+def _low_confidence_answer(query: str, answer: str, confidence_score: float) -> str:
+    """Answer text with better messaging for low confidence scores"""
+    if confidence_score >= 0.2:  # Very low confidence threshold
+        return answer
+    
+    query_lower = query.lower()
+    if any(term in query_lower for term in ["layanan konsultasi digital", "konsultasi digital", "digital consultation"]):
+        return "Maaf, informasi mengenai Layanan Konsultasi Digital tidak tersedia dalam knowledge base kami saat ini. Silakan hubungi pihak terkait untuk informasi lebih lanjut."
+    elif confidence_score < 0.01:  # Nearly zero confidence
+        return "Maaf, tidak ditemukan dokumen yang relevan untuk pertanyaan Anda dalam knowledge base kami."
+    else:
+        # Add disclaimer for low confidence
+        return f"⚠️ Informasi yang ditemukan mungkin kurang relevan (confidence: {confidence_score:.1%}).\n\n{answer}\n\nSilakan verifikasi informasi ini dengan sumber resmi."
+
 @router.post("/ask-advanced", response_model=PolicyAnswer)
 async def ask_policy_question_advanced(
     query: PolicyQuery,
+    request: Request,
     task_type: str = "qa",
     pipeline_service: OptimizedPipelineService = Depends(get_pipeline_service)
 ):
@@ -96,7 +148,8 @@ async def ask_policy_question_advanced(
             language=query.language,
             category=query.category,
             limit=query.limit,
-            task_type=TaskType(task_type)
+            task_type=TaskType(task_type),
+            caller=_caller(request)
         )
         
         return PolicyAnswer(
@@ -200,9 +253,47 @@ async def search_policies(
         logger.error(f"Error searching policies: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/search-batch")
+async def search_policies_batch(
+    request: BatchSearchRequest,
+    vector_store = Depends(get_vector_store)
+):
+    """Search policies for many queries with one batched embedding and index search"""
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="At least one query is required")
+    # One batched search is admitted to the query pool as a single call; cap its size
+    max_queries = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "32"))
+    if len(request.queries) > max_queries:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {max_queries} queries per batch, got {len(request.queries)}"
+        )
+    
+    try:
+        start_time = time.time()
+        batch_results = await vector_store.search_documents_batch(
+            queries=request.queries,
+            limit=request.limit,
+            category=request.category
+        )
+        
+        return {
+            "results": [
+                {"query": query, "results": results, "total": len(results)}
+                for query, results in zip(request.queries, batch_results)
+            ],
+            "total_queries": len(request.queries),
+            "search_time": round(time.time() - start_time, 4)
+        }
+        
+    except Exception as e:
+        logger.error(f"Error searching policies in batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/batch-ask")
 async def batch_ask_questions(
     queries: List[dict],
+    request: Request,
     pipeline_service: OptimizedPipelineService = Depends(get_pipeline_service)
 ):
     """Process multiple questions in batch with optimization"""
@@ -210,7 +301,7 @@ async def batch_ask_questions(
         logger.info(f"Processing batch queries: {len(queries)} questions")
         
         # Process batch using optimized pipeline
-        results = await pipeline_service.batch_process_pipeline(queries)
+        results = await pipeline_service.batch_process_pipeline(queries, caller=_caller(request))
         
         # Format results
         formatted_results = []
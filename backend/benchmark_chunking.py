@@ -0,0 +1,99 @@
+"""
+Benchmark the structure-aware legal splitter against the character splitter
+Reports chunk count, embedded characters, ingest (split + embed) time, retrieval hit rate
+and context size on the sample legislation in docs/examples
+
+Usage: python benchmark_chunking.py [--backend torch] [--top-k 3]
+"""
+
+import argparse
+import glob
+import os
+import time
+import numpy as np
+from services.embeddings import create_embedding_model
+from services.legal_text_splitter import LegalTextSplitter
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "docs", "examples")
+
+# (query, text the retrieved context must contain)
+QUERIES = [
+    ("Apa asas penyelenggaraan kebijakan dan Manajemen ASN?", "a. kepastian hukum;"),
+    ("Apa tujuan penyelenggaraan kebijakan Manajemen ASN?", "mewujudkan ASN yang memiliki integritas, kompeten, dan berkarakter"),
+    ("Apa yang dimaksud dengan Pegawai Negeri Sipil?", "Pegawai Negeri Sipil yang selanjutnya disingkat PNS adalah"),
+    ("Berapa luas minimal ruang terbuka hijau di Jakarta?", "ruang terbuka hijau minimal 30%"),
+    ("Apa tujuan penataan ruang wilayah provinsi DKI Jakarta?", "Tujuan penataan ruang wilayah provinsi adalah"),
+    ("Jabatan fungsional analis kebijakan termasuk kategori apa?", "merupakan jabatan fungsional kategori keahlian"),
+    ("Apa saja kelas jabatan fungsional analis kebijakan?", "Analis Kebijakan Ahli Utama"),
+    ("Perencanaan kebutuhan Pegawai ASN disusun berdasarkan apa?", "disusun berdasarkan analisis jabatan dan analisis beban kerja"),
+    ("Untuk apa analisis beban kerja dilakukan?", "Analisis beban kerja sebagaimana dimaksud pada ayat (1)"),
+    ("Apa yang dimaksud kegiatan analisis kebijakan?", "Kegiatan Analisis Kebijakan adalah kegiatan yang meliputi"),
+]
+
+def load_examples() -> list:
+    documents = []
+    for path in sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            documents.append(f.read())
+    return documents
+
+def evaluate(name: str, splitter: LegalTextSplitter, model, documents: list, top_k: int) -> dict:
+    start_time = time.time()
+    chunks = [chunk for document in documents for chunk in splitter.split_text(document)]
+    split_time = time.time() - start_time
+
+    start_time = time.time()
+    vectors = np.array(model.embed_documents(chunks), dtype=np.float32)
+    embed_time = time.time() - start_time
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    query_vectors = np.array(model.embed_documents([query for query, _ in QUERIES]), dtype=np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    top = np.argsort(-(query_vectors @ vectors.T), axis=1)[:, :top_k]
+
+    hits = 0
+    context_chars = 0
+    for (_, expected), row in zip(QUERIES, top):
+        retrieved = [chunks[i] for i in row]
+        hits += any(expected in chunk for chunk in retrieved)
+        context_chars += sum(len(chunk) for chunk in retrieved)
+
+    return {
+        "splitter": name,
+        "chunks": len(chunks),
+        "embedded_chars": sum(len(chunk) for chunk in chunks),
+        "split_ms": round(split_time * 1000, 2),
+        "ingest_s": round(split_time + embed_time, 3),
+        f"hit_rate_at_{top_k}": round(hits / len(QUERIES), 3),
+        "avg_context_chars": round(context_chars / len(QUERIES))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark legal vs character chunking")
+    parser.add_argument("--backend", default=None, help="embedding backend (default EMBEDDING_BACKEND)")
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    documents = load_examples()
+    model = create_embedding_model(args.backend)
+    # Warm up so the first splitter does not pay for model initialization
+    model.embed_documents(["pemanasan"])
+
+    results = [
+        evaluate("recursive", LegalTextSplitter(structure_aware=False), model, documents, args.top_k),
+        evaluate("legal", LegalTextSplitter(structure_aware=True), model, documents, args.top_k),
+    ]
+    for result in results:
+        logger.info(f"✅ {result}")
+
+    columns = list(results[0].keys())
+    print("\n" + " ".join(f"{column:>18}" for column in columns))
+    for result in results:
+        print(" ".join(f"{str(result[column]):>18}" for column in columns))
+
+if __name__ == "__main__":
+    print("📐 Benchmarking chunking strategies...")
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark embedding backends (PyTorch, ONNX, int8 ONNX) on CPU
+Reports queries/sec, chunks/sec and cosine parity with the PyTorch vectors
+
+Usage: python benchmark_embeddings.py [--backends torch,onnx,onnx_int8] [--threads 4]
+"""
+
+import argparse
+import glob
+import os
+import time
+from services.embeddings import create_embedding_model, embedding_parity
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SAMPLE_QUERIES = [
+    "Berapa hari cuti tahunan karyawan?",
+    "Bagaimana prosedur pengajuan cuti melahirkan?",
+    "Apakah karyawan boleh bekerja dari rumah?",
+    "Siapa yang menyetujui permohonan work from home?",
+    "Apa sanksi jika tidak masuk kerja tanpa izin?",
+    "What equipment is provided for remote work?",
+    "Ketentuan cuti sakit dan surat keterangan dokter",
+    "Jam kerja selama bekerja dari rumah",
+]
+
+def load_sample_chunks() -> list:
+    """Paragraphs of the sample policies, used as document chunks"""
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    chunks = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "sample_policy_*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            chunks.extend(paragraph.strip() for paragraph in f.read().split("\n\n") if paragraph.strip())
+    return chunks
+
+def benchmark(model, queries: list, chunks: list, rounds: int) -> dict:
+    # Warm up (graph optimization, allocator, lazy initialization)
+    model.embed_documents(queries[:2])
+
+    start_time = time.time()
+    for _ in range(rounds):
+        for query in queries:
+            model.embed_query(query)
+    single_elapsed = time.time() - start_time
+
+    start_time = time.time()
+    for _ in range(rounds):
+        model.embed_documents(queries)
+    batch_elapsed = time.time() - start_time
+
+    start_time = time.time()
+    model.embed_documents(chunks)
+    chunk_elapsed = time.time() - start_time
+
+    total_queries = rounds * len(queries)
+    return {
+        "queries_per_sec": round(total_queries / single_elapsed, 1),
+        "batched_queries_per_sec": round(total_queries / batch_elapsed, 1),
+        "chunks_per_sec": round(len(chunks) / chunk_elapsed, 1),
+        "query_latency_ms": round(single_elapsed * 1000 / total_queries, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--backends", default="torch,onnx,onnx_int8")
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads (default EMBEDDING_THREADS)")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    queries = SAMPLE_QUERIES
+    chunks = load_sample_chunks() or SAMPLE_QUERIES
+    parity_texts = queries + chunks
+
+    reference = None
+    results = []
+    for backend in args.backends.split(","):
+        backend = backend.strip()
+        try:
+            model = create_embedding_model(backend, num_threads=args.threads)
+        except Exception as e:
+            logger.error(f"❌ Could not load {backend} backend: {e}")
+            continue
+
+        result = {"backend": backend, **benchmark(model, queries, chunks, args.rounds)}
+        if backend == "torch":
+            reference = model
+        elif reference is not None:
+            result.update(embedding_parity(reference, model, parity_texts))
+        results.append(result)
+        logger.info(f"✅ {result}")
+
+    print(f"\n{'backend':<10} {'q/s':>8} {'batch q/s':>10} {'chunks/s':>9} {'ms/query':>9} {'mean cos':>9} {'min cos':>8}")
+    for result in results:
+        print(
+            f"{result['backend']:<10} {result['queries_per_sec']:>8} {result['batched_queries_per_sec']:>10} "
+            f"{result['chunks_per_sec']:>9} {result['query_latency_ms']:>9} "
+            f"{result.get('mean_cosine', '-'):>9} {result.get('min_cosine', '-'):>8}"
+        )
+
+if __name__ == "__main__":
+    print("⏱️ Benchmarking embedding backends...")
+    main()
@@ -39,6 +39,7 @@ async def load_sample_policies():
         }
     ]
     
+    documents = []
     for policy_info in sample_files:
         file_path = os.path.join(data_dir, policy_info["filename"])
         
@@ -59,19 +60,22 @@ async def load_sample_policies():
                 "tags": "sample,hr,policy"  # Convert list to string
             }
             
-            # Add to vector store
-            try:
-                document_id = await vector_store.add_document(
-                    title=policy_info["title"],
-                    content=content,
-                    metadata=metadata
-                )
-                logger.info(f"✅ Successfully loaded: {policy_info['title']} (ID: {document_id})")
-            except Exception as e:
-                logger.error(f"❌ Failed to load {policy_info['title']}: {e}")
+            documents.append({
+                "title": policy_info["title"],
+                "content": content,
+                "metadata": metadata
+            })
         else:
             logger.warning(f"⚠️  File not found: {file_path}")
     
+    # Add to vector store in one batched call
+    try:
+        document_ids = await vector_store.add_documents(documents)
+        for document, document_id in zip(documents, document_ids):
+            logger.info(f"✅ Successfully loaded: {document['title']} (ID: {document_id})")
+    except Exception as e:
+        logger.error(f"❌ Failed to load sample policies: {e}")
+    
     # Get collection stats
     stats = await vector_store.get_collection_stats()
     logger.info(f"📊 Total documents in collection: {stats['total_documents']}")
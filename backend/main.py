@@ -6,14 +6,18 @@ from dotenv import load_dotenv
 from typing import List, Optional
 import uvicorn
 
+# Sebelum import modul aplikasi: beberapa modul membaca konfigurasi saat di-import
+load_dotenv()
+
 from api.policy_routes import router as policy_router
 from api.qa_routes import router as qa_router
 from api.drafting_routes import router as drafting_router
-from services.vector_store_factory import VectorStoreFactory
+from services.service_container import services
 from utils.logger import setup_logger
 from utils.stats_tracker import stats_tracker
-
-load_dotenv()
+from utils.compute_pool import query_pool, ingest_pool
+from utils.llm_scheduler import llm_scheduler
+from services.embeddings import query_batch_metrics
 
 app = FastAPI(
     title="Policy Knowledge Management System",
@@ -33,15 +37,17 @@ app.add_middleware(
 # Setup logger
 logger = setup_logger(__name__)
 
-# Initialize services
-vector_store = VectorStoreFactory.create_vector_store()
-
 @app.on_event("startup")
 async def startup_event():
-    """Initialize services on startup"""
+    """Load models, index and clients once for the whole process"""
     logger.info("Starting Policy Management System...")
-    await vector_store.initialize()
-    logger.info("Vector store initialized successfully")
+    await services.startup()
+    logger.info("Services initialized successfully")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush the vector store and release shared services"""
+    await services.shutdown()
 
 @app.get("/")
 async def root():
@@ -62,7 +68,7 @@ async def health_check():
     """Health check endpoint"""
     try:
         # Check vector store
-        vector_store_status = "connected" if vector_store else "disconnected"
+        vector_store_status = "connected" if services.vector_store else "disconnected"
         
         # LLM service is available through API calls
         llm_status = "active"
@@ -79,8 +85,8 @@ async def health_check():
 async def get_stats():
     """Get real-time system statistics"""
     try:
-        # Get total documents in vector store
-        vector_stats = await vector_store.get_collection_stats()
+        # Document totals come from the vector store's document catalog
+        vector_stats = await services.require("vector_store").get_collection_stats()
         total_policies = vector_stats.get("total_documents", 0)
         
         # Get tracked stats
@@ -88,6 +94,10 @@ async def get_stats():
         
         return {
             "totalPolicies": total_policies,
+            "totalChunks": vector_stats.get("total_chunks", 0),
+            "policiesByCategory": vector_stats.get("by_category", {}),
+            "policiesByType": vector_stats.get("by_document_type", {}),
+            "recentPolicies": vector_stats.get("recent_documents", 0),
             "totalQueries": tracked_stats.get("total_queries", 0),
             "activeDrafts": tracked_stats.get("active_drafts", 0),
             "userSessions": 1   # Current session
@@ -95,6 +105,20 @@ async def get_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """Queue depth and latency of the compute pools, LLM scheduler, ingestion jobs, caches and query embedding batches"""
+    return {
+        "compute_pools": {
+            "query": query_pool.metrics(),
+            "ingest": ingest_pool.metrics()
+        },
+        "llm_scheduler": llm_scheduler.metrics(),
+        "ingestion_jobs": services.require("ingestion_queue").metrics(),
+        "pipeline_cache": services.require("pipeline_service").cache_metrics(),
+        "query_embedding_batches": query_batch_metrics()
+    }
+
 # Include routers
 app.include_router(policy_router, prefix="/api/policies", tags=["policies"])
 app.include_router(qa_router, prefix="/api/qa", tags=["qa"])
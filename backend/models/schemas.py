@@ -25,6 +25,11 @@ class PolicyQuery(BaseModel):
     category: Optional[str] = None
     limit: int = 5
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    category: Optional[str] = None
+    limit: int = 10
+
 class PolicyAnswer(BaseModel):
     answer: str
     sources: List[Dict[str, Any]]
@@ -59,3 +64,20 @@ class UploadResponse(BaseModel):
     message: str
     document_id: Optional[str] = None
     processed_chunks: int = 0
+    job_id: Optional[str] = None
+    status: Optional[str] = None
+
+class IngestionJobStatus(BaseModel):
+    job_id: str
+    filename: str
+    title: str
+    status: str
+    pages: Optional[int] = None
+    total_chunks: int = 0
+    embedded_chunks: int = 0
+    document_id: Optional[str] = None
+    error: Optional[str] = None
+    queued_seconds: float
+    stage_seconds: Dict[str, float] = {}
+    total_seconds: float
+    created_at: float
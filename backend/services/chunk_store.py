@@ -0,0 +1,98 @@
+"""
+Chunk Store - SQLite storage for chunk content and metadata
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Any, Iterable, Tuple
+
+class ChunkStore:
+    """
+    Keeps chunk text and metadata on disk, keyed by the chunk ID used in the vector index.
+
+    Only the hits of a search are read back, so memory and startup time do not
+    grow with the total text volume of the corpus.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # FULL syncs the WAL on every commit: an append, so durable commits stay cheap
+        self.conn.execute("PRAGMA synchronous=FULL")
+        # Read pages through a shared mapping instead of per-process copies
+        self.conn.execute(f"PRAGMA mmap_size={int(os.getenv('FAISS_CHUNK_MMAP_BYTES', str(256 * 1024 * 1024)))}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_title ON chunks (title)")
+        self.conn.commit()
+
+    def add_chunks(self, chunks: Iterable[Tuple[int, Dict[str, Any]]]):
+        """Insert (chunk_id, {"content", "metadata"}) pairs in one transaction"""
+        rows = [
+            (int(chunk_id), doc["metadata"].get("title", "Unknown"), doc["content"], json.dumps(doc["metadata"]))
+            for chunk_id, doc in chunks
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_id, title, content, metadata) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def get_chunks(self, chunk_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Fetch content and metadata for the given chunk IDs"""
+        chunks = {}
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(chunk_ids), 500):
+            batch = [int(chunk_id) for chunk_id in chunk_ids[start:start + 500]]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT chunk_id, content, metadata FROM chunks WHERE chunk_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+            for chunk_id, content, metadata in rows:
+                chunks[chunk_id] = {"content": content, "metadata": json.loads(metadata)}
+        return chunks
+
+    def delete_chunks(self, chunk_ids: Iterable[int]):
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(int(chunk_id),) for chunk_id in chunk_ids])
+
+    def ids_from(self, first_id: int) -> List[int]:
+        """Chunk IDs at or above first_id, i.e. chunks committed since an ID watermark"""
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT chunk_id FROM chunks WHERE chunk_id >= ?", (int(first_id),))]
+
+    def iter_chunks(self, batch_size: int = 1000) -> Iterable[List[Tuple[int, Dict[str, Any]]]]:
+        """All chunks in ID order, one batch at a time"""
+        last_id = -1
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT chunk_id, content, metadata FROM chunks WHERE chunk_id > ? ORDER BY chunk_id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [(chunk_id, {"content": content, "metadata": json.loads(metadata)}) for chunk_id, content, metadata in rows]
+
+    def all_ids(self) -> List[int]:
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT chunk_id FROM chunks")]
+
+    def reset(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM chunks")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,250 @@
+"""
+Document Catalog - one row per document, maintained on add and delete, for listings and stats
+"""
+import base64
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+SORT_COLUMNS = ("date_created", "title", "chunk_count")
+PREVIEW_CHARS = 200
+
+def catalog_entry(metadata: Dict[str, Any], first_chunk: str, chunk_count: int, first_chunk_id: Optional[int] = None) -> Dict[str, Any]:
+    """Catalog row of a document from its metadata and first chunk"""
+    return {
+        "document_id": metadata["document_id"],
+        "title": metadata.get("title", "Unknown"),
+        "category": metadata.get("category", "general"),
+        "document_type": metadata.get("document_type", "regulation"),
+        "source": metadata.get("source", "unknown"),
+        "date_created": metadata.get("date_created", "unknown"),
+        "language": metadata.get("language", "id"),
+        "status": metadata.get("status", "aktif"),
+        "instansi_penerbit": metadata.get("instansi_penerbit"),
+        "tahun_terbit": metadata.get("tahun_terbit"),
+        "first_chunk_id": first_chunk_id,
+        "chunk_count": chunk_count,
+        "preview": _preview(first_chunk)
+    }
+
+def _preview(content: str) -> str:
+    return content[:PREVIEW_CHARS] + "..." if len(content) > PREVIEW_CHARS else content
+
+def summarize_chunks(chunks: Iterable[Tuple[Any, Dict[str, Any], str]]) -> List[Dict[str, Any]]:
+    """
+    Catalog entries aggregated per document_id from (chunk key, metadata, content) chunks
+
+    Integer chunk keys (FAISS) give each document its first chunk ID, so its
+    chunks are the range [first_chunk_id, first_chunk_id + chunk_count).
+    """
+    documents = {}
+    for chunk_key, metadata, content in chunks:
+        first_chunk_id = chunk_key if isinstance(chunk_key, int) else None
+        entry = documents.get(metadata["document_id"])
+        if entry is None:
+            documents[metadata["document_id"]] = catalog_entry(metadata, content, 1, first_chunk_id)
+            continue
+        entry["chunk_count"] += 1
+        if first_chunk_id is not None and first_chunk_id < entry["first_chunk_id"]:
+            entry["first_chunk_id"] = first_chunk_id
+        if metadata.get("chunk_index") == 0:
+            entry["preview"] = _preview(content)
+    return list(documents.values())
+
+class DocumentCatalog:
+    """
+    Document-level rows (ID, title, category, type, chunk range, preview, dates).
+
+    Vector stores update it together with their chunks, so listings and stats
+    read O(page size) rows through the sort indexes instead of grouping every
+    chunk on each request, and a document's chunks are found from its row
+    without scanning the corpus. Pages are addressed by keyset cursors.
+    """
+
+    COLUMNS = (
+        "document_id", "title", "category", "document_type", "source", "date_created", "language",
+        "status", "instansi_penerbit", "tahun_terbit", "first_chunk_id", "chunk_count", "preview"
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Catalogs keyed by title predate document IDs; the store rebuilds the table from its chunks
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(documents)")]
+        if columns and "document_id" not in columns:
+            self.conn.execute("DROP TABLE documents")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                document_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                category TEXT,
+                document_type TEXT,
+                source TEXT,
+                date_created TEXT,
+                language TEXT,
+                status TEXT,
+                instansi_penerbit TEXT,
+                tahun_terbit INTEGER,
+                first_chunk_id INTEGER,
+                chunk_count INTEGER NOT NULL,
+                preview TEXT NOT NULL
+            )
+        """)
+        # Each sort order walks its own index; the document ID breaks ties so cursors are unique
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_title ON documents (title, document_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_date ON documents (date_created, document_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_chunks ON documents (chunk_count, document_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_category ON documents (category, date_created, document_id)")
+        # Corpus version: bumped in the same transaction as every change, so caches in any worker see it
+        self.conn.execute("CREATE TABLE IF NOT EXISTS catalog_version (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL)")
+        self.conn.execute("INSERT OR IGNORE INTO catalog_version (id, version) VALUES (0, 0)")
+        self.conn.commit()
+
+    def add(self, entries: Iterable[Dict[str, Any]]):
+        rows = [tuple(entry[column] for column in self.COLUMNS) for entry in entries]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO documents ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                rows
+            )
+            self._bump_version()
+
+    def remove(self, document_ids: Iterable[str]):
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM documents WHERE document_id = ?", [(document_id,) for document_id in document_ids])
+            self._bump_version()
+
+    def version(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT version FROM catalog_version").fetchone()[0]
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM documents WHERE document_id = ?", (document_id,)
+            ).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+    def find_by_title(self, title: str) -> List[Dict[str, Any]]:
+        """Every document uploaded under a title, oldest chunk range first"""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM documents WHERE title = ? ORDER BY first_chunk_id", (title,)
+            ).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: str = "date_created",
+        descending: bool = True,
+        category: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of documents in sort order
+
+        Args:
+            limit: Documents per page
+            cursor: next_cursor of the previous page, None for the first page
+            sort: One of SORT_COLUMNS
+            descending: Sort direction
+            category: Only documents of this category
+
+        Returns:
+            (documents, next_cursor); next_cursor is None on the last page
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_COLUMNS)}")
+
+        direction = "DESC" if descending else "ASC"
+        comparison = "<" if descending else ">"
+        conditions, params = [], []
+        if category:
+            conditions.append("category = ?")
+            params.append(category)
+        if cursor:
+            value, document_id = self._decode_cursor(cursor)
+            conditions.append(f"({sort}, document_id) {comparison} (?, ?)")
+            params.extend([value, document_id])
+
+        sql = f"SELECT {', '.join(self.COLUMNS)} FROM documents"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {sort} {direction}, document_id {direction} LIMIT ?"
+        # One extra row tells whether another page follows
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        documents = [dict(zip(self.COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = documents[-1]
+            next_cursor = self._encode_cursor(last[sort], last["document_id"])
+        return documents, next_cursor
+
+    def count(self, category: Optional[str] = None) -> int:
+        with self._lock:
+            if category:
+                return self.conn.execute("SELECT COUNT(*) FROM documents WHERE category = ?", (category,)).fetchone()[0]
+            return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def total_chunks(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COALESCE(SUM(chunk_count), 0) FROM documents").fetchone()[0]
+
+    def stats(self, recent_days: int = 7) -> Dict[str, Any]:
+        """Document totals per category and type, and documents created in the last recent_days"""
+        cutoff = (datetime.now() - timedelta(days=recent_days)).isoformat()
+        with self._lock:
+            total_documents, total_chunks = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(chunk_count), 0) FROM documents"
+            ).fetchone()
+            by_category = dict(self.conn.execute("SELECT category, COUNT(*) FROM documents GROUP BY category"))
+            by_type = dict(self.conn.execute("SELECT document_type, COUNT(*) FROM documents GROUP BY document_type"))
+            # ISO dates sort as text; "unknown" is above every digit and stays out of the range
+            recent = self.conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE date_created >= ? AND date_created < ':'", (cutoff,)
+            ).fetchone()[0]
+        return {
+            "total_documents": total_documents,
+            "total_chunks": total_chunks,
+            "by_category": by_category,
+            "by_document_type": by_type,
+            "recent_documents": recent
+        }
+
+    def rebuild(self, chunks: Iterable[Tuple[Any, Dict[str, Any], str]]):
+        """Replace the catalog with documents aggregated from (chunk key, metadata, content) chunks"""
+        entries = summarize_chunks(chunks)
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM documents")
+        self.add(entries)
+
+    def reset(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM documents")
+            self._bump_version()
+
+    def _bump_version(self):
+        # Callers hold self._lock inside a transaction
+        self.conn.execute("UPDATE catalog_version SET version = version + 1")
+
+    def close(self):
+        self.conn.close()
+
+    def _encode_cursor(self, value: Any, document_id: str) -> str:
+        return base64.urlsafe_b64encode(json.dumps([value, document_id]).encode("utf-8")).decode("ascii")
+
+    def _decode_cursor(self, cursor: str) -> Tuple[Any, str]:
+        try:
+            value, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return value, document_id
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
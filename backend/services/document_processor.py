@@ -1,58 +1,198 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
 import PyPDF2
+from concurrent.futures import ProcessPoolExecutor
 from docx import Document
 from io import BytesIO
-from typing import Union
+from typing import BinaryIO, Dict, Any, Iterator, List, Optional, Tuple, Union
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Settings are read when used, not at import, so values loaded from .env later still apply
+_pdf_pool = None
+
+def _pdf_extract_workers() -> int:
+    return int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+class DocumentTooLargeError(ValueError):
+    """Raised when a document's extracted text exceeds DOCUMENT_MAX_TEXT_MB"""
+
+def _limit_worker_memory():
+    """Process pool initializer: a runaway PDF fails its own task instead of the host"""
+    # Address space each extraction process may grow by beyond its size at startup (0 = unlimited)
+    max_memory_mb = int(os.getenv("PDF_WORKER_MAX_MEMORY_MB", "1024"))
+    if max_memory_mb <= 0:
+        return
+    try:
+        import resource
+        # The cap is headroom on top of what the interpreter and imports already map
+        limit = _current_address_space() + max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):  # not available on Windows
+        pass
+
+def _current_address_space() -> int:
+    """Virtual memory size of this process in bytes (0 where /proc is unavailable)"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmSize:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+def _extract_page_range(path: str, start: int, end: int) -> List[Tuple[int, str, float]]:
+    """Extract pages [start, end) of a PDF file in a worker process"""
+    reader = PyPDF2.PdfReader(path)
+    pages = []
+    for page_number in range(start, end):
+        page_start = time.time()
+        text = reader.pages[page_number].extract_text() or ""
+        pages.append((page_number, text, time.time() - page_start))
+    return pages
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        # spawn, not fork: forked workers would inherit the server's models and indexes
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=_pdf_extract_workers(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_limit_worker_memory
+        )
+    return _pdf_pool
+
+def shutdown_pdf_pool():
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=True)
+        _pdf_pool = None
+
 class DocumentProcessor:
     """Process different document formats and extract text"""
-    
-    def extract_text(self, content: bytes, filename: str) -> str:
+
+    def __init__(self, max_text_mb: Optional[float] = None):
+        # Extracted text per document beyond this is rejected instead of filling memory
+        self.max_text_mb = float(os.getenv("DOCUMENT_MAX_TEXT_MB", "50")) if max_text_mb is None else max_text_mb
+        self.max_text_chars = int(self.max_text_mb * 1024 * 1024)
+        # PDFs with at least this many pages are extracted by a process pool
+        self.pdf_parallel_min_pages = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "50"))
+        self.pdf_pages_per_task = int(os.getenv("PDF_PAGES_PER_TASK", "25"))
+        self.pdf_extract_workers = _pdf_extract_workers()
+        self.slow_page_seconds = float(os.getenv("PDF_SLOW_PAGE_SECONDS", "2"))
+        self.last_stats: Dict[str, Any] = {}
+
+    def extract_text(self, content: Union[bytes, BinaryIO], filename: str) -> str:
         """Extract text from various document formats"""
         try:
-            if filename.endswith('.pdf'):
-                return self._extract_from_pdf(content)
-            elif filename.endswith('.docx'):
-                return self._extract_from_docx(content)
-            elif filename.endswith('.txt'):
-                return content.decode('utf-8')
-            else:
-                raise ValueError(f"Unsupported file format: {filename}")
-                
+            # Pages are collected once and joined once, not concatenated repeatedly
+            return "\n".join(self.iter_text(content, filename)).strip()
         except Exception as e:
             logger.error(f"Error extracting text from {filename}: {e}")
             raise
-    
-    def _extract_from_pdf(self, content: bytes) -> str:
-        """Extract text from PDF"""
+
+    def iter_text(self, content: Union[bytes, BinaryIO], filename: str) -> Iterator[str]:
+        """Yield a document's text piece by piece (pages for PDF), enforcing the size cap"""
+        if filename.endswith('.pdf'):
+            pieces = self._iter_pdf_pages(content)
+        elif filename.endswith('.docx'):
+            pieces = self._iter_docx_paragraphs(content)
+        elif filename.endswith('.txt'):
+            pieces = iter([self._read_bytes(content).decode('utf-8')])
+        else:
+            raise ValueError(f"Unsupported file format: {filename}")
+
+        total_chars = 0
+        for piece in pieces:
+            total_chars += len(piece)
+            if total_chars > self.max_text_chars:
+                raise DocumentTooLargeError(
+                    f"{filename} has more than {self.max_text_mb:g} MB of text"
+                )
+            yield piece
+
+    def _read_bytes(self, content: Union[bytes, BinaryIO]) -> bytes:
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)
+        content.seek(0)
+        return content.read()
+
+    def _as_stream(self, content: Union[bytes, BinaryIO]) -> BinaryIO:
+        if isinstance(content, (bytes, bytearray)):
+            return BytesIO(content)
+        content.seek(0)
+        return content
+
+    def _iter_pdf_pages(self, content: Union[bytes, BinaryIO]) -> Iterator[str]:
+        """Yield PDF text page by page; large PDFs are split across the process pool"""
+        start_time = time.time()
+        pdf_reader = PyPDF2.PdfReader(self._as_stream(content))
+        page_count = len(pdf_reader.pages)
+        timings = []
+
         try:
-            pdf_file = BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
-            
-        except Exception as e:
-            logger.error(f"Error extracting PDF text: {e}")
-            raise
-    
-    def _extract_from_docx(self, content: bytes) -> str:
-        """Extract text from DOCX"""
+            if self._parallel(page_count):
+                del pdf_reader  # workers open their own readers
+                for page_number, text, seconds in self._extract_parallel(content, page_count):
+                    timings.append((page_number, seconds))
+                    yield text
+            else:
+                for page_number, page in enumerate(pdf_reader.pages):
+                    page_start = time.time()
+                    text = page.extract_text() or ""
+                    timings.append((page_number, time.time() - page_start))
+                    yield text
+        finally:
+            self._record_pdf_stats(page_count, timings, time.time() - start_time)
+
+    def _parallel(self, page_count: int) -> bool:
+        return page_count >= self.pdf_parallel_min_pages and self.pdf_extract_workers > 1
+
+    def _extract_parallel(self, content: Union[bytes, BinaryIO], page_count: int) -> Iterator[Tuple[int, str, float]]:
+        """Extract page ranges in worker processes, yielding pages in document order"""
+        # Workers read the PDF from a file, so the bytes are not pickled to every process
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as pdf_file:
+            shutil.copyfileobj(self._as_stream(content), pdf_file)
+            path = pdf_file.name
+
         try:
-            docx_file = BytesIO(content)
-            doc = Document(docx_file)
-            
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            return text.strip()
-            
-        except Exception as e:
-            logger.error(f"Error extracting DOCX text: {e}")
-            raise
+            ranges = [
+                (start, min(start + self.pdf_pages_per_task, page_count))
+                for start in range(0, page_count, self.pdf_pages_per_task)
+            ]
+            pool = get_pdf_pool()
+            futures = [pool.submit(_extract_page_range, path, start, end) for start, end in ranges]
+            try:
+                for future in futures:
+                    yield from future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+        finally:
+            os.unlink(path)
+
+    def _record_pdf_stats(self, page_count: int, timings: List[Tuple[int, float]], elapsed: float):
+        slow_pages = [page_number + 1 for page_number, seconds in timings if seconds > self.slow_page_seconds]
+        slowest = max(timings, key=lambda timing: timing[1], default=(None, 0.0))
+        self.last_stats = {
+            "pages": page_count,
+            "extracted_pages": len(timings),
+            "parallel": self._parallel(page_count),
+            "elapsed_seconds": round(elapsed, 3),
+            "avg_page_ms": round(sum(seconds for _, seconds in timings) * 1000 / len(timings), 2) if timings else 0.0,
+            "slowest_page": slowest[0] + 1 if slowest[0] is not None else None,
+            "slowest_page_ms": round(slowest[1] * 1000, 2),
+            "slow_pages": slow_pages
+        }
+        logger.info(f"Extracted {len(timings)}/{page_count} PDF pages in {elapsed:.2f}s: {self.last_stats}")
+
+    def _iter_docx_paragraphs(self, content: Union[bytes, BinaryIO]) -> Iterator[str]:
+        """Yield DOCX text paragraph by paragraph"""
+        doc = Document(self._as_stream(content))
+        for paragraph in doc.paragraphs:
+            yield paragraph.text
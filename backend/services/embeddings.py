@@ -0,0 +1,360 @@
+"""
+Embedding helpers shared by the vector store implementations
+"""
+import os
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+import numpy as np
+from typing import List, Callable, Optional, Dict, Any
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from utils.compute_pool import query_pool
+from utils.histogram import Histogram
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model name, hash of the normalized text).
+
+    Backed by SQLite so it survives restarts and is shared by both vector
+    stores. Entries are evicted least-recently-used first once the cache
+    holds more than max_entries vectors.
+    """
+
+    def __init__(self, path: str, max_entries: Optional[int] = None):
+        self.path = path
+        self.max_entries = max_entries or int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+        self.conn.commit()
+        self._entries = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Hash of the text after Unicode and whitespace normalization"""
+        normalized = " ".join(unicodedata.normalize("NFKC", text).split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Look up cached vectors, refreshing their access time"""
+        found = {}
+        unique_hashes = list(dict.fromkeys(hashes))
+        now = time.time()
+
+        with self._lock, self.conn:
+            for start in range(0, len(unique_hashes), 500):
+                batch = unique_hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for text_hash, vector in rows:
+                    found[text_hash] = np.frombuffer(vector, dtype=np.float32).tolist()
+            self.conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?",
+                [(now, model, text_hash) for text_hash in found]
+            )
+
+            self.hits += sum(1 for text_hash in hashes if text_hash in found)
+            self.misses += sum(1 for text_hash in hashes if text_hash not in found)
+        return found
+
+    def put_many(self, model: str, entries: Dict[str, List[float]]):
+        """Store vectors and evict the least recently used entries beyond max_entries"""
+        now = time.time()
+        with self._lock, self.conn:
+            # Same key means same text and model, so an existing vector is kept as is
+            inserted = self.conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                [(model, text_hash, np.asarray(vector, dtype=np.float32).tobytes(), now) for text_hash, vector in entries.items()]
+            ).rowcount
+            self._entries += max(inserted, 0)
+
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                self.conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_access LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+                self._entries -= overflow
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class CachedEmbeddings:
+    """Embeddings wrapper that consults the EmbeddingCache before calling the model"""
+
+    def __init__(self, embeddings, cache: EmbeddingCache, model_name: str):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed_cached(self.model_name, texts)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many queries in one forward pass, sharing the embed_query cache entries"""
+        # Sentence-transformer models encode queries and documents the same way
+        return self._embed_cached(f"{self.model_name}:query", texts)
+
+    def _embed_cached(self, model_key: str, texts: List[str]) -> List[List[float]]:
+        hashes = [self.cache.text_hash(text) for text in texts]
+        cached = self.cache.get_many(model_key, hashes)
+
+        # Embed each distinct missing text once
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in cached and text_hash not in missing:
+                missing[text_hash] = text
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(model_key, computed)
+            cached.update(computed)
+
+        return [cached[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        # Queries get their own key space: some models embed queries differently
+        query_model = f"{self.model_name}:query"
+        text_hash = self.cache.text_hash(text)
+        cached = self.cache.get_many(query_model, [text_hash])
+        if text_hash in cached:
+            return cached[text_hash]
+
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many(query_model, {text_hash: vector})
+        return vector
+
+# Shared by every batcher so /api/metrics covers all query traffic
+query_batch_sizes = Histogram((1, 2, 4, 8, 16, 32, 64, 128))
+query_batch_wait_ms = Histogram((0.5, 1, 2, 5, 10, 20, 50, 100))
+
+class QueryEmbeddingBatcher:
+    """
+    Micro-batches query embeddings from concurrent requests.
+
+    Queries arriving within EMBEDDING_BATCH_WINDOW_MS of the first pending
+    query (or until EMBEDDING_MAX_QUERY_BATCH are pending) are embedded in
+    one forward pass in the query pool, and each caller gets its own vector.
+    """
+
+    def __init__(self, embeddings, window_ms: Optional[float] = None, max_batch_size: Optional[int] = None):
+        self.embeddings = embeddings
+        if window_ms is None:
+            window_ms = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size or int(os.getenv("EMBEDDING_MAX_QUERY_BATCH", "32"))
+        self._pending = []  # (text, future, enqueued_at)
+        self._flush_handle = None
+
+    async def embed_query(self, text: str) -> List[float]:
+        vectors = await self.embed_queries([text])
+        return vectors[0]
+
+    async def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Queue queries for the next batch and wait for their vectors"""
+        if not texts:
+            return []
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future, time.time()))
+            futures.append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self):
+        """Start one embedding run per max_batch_size pending queries"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.max_batch_size):
+            asyncio.get_running_loop().create_task(self._run_batch(pending[start:start + self.max_batch_size]))
+
+    async def _run_batch(self, batch: List[tuple]):
+        # Callers that were cancelled while waiting are dropped from the batch
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+
+        now = time.time()
+        for _, _, enqueued_at in batch:
+            query_batch_wait_ms.observe((now - enqueued_at) * 1000)
+        query_batch_sizes.observe(len(batch))
+
+        try:
+            vectors = await query_pool.run(self.embeddings.embed_queries, [text for text, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+def query_batch_metrics() -> Dict[str, Any]:
+    return {
+        "batch_size": query_batch_sizes.snapshot(),
+        "wait_ms": query_batch_wait_ms.snapshot()
+    }
+
+def _data_dir() -> str:
+    script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_dir = os.path.join(script_dir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+def embedding_backend() -> str:
+    return os.getenv("EMBEDDING_BACKEND", "torch").lower()
+
+def cache_model_name(backend: str) -> str:
+    """Cache key space of a backend; quantized vectors must not mix with PyTorch ones"""
+    return EMBEDDING_MODEL_NAME if backend == "torch" else f"{EMBEDDING_MODEL_NAME}:{backend}"
+
+def create_embedding_model(backend: Optional[str] = None, num_threads: Optional[int] = None):
+    """
+    Create the raw (uncached) embedding model for a backend
+
+    Args:
+        backend: "torch" (PyTorch eager), "onnx" (ONNX Runtime fp32) or "onnx_int8"
+            (ONNX Runtime, int8-quantized weights). Defaults to EMBEDDING_BACKEND
+        num_threads: Intra-op CPU threads. Defaults to EMBEDDING_THREADS (0 = library default)
+    """
+    backend = backend or embedding_backend()
+    num_threads = num_threads or int(os.getenv("EMBEDDING_THREADS", "0")) or None
+
+    if backend == "torch":
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+
+    if backend in ("onnx", "onnx_int8"):
+        from services.onnx_embeddings import ONNXEmbeddings, ONNX_MODEL_FILE, ONNX_INT8_MODEL_FILE, export_onnx_model
+
+        model_dir = os.getenv("EMBEDDING_ONNX_DIR") or os.path.join(_data_dir(), "onnx", EMBEDDING_MODEL_NAME.split("/")[-1])
+        model_file = ONNX_INT8_MODEL_FILE if backend == "onnx_int8" else ONNX_MODEL_FILE
+        if not os.path.exists(os.path.join(model_dir, model_file)):
+            logger.info(f"ONNX model not found in {model_dir}, exporting {EMBEDDING_MODEL_NAME}")
+            export_onnx_model(EMBEDDING_MODEL_NAME, model_dir, quantize=backend == "onnx_int8")
+        return ONNXEmbeddings(model_dir, model_file, num_threads=num_threads)
+
+    raise ValueError(f"Unsupported embedding backend: {backend}")
+
+def create_embeddings(backend: Optional[str] = None) -> CachedEmbeddings:
+    """Create the sentence-transformer embeddings behind the shared persistent cache"""
+    backend = backend or embedding_backend()
+    cache = EmbeddingCache(os.path.join(_data_dir(), "embedding_cache.db"))
+    embeddings = create_embedding_model(backend)
+    logger.info(f"Embedding backend: {backend}")
+    return CachedEmbeddings(embeddings, cache, cache_model_name(backend))
+
+def embedding_parity(reference, candidate, texts: List[str]) -> Dict[str, float]:
+    """
+    Cosine agreement between two embedding models on the same texts
+
+    Args:
+        reference: Model whose vectors are considered correct (the PyTorch model)
+        candidate: Model being checked, e.g. an int8 ONNX model
+
+    Returns:
+        Mean, minimum and 1st percentile cosine similarity of paired vectors
+    """
+    expected = np.array(reference.embed_documents(texts), dtype=np.float32)
+    actual = np.array(candidate.embed_documents(texts), dtype=np.float32)
+    cosines = (expected * actual).sum(axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1) + 1e-12
+    )
+    return {
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "min_cosine": round(float(cosines.min()), 6),
+        "p1_cosine": round(float(np.percentile(cosines, 1)), 6)
+    }
+
+def embed_in_batches(
+    embeddings,
+    texts: List[str],
+    batch_size: Optional[int] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> List[List[float]]:
+    """
+    Embed texts in large batches, logging throughput after each batch
+
+    Args:
+        embeddings: Object with an embed_documents(texts) method
+        texts: Chunk texts, typically from many documents
+        batch_size: Texts per embed_documents call. Defaults to EMBEDDING_BATCH_SIZE
+        progress_callback: Called with a progress dict after every batch
+
+    Returns:
+        One vector per text, in input order
+    """
+    batch_size = batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+    vectors = []
+    start_time = time.time()
+
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(embeddings.embed_documents(texts[start:start + batch_size]))
+
+        elapsed = time.time() - start_time
+        progress = {
+            "embedded_chunks": len(vectors),
+            "total_chunks": len(texts),
+            "elapsed_seconds": round(elapsed, 2),
+            "chunks_per_second": round(len(vectors) / elapsed, 1) if elapsed > 0 else 0.0
+        }
+        logger.info(
+            f"Embedded {progress['embedded_chunks']}/{progress['total_chunks']} chunks "
+            f"({progress['chunks_per_second']} chunks/sec)"
+        )
+        if progress_callback:
+            progress_callback(progress)
+
+    return vectors
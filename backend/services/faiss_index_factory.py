@@ -0,0 +1,204 @@
+"""
+FAISS Index Factory - untuk memilih tipe index (flat, IVF-Flat, HNSW, SQ8, PQ, binary)
+"""
+import math
+import os
+import numpy as np
+import faiss
+from typing import Optional, Tuple, Union
+from services.vector_archive import VectorArchive
+
+class BinaryRescoringIndex:
+    """
+    Binary sign codes searched by Hamming distance, rescored with exact float vectors.
+
+    Only the 1-bit codes (48 bytes per 384-dim vector) stay in RAM; the
+    float vectors of the Hamming top candidates are read from the
+    VectorArchive to compute exact inner products.
+    """
+
+    def __init__(self, dimension: int, vector_archive: VectorArchive, index: Optional[faiss.IndexBinary] = None):
+        self.dimension = dimension
+        self.vector_archive = vector_archive
+        self.index = index if index is not None else faiss.IndexBinaryIDMap2(faiss.IndexBinaryFlat(dimension))
+        self.rescore_factor = int(os.getenv("FAISS_RESCORE_FACTOR", "10"))
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    @property
+    def is_trained(self) -> bool:
+        return True
+
+    def train(self, vectors: np.ndarray):
+        """Sign codes need no training"""
+
+    @staticmethod
+    def encode(vectors: np.ndarray) -> np.ndarray:
+        return np.packbits(vectors > 0, axis=1)
+
+    def add_with_ids(self, vectors: np.ndarray, ids: np.ndarray):
+        self.index.add_with_ids(self.encode(vectors), ids)
+
+    def remove_ids(self, ids: np.ndarray) -> int:
+        return self.index.remove_ids(ids)
+
+    def reconstruct_batch(self, ids: np.ndarray) -> np.ndarray:
+        return self.vector_archive.get(ids)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Hamming pre-filter of k * FAISS_RESCORE_FACTOR candidates, then exact rescoring"""
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        labels = np.full((len(queries), k), -1, dtype=np.int64)
+        if self.ntotal == 0:
+            return scores, labels
+
+        candidate_count = min(k * self.rescore_factor, self.ntotal)
+        _, candidates = self.index.search(self.encode(queries), candidate_count)
+
+        for row, query in enumerate(queries):
+            candidate_ids = candidates[row][candidates[row] >= 0]
+            exact_scores = self.vector_archive.get(candidate_ids) @ query
+            top = np.argsort(-exact_scores)[:k]
+            scores[row, :len(top)] = exact_scores[top]
+            labels[row, :len(top)] = candidate_ids[top]
+
+        return scores, labels
+
+class FAISSIndexFactory:
+    INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "sq8", "pq", "binary")
+
+    @staticmethod
+    def create_index(
+        index_type: str,
+        dimension: int,
+        expected_size: int = 0,
+        vector_archive: Optional[VectorArchive] = None
+    ) -> Union[faiss.Index, BinaryRescoringIndex]:
+        """
+        Create an empty ID-addressable index
+
+        Args:
+            index_type: 'flat', 'ivf_flat', 'hnsw', 'sq8', 'pq' or 'binary'
+            dimension: Embedding dimension
+            expected_size: Number of vectors the index will hold, used to size IVF lists
+            vector_archive: Float vector archive, required for 'binary' rescoring
+
+        Returns:
+            Index accepting add_with_ids (IVF, SQ8 and PQ indexes still need training)
+        """
+        index_type = index_type.lower()
+
+        if index_type == "flat":
+            return faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+        elif index_type == "ivf_flat":
+            nlist = FAISSIndexFactory.ivf_nlist(expected_size)
+            quantizer = faiss.IndexFlatIP(dimension)
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+            # Hashtable direct map keeps reconstruct() and remove_ids() available by chunk ID
+            index.set_direct_map_type(faiss.DirectMap.Hashtable)
+            return index
+        elif index_type == "hnsw":
+            hnsw_m = int(os.getenv("FAISS_HNSW_M", "32"))
+            index = faiss.IndexHNSWFlat(dimension, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = int(os.getenv("FAISS_EF_CONSTRUCTION", "80"))
+            return faiss.IndexIDMap2(index)
+        elif index_type == "sq8":
+            return faiss.IndexIDMap2(faiss.IndexScalarQuantizer(
+                dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            ))
+        elif index_type == "pq":
+            pq_m = int(os.getenv("FAISS_PQ_M", "48"))  # sub-quantizers, must divide the dimension
+            return faiss.IndexIDMap2(faiss.IndexPQ(dimension, pq_m, 8, faiss.METRIC_INNER_PRODUCT))
+        elif index_type == "binary":
+            if vector_archive is None:
+                raise ValueError("Binary index requires a vector archive for rescoring")
+            return BinaryRescoringIndex(dimension, vector_archive)
+        else:
+            raise ValueError(f"Unsupported FAISS index type: {index_type}. Use one of {', '.join(FAISSIndexFactory.INDEX_TYPES)}")
+
+    @staticmethod
+    def ivf_nlist(expected_size: int) -> int:
+        """Number of IVF lists, from FAISS_IVF_NLIST or ~4*sqrt(n)"""
+        configured = int(os.getenv("FAISS_IVF_NLIST", "0"))
+        if configured > 0:
+            return configured
+        # Keep at least ~39 training points per centroid as FAISS recommends
+        return max(1, min(int(4 * math.sqrt(max(expected_size, 1))), expected_size // 39 or 1))
+
+    @staticmethod
+    def index_type_of(index: Union[faiss.Index, BinaryRescoringIndex]) -> str:
+        """Infer the configured index type of a loaded index"""
+        if isinstance(index, BinaryRescoringIndex):
+            return "binary"
+        inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+        if isinstance(inner, faiss.IndexHNSW):
+            return "hnsw"
+        if isinstance(inner, faiss.IndexIVF):
+            return "ivf_flat"
+        if isinstance(inner, faiss.IndexScalarQuantizer):
+            return "sq8"
+        if isinstance(inner, faiss.IndexPQ):
+            return "pq"
+        return "flat"
+
+    @staticmethod
+    def write_index(index: Union[faiss.Index, BinaryRescoringIndex], path: str):
+        if isinstance(index, BinaryRescoringIndex):
+            faiss.write_index_binary(index.index, path)
+        else:
+            faiss.write_index(index, path)
+
+    @staticmethod
+    def read_index(
+        path: str,
+        index_type: str,
+        vector_archive: VectorArchive,
+        mmap: bool = False
+    ) -> Union[faiss.Index, BinaryRescoringIndex]:
+        """
+        Read an index snapshot
+
+        Args:
+            mmap: Map vector codes read-only from the file instead of copying them, so
+                processes opening the same snapshot share its pages. Such an index must
+                not be modified.
+        """
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) if mmap else 0
+        if index_type == "binary":
+            return BinaryRescoringIndex(vector_archive.dimension, vector_archive, faiss.read_index_binary(path, flags))
+        return faiss.read_index(path, flags)
+
+    @staticmethod
+    def memory_bytes(index: Union[faiss.Index, BinaryRescoringIndex]) -> int:
+        """Serialized size of the index, a close proxy for its resident memory"""
+        if isinstance(index, BinaryRescoringIndex):
+            return len(faiss.serialize_index_binary(index.index))
+        return len(faiss.serialize_index(index))
+
+    @staticmethod
+    def supports_removal(index: faiss.Index) -> bool:
+        """HNSW graphs cannot drop vectors in place and must be rebuilt instead"""
+        return FAISSIndexFactory.index_type_of(index) != "hnsw"
+
+    @staticmethod
+    def train(index: faiss.Index, vectors: np.ndarray, max_training_points: Optional[int] = None):
+        """Train index centroids on (a sample of) the given vectors if required"""
+        if index.is_trained:
+            return
+        if max_training_points and len(vectors) > max_training_points:
+            rng = np.random.default_rng(0)
+            vectors = vectors[rng.choice(len(vectors), max_training_points, replace=False)]
+        index.train(vectors)
+
+    @staticmethod
+    def apply_search_params(index: faiss.Index):
+        """Apply nprobe / efSearch knobs from FAISS_NPROBE and FAISS_EF_SEARCH"""
+        index_type = FAISSIndexFactory.index_type_of(index)
+        parameter_space = faiss.ParameterSpace()
+
+        if index_type == "ivf_flat":
+            parameter_space.set_index_parameter(index, "nprobe", int(os.getenv("FAISS_NPROBE", "16")))
+        elif index_type == "hnsw":
+            parameter_space.set_index_parameter(index, "efSearch", int(os.getenv("FAISS_EF_SEARCH", "64")))
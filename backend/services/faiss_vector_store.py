@@ -3,27 +3,70 @@ FAISS Vector Store Service for improved policy search performance
 """
 import os
 import json
+import asyncio
 import pickle
+import time
 import numpy as np
 import faiss
-from typing import List, Dict, Any, Optional
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from typing import List, Dict, Any, Optional, Callable
 import uuid
+from contextlib import asynccontextmanager
+from services.faiss_index_factory import FAISSIndexFactory
+from services.vector_archive import VectorArchive
+from services.chunk_store import ChunkStore
+from services.legal_text_splitter import LegalTextSplitter
+from services.lexical_index import LexicalIndex, fuse_results, hybrid_search_enabled
+from services.document_catalog import DocumentCatalog, summarize_chunks
+from services.embeddings import create_embeddings, embed_in_batches, QueryEmbeddingBatcher
+from utils.compute_pool import query_pool, ingest_pool, ReadWriteLock
+from utils.file_lock import FileLock
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+EMBEDDING_DIMENSION = 384
+
 class FAISSVectorStoreService:
-    def __init__(self):
+    def __init__(self, embeddings=None):
         self.index = None
-        self.documents = []  # Store document content and metadata
-        self.embeddings = None
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
+        self.chunk_ids = set()  # live chunk IDs; content and metadata stay in the chunk store
+        self.next_chunk_id = 0
+        self.tombstones = set()  # chunk_ids deleted but not yet compacted out of the index
+        self.compaction_threshold = float(os.getenv("FAISS_COMPACTION_THRESHOLD", "0.1"))
+        self._compaction_task = None
+        # Index tiering: start flat, move to an ANN index once the corpus is large enough
+        self.ann_index_type = os.getenv("FAISS_INDEX_TYPE", "ivf_flat").lower()
+        self.ann_threshold = int(os.getenv("FAISS_ANN_THRESHOLD", "50000"))
+        self.retrain_ratio = float(os.getenv("FAISS_RETRAIN_RATIO", "0.5"))
+        self.trained_size = 0  # vectors the current index was built from
+        self.vectors_since_train = 0
+        self._rebuild_task = None
+        # Segments: a persisted base index plus a small in-memory delta for new chunks.
+        # Delta vectors are durable in the vector archive (the write-ahead log) and
+        # chunk rows in the chunk store, so recovery replays them from there.
+        self.delta_index = None
+        self.indexed_upto = 0  # chunk IDs below this are in the base index
+        self.persisted_upto = 0  # watermark of the base snapshot on disk
+        self.persisted_index_type = "flat"
+        self.delta_merge_size = int(os.getenv("FAISS_DELTA_MERGE_SIZE", "2000"))
+        self._merge_task = None
+        self._index_lock = asyncio.Lock()  # serializes base index mutation and snapshots
+        # Multi-worker: every uvicorn worker maps the same base snapshot read-only, so its
+        # pages are shared. Writers take a file lock and bump a generation counter on disk;
+        # readers compare it with their own to pick up other workers' writes.
+        self.use_mmap = os.getenv("FAISS_MMAP", "true").lower() == "true"
+        self._mapped_index = None  # base read with mmap; must be copied before mutation
+        self.snapshot_id = 0  # bumped on every base snapshot
+        self.generation = 0  # last generation this process has caught up with
+        self._refresh_lock = asyncio.Lock()
+        # Searches run in pool threads: FAISS objects are read under the read side
+        # and mutated (add, remove, swap) under the write side of this lock
+        self._segment_lock = ReadWriteLock()
+        self._inflight_commits = set()  # first chunk ID of each add whose commit has not settled
+        self.embeddings = embeddings
+        self.query_batcher = None
+        # One chunk per Pasal for legislation; character chunks for other documents
+        self.text_splitter = LegalTextSplitter()
         # Get the directory of this script
         script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         data_dir = os.path.join(script_dir, "data")
@@ -31,24 +74,57 @@ class FAISSVectorStoreService:
         
         self.index_path = os.path.join(data_dir, "faiss_index")
         self.metadata_path = os.path.join(data_dir, "faiss_metadata.json")
-        self.documents_path = os.path.join(data_dir, "faiss_documents.pkl")
+        self.documents_path = os.path.join(data_dir, "faiss_documents.pkl")  # legacy, migrated to chunk store
+        self.chunk_store_path = os.path.join(data_dir, "faiss_chunks.db")
+        self.chunk_store = None
+        # BM25 index over the same chunk IDs, fused with vector hits at search time
+        self.lexical_index_path = os.path.join(data_dir, "faiss_lexical.db")
+        self.lexical_index = None
+        self.hybrid_search = hybrid_search_enabled()
+        # Per-document rows for listings and stats, updated with every add and delete
+        self.catalog_path = os.path.join(data_dir, "faiss_catalog.db")
+        self.catalog = None
+        self.generation_path = os.path.join(data_dir, "faiss_generation")
+        self.write_lock = FileLock(os.path.join(data_dir, "faiss.lock"))
+        # Original float vectors, used for rescoring, recall checks and rebuilds
+        self.vector_archive = VectorArchive(os.path.join(data_dir, "faiss_vectors.f32"), EMBEDDING_DIMENSION)
         self.initialized = False
         
     async def initialize(self):
         """Initialize FAISS index and embeddings"""
+        if self.initialized:
+            return
+        
         try:
-            # Initialize embeddings
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-            )
+            # Initialize embeddings unless a shared model was injected
+            if self.embeddings is None:
+                self.embeddings = create_embeddings()
+            # Coalesces query embeddings of concurrent searches into one forward pass
+            self.query_batcher = QueryEmbeddingBatcher(self.embeddings)
             
-            # Load existing index if available
-            if self._index_exists():
-                await self._load_index()
-            else:
-                # Create new index (384 dimensions for the model)
-                self.index = faiss.IndexFlatIP(384)  # Inner Product for cosine similarity
-                self.documents = []
+            if self.chunk_store is None:
+                self.chunk_store = ChunkStore(self.chunk_store_path)
+            if self.lexical_index is None:
+                self.lexical_index = LexicalIndex(self.lexical_index_path)
+            if self.catalog is None:
+                self.catalog = DocumentCatalog(self.catalog_path)
+            
+            # Another worker may be creating or migrating the store right now
+            await ingest_pool.run(self.write_lock.acquire)
+            try:
+                # Load existing index if available
+                if self._index_exists():
+                    await self._load_index()
+                else:
+                    self._start_empty()
+                    # An empty base snapshot lets recovery replay the delta after a crash
+                    FAISSIndexFactory.write_index(self.index, self.index_path)
+                    self._save_store_metadata()
+                await ingest_pool.run(self._sync_lexical_index)
+                await ingest_pool.run(self._sync_catalog)
+                self.generation = self._read_generation()
+            finally:
+                self.write_lock.release()
                 
             self.initialized = True
             logger.info(f"FAISS vector store initialized with {self.index.ntotal} vectors")
@@ -57,196 +133,651 @@ class FAISSVectorStoreService:
             logger.error(f"Failed to initialize FAISS vector store: {e}")
             raise
     
+    def _new_index(self) -> faiss.Index:
+        """Create an empty index that stores vectors under stable chunk IDs"""
+        # Inner Product on normalized vectors gives cosine similarity
+        return FAISSIndexFactory.create_index("flat", EMBEDDING_DIMENSION)
+    
+    def _start_empty(self):
+        """Set up a new store; refuses if committed chunks exist without an index snapshot"""
+        stored_chunks = len(self.chunk_store.all_ids())
+        if stored_chunks:
+            # Never discard durable data because a file is missing; an operator must restore or rebuild
+            raise RuntimeError(
+                f"FAISS index {self.index_path} is missing but the chunk store holds {stored_chunks} chunks"
+            )
+        self._reset_memory_state()
+    
+    def _reset_memory_state(self):
+        """Empty in-memory index, segments and ID maps; files on disk are not touched"""
+        self.index = self._new_index()
+        self.delta_index = self._new_index()
+        self.indexed_upto = 0
+        self.persisted_upto = 0
+        self.persisted_index_type = "flat"
+        self.chunk_ids = set()
+        self.next_chunk_id = 0
+        self.tombstones = set()
+        self.trained_size = 0
+        self.vectors_since_train = 0
+    
     def _index_exists(self) -> bool:
         """Check if FAISS index files exist"""
-        return (os.path.exists(self.index_path) and 
-                os.path.exists(self.documents_path))
+        return os.path.exists(self.index_path)
     
     async def _load_index(self):
         """Load existing FAISS index and metadata"""
         try:
+            # Load ID allocator, pending tombstones and index type
+            store_metadata = self._read_store_metadata()
+            
             # Load FAISS index
-            self.index = faiss.read_index(self.index_path)
+            self.index = self._open_base(store_metadata.get("index_type", "flat"))
             
-            # Load documents
-            with open(self.documents_path, 'rb') as f:
-                self.documents = pickle.load(f)
+            if os.path.exists(self.documents_path):
+                self._migrate_documents_pickle()
+            
+            # Only chunk IDs are loaded; content is read from the chunk store per hit
+            self._load_state(store_metadata, self.chunk_store.all_ids())
+            self._backfill_vector_archive()
+            
+            # Finish deletes that were tombstoned but not yet removed from the chunk store
+            pending = self.tombstones & self.chunk_ids
+            if pending:
+                self.chunk_store.delete_chunks(pending)
+                self.lexical_index.delete(pending)
+                self.chunk_ids -= pending
+            
+            self._replay_delta()
                 
-            logger.info(f"Loaded FAISS index with {self.index.ntotal} vectors")
+            logger.info(f"Loaded FAISS index with {self.index.ntotal} base and {self.delta_index.ntotal} delta vectors ({len(self.tombstones)} tombstoned)")
             
         except Exception as e:
+            # Fail startup loudly: the chunk store, vector archive and catalog stay intact for recovery
             logger.error(f"Failed to load FAISS index: {e}")
-            # Create new index if loading fails
-            self.index = faiss.IndexFlatIP(384)
-            self.documents = []
+            self._reset_memory_state()
+            raise
+    
+    def _migrate_documents_pickle(self):
+        """Move chunks from the legacy documents pickle into the chunk store"""
+        with open(self.documents_path, 'rb') as f:
+            documents = pickle.load(f)
+        
+        if isinstance(documents, list):
+            documents = self._migrate_positional_index(documents)
+        
+        self.chunk_store.add_chunks(documents.items())
+        # Persist the (possibly migrated) index before the pickle is retired.
+        # Write beside the snapshot: the loaded base may be mapped from it.
+        FAISSIndexFactory.write_index(self.index, f"{self.index_path}.tmp")
+        os.replace(f"{self.index_path}.tmp", self.index_path)
+        os.replace(self.documents_path, f"{self.documents_path}.migrated")
+        logger.info(f"Migrated {len(documents)} chunks from {self.documents_path} to the chunk store")
+    
+    def _migrate_positional_index(self, documents: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """Convert a legacy positional index and document list to ID-mapped storage"""
+        legacy_index = self.index
+        ids = np.arange(legacy_index.ntotal, dtype=np.int64)
+        
+        self.index = self._new_index()
+        if legacy_index.ntotal > 0:
+            # Reuse the stored vectors; nothing is re-embedded
+            vectors = legacy_index.reconstruct_n(0, legacy_index.ntotal)
+            self.index.add_with_ids(vectors, ids)
+        
+        logger.info(f"Migrated legacy FAISS index with {len(documents)} chunks to stable chunk IDs")
+        return {int(chunk_id): doc for chunk_id, doc in zip(ids, documents)}
+    
+    def _sync_lexical_index(self):
+        """Rebuild the BM25 index from the chunk store if it is missing or out of step"""
+        if self.lexical_index.count() == len(self.chunk_ids):
+            return
+        
+        self.lexical_index.reset()
+        for batch in self.chunk_store.iter_chunks():
+            self.lexical_index.add(self._lexical_entries(batch))
+        logger.info(f"Built BM25 index for {len(self.chunk_ids)} chunks")
+    
+    def _sync_catalog(self):
+        """Rebuild the document catalog from the chunk store if it is missing or out of step"""
+        if self.catalog.total_chunks() == len(self.chunk_ids):
+            return
+        
+        self.catalog.rebuild(self._catalog_chunks())
+        logger.info(f"Built document catalog for {len(self.chunk_ids)} chunks")
+    
+    def _catalog_chunks(self):
+        """(chunk ID, metadata, content) in ID order, giving every chunk of an add the same document ID"""
+        # Chunks stored before document IDs were stable carry one random ID each; a
+        # document is a run of consecutive IDs starting at chunk_index 0, so the run's
+        # first ID is written back to all of its chunks
+        run_id, run_title = None, None
+        for batch in self.chunk_store.iter_chunks():
+            fixed = []
+            for chunk_id, doc in batch:
+                metadata = doc["metadata"]
+                if run_id is None or metadata.get("chunk_index", 0) == 0 or metadata.get("title") != run_title:
+                    run_id = metadata.get("document_id") or str(uuid.uuid4())
+                    run_title = metadata.get("title")
+                if metadata.get("document_id") != run_id:
+                    metadata["document_id"] = run_id
+                    fixed.append((chunk_id, doc))
+                yield chunk_id, metadata, doc["content"]
+            if fixed:
+                self.chunk_store.add_chunks(fixed)
+    
+    def _lexical_entries(self, chunks):
+        return [
+            (chunk_id, doc["metadata"].get("title", ""), doc["content"], doc["metadata"].get("category"))
+            for chunk_id, doc in chunks
+        ]
+    
+    def _open_base(self, index_type: str) -> faiss.Index:
+        """Read the base snapshot, memory-mapped read-only when FAISS_MMAP is on"""
+        index = FAISSIndexFactory.read_index(self.index_path, index_type, self.vector_archive, mmap=self.use_mmap)
+        FAISSIndexFactory.apply_search_params(index)
+        self._mapped_index = index if self.use_mmap else None
+        return index
+    
+    def _mutable_base(self) -> faiss.Index:
+        """Base index that may be modified: a private copy when the base is mapped from disk"""
+        if self.index is not self._mapped_index:
+            return self.index
+        # Copy on write; the mapped snapshot stays untouched for concurrent searches
+        index = FAISSIndexFactory.read_index(self.index_path, self.persisted_index_type, self.vector_archive)
+        FAISSIndexFactory.apply_search_params(index)
+        return index
+    
+    def _load_state(self, store_metadata: Dict[str, Any], chunk_ids: List[int]):
+        """Set the ID allocator, tombstones and watermarks from the store metadata"""
+        self.chunk_ids = set(chunk_ids)
+        self.next_chunk_id = max(max(self.chunk_ids, default=-1) + 1, store_metadata.get("next_chunk_id", 0))
+        self.tombstones = set(store_metadata.get("tombstones", []))
+        self.trained_size = store_metadata.get("trained_size", 0)
+        self.vectors_since_train = store_metadata.get("vectors_since_train", 0)
+        # Stores saved before segments existed had every chunk in the base index
+        self.indexed_upto = self.persisted_upto = store_metadata.get("indexed_upto", self.next_chunk_id)
+        self.persisted_index_type = store_metadata.get("index_type", "flat")
+        self.snapshot_id = store_metadata.get("snapshot_id", 0)
+    
+    def _backfill_vector_archive(self):
+        """Populate the vector archive from the index for stores created before it existed"""
+        if len(self.vector_archive) >= self.next_chunk_id or not self.chunk_ids:
+            return
+        
+        if FAISSIndexFactory.index_type_of(self.index) not in ("flat", "ivf_flat", "hnsw"):
+            logger.warning("FAISS vector archive is incomplete and the index is lossy; rebuilds will use compressed vectors")
+            return
+        
+        ids = np.array(sorted(cid for cid in self.chunk_ids if cid < self.indexed_upto), dtype=np.int64)
+        self.vector_archive.write(ids, self.index.reconstruct_batch(ids))
+        logger.info(f"Backfilled FAISS vector archive with {len(ids)} vectors")
+    
+    def _replay_delta(self):
+        """Crash recovery: rebuild the delta segment from chunks committed after the base snapshot"""
+        self.delta_index = self._build_delta()
+        if self.delta_index.ntotal:
+            logger.info(f"Replayed {self.delta_index.ntotal} chunks into the FAISS delta segment")
+    
+    def _build_delta(self) -> faiss.Index:
+        """Delta segment holding every live chunk committed after the base snapshot"""
+        delta_index = self._new_index()
+        delta_ids = np.array(sorted(cid for cid in self.chunk_ids if cid >= self.indexed_upto), dtype=np.int64)
+        if len(delta_ids):
+            delta_index.add_with_ids(self.vector_archive.get(delta_ids), delta_ids)
+        return delta_index
+    
+    def _read_store_metadata(self) -> Dict[str, Any]:
+        if not os.path.exists(self.metadata_path):
+            return {}
+        with open(self.metadata_path, 'r') as f:
+            return json.load(f)
+    
+    def _save_store_metadata(self):
+        """Persist the ID allocator and tombstones (small, cheap to rewrite)"""
+        tmp_path = f"{self.metadata_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "next_chunk_id": self.next_chunk_id,
+                "tombstones": sorted(self.tombstones),
+                # Describe the snapshot on disk, not the in-memory index being saved
+                "index_type": self.persisted_index_type,
+                "indexed_upto": self.persisted_upto,
+                "trained_size": self.trained_size,
+                "vectors_since_train": self.vectors_since_train,
+                "snapshot_id": self.snapshot_id
+            }, f)
+        os.replace(tmp_path, self.metadata_path)
     
     async def _save_index(self):
-        """Save FAISS index and metadata to disk"""
+        """Write a snapshot of the base index; callers hold the index lock"""
         try:
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
             
-            # Save FAISS index
-            faiss.write_index(self.index, self.index_path)
+            # Save FAISS index off the event loop, then swap it in atomically
+            tmp_path = f"{self.index_path}.tmp"
+            indexed_upto = self.indexed_upto
+            await ingest_pool.run(self._write_snapshot, tmp_path)
+            os.replace(tmp_path, self.index_path)
+            
+            # Chunk content is already committed to the chunk store as it is added
+            self.persisted_upto = indexed_upto
+            self.persisted_index_type = FAISSIndexFactory.index_type_of(self.index)
+            self.snapshot_id += 1
+            self._save_store_metadata()
             
-            # Save documents
-            with open(self.documents_path, 'wb') as f:
-                pickle.dump(self.documents, f)
+            if self.use_mmap:
+                # Serve from the shared mapping of the new snapshot instead of private memory
+                mapped = await ingest_pool.run(self._open_base, self.persisted_index_type)
+                await ingest_pool.run(self._install_base, mapped)
                 
             logger.info(f"Saved FAISS index with {self.index.ntotal} vectors")
             
         except Exception as e:
             logger.error(f"Failed to save FAISS index: {e}")
     
+    def _write_snapshot(self, path: str):
+        with self._segment_lock.read():
+            FAISSIndexFactory.write_index(self.index, path)
+    
+    def _install_base(self, index: faiss.Index):
+        with self._segment_lock.write():
+            self.index = index
+    
+    def _read_generation(self) -> int:
+        try:
+            with open(self.generation_path, 'r') as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+    
+    def _publish_generation(self):
+        """Tell other workers the store changed; callers hold the file lock"""
+        generation = self._read_generation() + 1
+        tmp_path = f"{self.generation_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(str(generation))
+        os.replace(tmp_path, self.generation_path)
+        self.generation = generation
+    
+    @asynccontextmanager
+    async def _write_transaction(self):
+        """
+        Exclusive write access across workers: catch up with other workers' writes
+        first, publish a new generation after the body succeeds
+        """
+        async with self._index_lock:
+            await ingest_pool.run(self.write_lock.acquire)
+            try:
+                await self.refresh()
+                yield
+                self._publish_generation()
+            finally:
+                self.write_lock.release()
+    
+    async def refresh(self):
+        """Pick up chunks, deletes and snapshots written by other workers"""
+        async with self._refresh_lock:
+            generation = self._read_generation()
+            if generation == self.generation:
+                return
+            
+            store_metadata = self._read_store_metadata()
+            if store_metadata.get("snapshot_id", 0) != self.snapshot_id:
+                # A merge, compaction or rebuild wrote a new base: map it and rebuild the delta
+                index = await ingest_pool.run(self._open_base, store_metadata.get("index_type", "flat"))
+                chunk_ids = await ingest_pool.run(self.chunk_store.all_ids)
+                self._load_state(store_metadata, chunk_ids)
+                delta_index = await ingest_pool.run(self._build_delta)
+                await ingest_pool.run(self._install_segments, index, delta_index)
+                logger.info(f"Reloaded FAISS snapshot {self.snapshot_id} written by another worker")
+            else:
+                # Only adds and deletes: extend the delta with chunks committed since our watermark
+                new_ids = await ingest_pool.run(self.chunk_store.ids_from, self.next_chunk_id)
+                self.tombstones = set(store_metadata.get("tombstones", []))
+                live_ids = np.array(sorted(cid for cid in new_ids if cid not in self.tombstones), dtype=np.int64)
+                if len(live_ids):
+                    vectors = await ingest_pool.run(self.vector_archive.get, live_ids)
+                    await ingest_pool.run(self._add_to_delta, live_ids, vectors)
+                self.chunk_ids.update(live_ids.tolist())
+                self.chunk_ids -= self.tombstones
+                self.next_chunk_id = max(self.next_chunk_id, max(new_ids, default=-1) + 1)
+                self.vectors_since_train += len(live_ids)
+            
+            self.generation = generation
+    
+    def _install_segments(self, index: faiss.Index, delta_index: faiss.Index):
+        with self._segment_lock.write():
+            self.index = index
+            self.delta_index = delta_index
+    
+    def _add_to_delta(self, ids: np.ndarray, vectors: np.ndarray):
+        with self._segment_lock.write():
+            self.delta_index.add_with_ids(vectors, ids)
+    
     async def add_document(self, title: str, content: str, metadata: Dict[str, Any]) -> str:
         """Add a document to the FAISS vector store"""
+        document_ids = await self.add_documents([{"title": title, "content": content, "metadata": metadata}])
+        return document_ids[0]
+    
+    async def add_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[str]:
+        """Add many documents with batched embedding across documents and a single commit"""
         try:
-            # Split document into chunks
-            chunks = self.text_splitter.split_text(content)
-            
-            # Generate embeddings for chunks
-            embeddings_list = self.embeddings.embed_documents(chunks)
-            embeddings_array = np.array(embeddings_list, dtype=np.float32)
-            
-            # Normalize embeddings for cosine similarity
-            faiss.normalize_L2(embeddings_array)
-            
-            # Add to FAISS index
-            self.index.add(embeddings_array)
-            
-            # Store document metadata and content
-            for i, chunk in enumerate(chunks):
-                chunk_metadata = metadata.copy()
-                chunk_metadata.update({
-                    "title": title,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks),
-                    "document_id": str(uuid.uuid4())
-                })
+            start_time = time.time()
+            
+            # Split every document into chunks; chunks of a document share its ID
+            document_ids = [str(uuid.uuid4()) for _ in documents]
+            new_chunks = []
+            for document, document_id in zip(documents, document_ids):
+                chunks = self.text_splitter.split_with_metadata(document["content"])
+                for i, (chunk, unit_metadata) in enumerate(chunks):
+                    chunk_metadata = document["metadata"].copy()
+                    chunk_metadata.update(unit_metadata)
+                    chunk_metadata.update({
+                        "title": document["title"],
+                        "chunk_index": i,
+                        "total_chunks": len(chunks),
+                        "document_id": document_id
+                    })
+                    new_chunks.append({
+                        "content": chunk,
+                        "metadata": chunk_metadata
+                    })
+            
+            if not new_chunks:
+                return document_ids
+            
+            # Generate embeddings in large batches spanning documents, off the event loop
+            embeddings_array = await ingest_pool.run(
+                self._embed_chunks, [chunk["content"] for chunk in new_chunks], batch_size, progress_callback
+            )
+            
+            # IDs are allocated and committed under the cross-worker write lock
+            async with self._write_transaction():
+                # Allocate chunk IDs
+                chunk_ids = np.arange(self.next_chunk_id, self.next_chunk_id + len(new_chunks), dtype=np.int64)
+                self.next_chunk_id += len(new_chunks)
                 
-                self.documents.append({
-                    "content": chunk,
-                    "metadata": chunk_metadata
-                })
+                # Merges and rebuilds leave unsettled IDs in the delta segment
+                self._inflight_commits.add(int(chunk_ids[0]))
+                try:
+                    await ingest_pool.run(self._commit_chunks, chunk_ids, embeddings_array, new_chunks)
+                    # Chunks deleted by title while the commit was running stay deleted
+                    self.chunk_ids.update(cid for cid in chunk_ids.tolist() if cid not in self.tombstones)
+                finally:
+                    self._inflight_commits.discard(int(chunk_ids[0]))
+                self.vectors_since_train += len(new_chunks)
             
-            # Save index
-            await self._save_index()
+            self._maybe_merge()
+            self._maybe_reindex()
             
-            logger.info(f"Added document '{title}' with {len(chunks)} chunks to FAISS")
-            return str(uuid.uuid4())
+            elapsed = time.time() - start_time
+            logger.info(
+                f"Added {len(documents)} documents with {len(new_chunks)} chunks to FAISS "
+                f"in {elapsed:.2f}s ({len(new_chunks) / max(elapsed, 1e-9):.1f} chunks/sec)"
+            )
+            return document_ids
             
         except Exception as e:
-            logger.error(f"Failed to add document to FAISS: {e}")
+            logger.error(f"Failed to add documents to FAISS: {e}")
             raise
     
+    def _embed_chunks(
+        self,
+        texts: List[str],
+        batch_size: Optional[int],
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]]
+    ) -> np.ndarray:
+        """Embed and L2-normalize chunk texts (runs in the ingest pool)"""
+        embeddings_array = np.array(embed_in_batches(self.embeddings, texts, batch_size, progress_callback), dtype=np.float32)
+        # Normalize embeddings for cosine similarity
+        faiss.normalize_L2(embeddings_array)
+        return embeddings_array
+    
+    def _commit_chunks(self, chunk_ids: np.ndarray, vectors: np.ndarray, chunks: List[Dict[str, Any]]):
+        """Durably store new chunks and add them to the delta segment (runs in the ingest pool)"""
+        # Log vectors first (append + fsync); the chunk store commit below is the commit point
+        self.vector_archive.write(chunk_ids, vectors, fsync=True)
+        self.chunk_store.add_chunks(zip(chunk_ids.tolist(), chunks))
+        self.lexical_index.add(self._lexical_entries(zip(chunk_ids.tolist(), chunks)))
+        # A document's chunks get consecutive IDs, so its catalog row holds the range
+        self.catalog.add(summarize_chunks(
+            (chunk_id, chunk["metadata"], chunk["content"]) for chunk_id, chunk in zip(chunk_ids.tolist(), chunks)
+        ))
+        
+        # New chunks go to the delta segment; the base index is not rewritten
+        with self._segment_lock.write():
+            self.delta_index.add_with_ids(vectors, chunk_ids)
+    
+    def _settled_upto(self) -> int:
+        """Chunk IDs below this have no add still in flight"""
+        return min(self._inflight_commits, default=self.next_chunk_id)
+    
     async def search_documents(self, query: str, limit: int = 5, category: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search for relevant documents using FAISS"""
+        results = await self.search_documents_batch([query], limit, category)
+        return results[0]
+    
+    async def search_documents_batch(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        category: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search many queries with one embedding pass and one matrix search"""
         try:
             if not self.initialized:
                 await self.initialize()
+            await self.refresh()
                 
-            if self.index.ntotal == 0:
-                return []
+            total_vectors = self.index.ntotal + self.delta_index.ntotal
+            if total_vectors == 0 or not queries:
+                return [[] for _ in queries]
             
-            # Generate query embedding
-            query_embedding = self.embeddings.embed_query(query)
-            query_vector = np.array([query_embedding], dtype=np.float32)
+            # Generate query embeddings in one forward pass, batched with concurrent searches
+            query_embeddings = await self.query_batcher.embed_queries(queries)
+            query_vectors = np.array(query_embeddings, dtype=np.float32)
             
             # Normalize for cosine similarity
-            faiss.normalize_L2(query_vector)
-            
-            # Search with FAISS (get more results for filtering)
-            search_limit = min(limit * 3, self.index.ntotal)
-            scores, indices = self.index.search(query_vector, search_limit)
-            
-            # Format results
-            formatted_results = []
-            for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-                if idx == -1:  # FAISS returns -1 for invalid indices
-                    continue
-                    
-                doc = self.documents[idx]
-                
-                # Apply category filter if specified
-                if category and doc["metadata"].get("category") != category:
-                    continue
-                
-                formatted_results.append({
-                    "content": doc["content"],
-                    "metadata": doc["metadata"],
-                    "distance": float(1.0 - score),  # Convert similarity to distance
-                    "similarity_score": float(score)
-                })
-                
-                if len(formatted_results) >= limit:
-                    break
+            faiss.normalize_L2(query_vectors)
+            
+            # Search with FAISS (get more results for filtering and tombstones)
+            search_limit = min(limit * 3 + len(self.tombstones), total_vectors)
+            scores, indices = await query_pool.run(self._search_segments, query_vectors, search_limit)
+            
+            # Skip invalid (-1) and tombstoned IDs, then fetch only the hits' content
+            hits = [
+                [
+                    (float(score), int(idx)) for score, idx in zip(scores[row], indices[row])
+                    if idx != -1 and int(idx) in self.chunk_ids
+                ]
+                for row in range(len(queries))
+            ]
+            hit_ids = {idx for row_hits in hits for _, idx in row_hits}
             
-            return formatted_results
+            if not self.hybrid_search:
+                chunks = await query_pool.run(self.chunk_store.get_chunks, sorted(hit_ids))
+                return [self._format_hits(row_hits, chunks, limit, category) for row_hits in hits]
+            
+            # BM25 candidates from the inverted index, fused with the vector hits
+            candidate_limit = limit * 3
+            lexical_rows = await query_pool.run(self.lexical_index.search_many, queries, candidate_limit, category)
+            lexical_rows = [
+                [(int(chunk_key), score) for chunk_key, score in row if int(chunk_key) in self.chunk_ids]
+                for row in lexical_rows
+            ]
+            hit_ids.update(idx for row in lexical_rows for idx, _ in row)
+            chunks = await query_pool.run(self.chunk_store.get_chunks, sorted(hit_ids))
+            # Lexical hits get a vector score too, so downstream distance thresholds still apply
+            similarities = await query_pool.run(self._lexical_similarities, query_vectors, lexical_rows)
+            
+            results = []
+            for row_hits, lexical_row, row_similarities in zip(hits, lexical_rows, similarities):
+                vector_results = self._format_hits(row_hits, chunks, candidate_limit, category)
+                lexical_results = self._format_hits(
+                    [(float(similarity), idx) for similarity, (idx, _) in zip(row_similarities, lexical_row)],
+                    chunks, candidate_limit, category
+                )
+                bm25_scores = dict(lexical_row)
+                for result in lexical_results:
+                    result["bm25_score"] = round(bm25_scores[result["chunk_id"]], 4)
+                results.append(fuse_results(vector_results, lexical_results, limit))
+            return results
             
         except Exception as e:
             logger.error(f"Failed to search documents with FAISS: {e}")
             raise
     
+    def _format_hits(
+        self,
+        hits: List[tuple],
+        chunks: Dict[int, Dict[str, Any]],
+        limit: int,
+        category: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Format (score, chunk_id) hits of one query as search results"""
+        formatted_results = []
+        for score, idx in hits:
+            doc = chunks.get(idx)
+            if doc is None:
+                continue
+            
+            # Apply category filter if specified
+            if category and doc["metadata"].get("category") != category:
+                continue
+            
+            formatted_results.append({
+                "chunk_id": idx,
+                "content": doc["content"],
+                "metadata": dict(doc["metadata"]),  # queries of a batch may share a chunk
+                "distance": float(1.0 - score),  # Convert similarity to distance
+                "similarity_score": float(score)
+            })
+            
+            if len(formatted_results) >= limit:
+                break
+        
+        return formatted_results
+    
+    def _lexical_similarities(self, query_vectors: np.ndarray, lexical_rows: List[List[tuple]]) -> List[np.ndarray]:
+        """Cosine similarity of each query to its BM25 hits, from the archived vectors"""
+        ids = np.array(sorted({idx for row in lexical_rows for idx, _ in row}), dtype=np.int64)
+        if len(ids) == 0:
+            return [np.zeros(0, dtype=np.float32) for _ in lexical_rows]
+        
+        positions = {int(idx): position for position, idx in enumerate(ids)}
+        vectors = self.vector_archive.get(ids)
+        return [
+            vectors[[positions[idx] for idx, _ in row]] @ query_vector if row else np.zeros(0, dtype=np.float32)
+            for query_vector, row in zip(query_vectors, lexical_rows)
+        ]
+    
+    def _search_segments(self, query_vectors: np.ndarray, k: int):
+        """Search the base and delta segments and merge their top-k by score"""
+        with self._segment_lock.read():
+            results = [
+                segment.search(query_vectors, min(k, segment.ntotal))
+                for segment in (self.index, self.delta_index)
+                if segment.ntotal > 0
+            ]
+        if not results:
+            return np.full((len(query_vectors), 0), -np.inf, dtype=np.float32), np.full((len(query_vectors), 0), -1, dtype=np.int64)
+        scores = np.concatenate([result[0] for result in results], axis=1)
+        indices = np.concatenate([result[1] for result in results], axis=1)
+        order = np.argsort(-scores, axis=1)[:, :k]
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(indices, order, axis=1)
+    
     async def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the FAISS collection"""
         try:
             if not self.initialized:
                 await self.initialize()
+            await self.refresh()
                 
-            # Count unique documents (by title)
-            titles = set()
-            for doc in self.documents:
-                titles.add(doc["metadata"].get("title", "Unknown"))
-            
             return {
-                "total_vectors": self.index.ntotal if self.index else 0,
-                "total_documents": len(titles),
-                "total_chunks": len(self.documents),
+                "total_vectors": self.index.ntotal + self.delta_index.ntotal if self.index else 0,
+                "delta_vectors": self.delta_index.ntotal if self.delta_index else 0,
+                **await query_pool.run(self.catalog.stats),
+                "tombstoned_chunks": len(self.tombstones),
+                "index_type": FAISSIndexFactory.index_type_of(self.index) if self.index else None,
+                "embedding_cache": self.embeddings.cache.stats(),
                 "vector_store_type": "FAISS"
             }
         except Exception as e:
             logger.error(f"Failed to get FAISS collection stats: {e}")
             return {"total_vectors": 0, "total_documents": 0, "vector_store_type": "FAISS"}
     
-    async def get_all_documents(self) -> List[Dict[str, Any]]:
-        """Get all documents with their metadata"""
-        try:
-            if not self.initialized:
-                await self.initialize()
-            
-            # Group by document title to avoid duplicates
-            documents_map = {}
-            
-            for doc in self.documents:
-                metadata = doc["metadata"]
-                title = metadata.get("title", "Unknown")
-                
-                if title not in documents_map:
-                    documents_map[title] = {
-                        "title": title,
-                        "category": metadata.get("category", "general"),
-                        "document_type": metadata.get("document_type", "regulation"),
-                        "source": metadata.get("source", "unknown"),
-                        "date_created": metadata.get("date_created", "unknown"),
-                        "language": metadata.get("language", "id"),
-                        "chunk_count": 1,
-                        "preview": doc["content"][:200] + "..." if len(doc["content"]) > 200 else doc["content"]
-                    }
-                else:
-                    documents_map[title]["chunk_count"] += 1
-            
-            # Convert to list and sort by date_created
-            documents_list = list(documents_map.values())
-            documents_list.sort(key=lambda x: x.get("date_created", ""), reverse=True)
-            
-            return documents_list
-            
-        except Exception as e:
-            logger.error(f"Failed to get all documents from FAISS: {e}")
-            return []
+    async def corpus_version(self) -> int:
+        """Counter that changes whenever any worker adds or deletes a document"""
+        if not self.initialized:
+            await self.initialize()
+        return await query_pool.run(self.catalog.version)
+    
+    async def embed_query(self, query: str) -> List[float]:
+        """Query embedding from the shared cache and batcher, as used by search"""
+        if not self.initialized:
+            await self.initialize()
+        return await self.query_batcher.embed_query(query)
+    
+    async def list_documents(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: str = "date_created",
+        descending: bool = True,
+        category: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """One page of documents from the catalog, with the total and the cursor of the next page"""
+        if not self.initialized:
+            await self.initialize()
+        await self.refresh()
+        
+        documents, next_cursor = await query_pool.run(self.catalog.page, limit, cursor, sort, descending, category)
+        return {
+            "documents": documents,
+            "total": await query_pool.run(self.catalog.count, category),
+            "next_cursor": next_cursor
+        }
+    
+    async def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """A document's catalog row and its chunks in order, read by chunk ID range"""
+        if not self.initialized:
+            await self.initialize()
+        await self.refresh()
+        
+        document = await query_pool.run(self.catalog.get, document_id)
+        if document is None:
+            return None
+        
+        chunks = await query_pool.run(self.chunk_store.get_chunks, self._document_chunk_ids(document))
+        return {
+            **document,
+            "chunks": [
+                {"chunk_id": chunk_id, "content": chunk["content"], "metadata": chunk["metadata"]}
+                for chunk_id, chunk in sorted(chunks.items())
+            ]
+        }
     
-    def delete_document_by_title(self, title: str) -> Dict[str, Any]:
-        """Delete all chunks of a document by title"""
+    async def delete_document(self, document_id: str) -> Dict[str, Any]:
+        """Delete one document by its ID"""
+        def find_documents():
+            document = self.catalog.get(document_id)
+            return [document] if document else []
+        
+        return await self._delete_documents(find_documents, f"Document '{document_id}'")
+    
+    async def delete_document_by_title(self, title: str) -> Dict[str, Any]:
+        """Delete every document uploaded under a title"""
+        return await self._delete_documents(lambda: self.catalog.find_by_title(title), f"Document '{title}'")
+    
+    async def _delete_documents(self, find_documents: Callable[[], List[Dict[str, Any]]], label: str) -> Dict[str, Any]:
+        """Tombstone the chunk ranges of the catalog rows returned by find_documents"""
         try:
             if not self.initialized:
                 return {
@@ -254,62 +785,324 @@ class FAISSVectorStoreService:
                     "message": "Vector store not initialized"
                 }
             
-            # Find indices of chunks with matching title
-            indices_to_remove = []
-            for i, doc in enumerate(self.documents):
-                if doc["metadata"].get("title") == title:
-                    indices_to_remove.append(i)
-            
-            if not indices_to_remove:
-                return {
-                    "success": False,
-                    "message": f"Document '{title}' not found"
-                }
-            
-            # Remove from documents list (in reverse order to maintain indices)
-            for i in reversed(indices_to_remove):
-                self.documents.pop(i)
-            
-            # Rebuild FAISS index (FAISS doesn't support efficient deletion)
-            self._rebuild_index()
+            async with self._write_transaction():
+                # The catalog maps each document to its chunk ID range; no chunk is scanned
+                documents = await query_pool.run(find_documents)
+                
+                if not documents:
+                    return {
+                        "success": False,
+                        "message": f"{label} not found"
+                    }
+                
+                chunk_ids = [
+                    chunk_id for document in documents
+                    for chunk_id in self._document_chunk_ids(document) if chunk_id in self.chunk_ids
+                ]
+                await self.delete_chunks(chunk_ids)
+                await query_pool.run(self.catalog.remove, [document["document_id"] for document in documents])
             
-            logger.info(f"Deleted document '{title}' with {len(indices_to_remove)} chunks from FAISS")
+            logger.info(f"Deleted {label} ({len(documents)} documents, {len(chunk_ids)} chunks) from FAISS")
             
             return {
                 "success": True,
-                "message": f"Document '{title}' deleted successfully",
-                "deleted_chunks": len(indices_to_remove)
+                "message": f"{label} deleted successfully",
+                "deleted_chunks": len(chunk_ids)
             }
             
         except Exception as e:
-            logger.error(f"Failed to delete document '{title}' from FAISS: {e}")
+            logger.error(f"Failed to delete {label} from FAISS: {e}")
             return {
                 "success": False,
                 "message": f"Error deleting document: {str(e)}"
             }
     
-    def _rebuild_index(self):
-        """Rebuild FAISS index after deletion"""
+    def _document_chunk_ids(self, document: Dict[str, Any]) -> List[int]:
+        return list(range(document["first_chunk_id"], document["first_chunk_id"] + document["chunk_count"]))
+    
+    async def delete_chunks(self, chunk_ids: List[int]):
+        """Tombstone chunks by ID; callers hold the write transaction"""
+        self.chunk_ids.difference_update(chunk_ids)
+        self.tombstones.update(chunk_ids)
+        
+        # Only the small metadata file is rewritten; the index stays untouched.
+        # Tombstones are persisted first so a crash before the row delete is replayed on load.
+        self._save_store_metadata()
+        await query_pool.run(self.chunk_store.delete_chunks, chunk_ids)
+        await query_pool.run(self.lexical_index.delete, chunk_ids)
+        
+        if len(self.tombstones) > self.compaction_threshold * max(len(self.chunk_ids), 1):
+            self._schedule_compaction()
+    
+    def _schedule_compaction(self):
+        """Run compaction in the background if it is not already running"""
+        self._schedule_background("_compaction_task", self.compact)
+    
+    def _schedule_background(self, task_attr: str, coroutine_function, *args):
+        """Start a background maintenance task unless one of the same kind is running"""
+        task = getattr(self, task_attr)
+        if task and not task.done():
+            return
         try:
-            if not self.documents:
-                self.index = faiss.IndexFlatIP(384)
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(coroutine_function(*args))
+            return
+        setattr(self, task_attr, loop.create_task(coroutine_function(*args)))
+    
+    def _maybe_merge(self):
+        """Merge the delta segment into the base once it reaches FAISS_DELTA_MERGE_SIZE"""
+        if self.delta_index.ntotal >= self.delta_merge_size:
+            self._schedule_background("_merge_task", self.merge_delta)
+    
+    async def merge_delta(self):
+        """Fold the delta segment into the base index and snapshot it"""
+        async with self._write_transaction():
+            if self.delta_index.ntotal == 0:
                 return
+            try:
+                # Chunks of adds still in flight stay in the delta segment
+                merge_upto = self._settled_upto()
+                delta_ids = np.array(
+                    sorted(cid for cid in self.chunk_ids if self.indexed_upto <= cid < merge_upto), dtype=np.int64
+                )
+                vectors = await ingest_pool.run(self.vector_archive.get, delta_ids)
+                base = await ingest_pool.run(self._mutable_base)
+                await ingest_pool.run(self._move_to_base, base, delta_ids, vectors, self.indexed_upto, merge_upto)
+                
+                # Tombstoned delta chunks are simply not merged
+                moved_ids = set(delta_ids.tolist())
+                self.tombstones = {
+                    cid for cid in self.tombstones
+                    if cid in moved_ids or not self.indexed_upto <= cid < merge_upto
+                }
+                self.indexed_upto = merge_upto
+                
+                await self._save_index()
+                logger.info(f"Merged {len(delta_ids)} delta vectors into the FAISS base index")
+                
+            except Exception as e:
+                logger.error(f"Failed to merge FAISS delta segment: {e}")
+    
+    def _move_to_base(self, base: faiss.Index, ids: np.ndarray, vectors: np.ndarray, start: int, end: int):
+        """Add settled delta vectors to the base and drop the ID range from the delta"""
+        with self._segment_lock.write():
+            if len(ids):
+                base.add_with_ids(vectors, ids)
+            self.delta_index.remove_ids(faiss.IDSelectorRange(start, end))
+            self.index = base
+    
+    async def flush(self):
+        """Merge pending delta vectors so the base snapshot is complete"""
+        await self.merge_delta()
+    
+    async def close(self):
+        """Flush segments and release the chunk store"""
+        if self.initialized:
+            await self.flush()
+            self.chunk_store.close()
+            self.lexical_index.close()
+            self.catalog.close()
+            self.lexical_index = None
+            self.catalog = None
+            self.chunk_store = None
+            self.initialized = False
+    
+    async def compact(self) -> int:
+        """Remove tombstoned vectors from the index and persist the result"""
+        if not self.tombstones:
+            return 0
+        
+        if not FAISSIndexFactory.supports_removal(self.index):
+            # HNSW graphs cannot drop vectors, so compaction rebuilds from live vectors
+            index_type = FAISSIndexFactory.index_type_of(self.index)
+            before = self.index.ntotal + self.delta_index.ntotal
+            await self._rebuild_index(index_type)
+            return before - self.index.ntotal - self.delta_index.ntotal
+        
+        async with self._write_transaction():
+            try:
+                # Snapshot the tombstones so deletes arriving meanwhile are kept for the next run
+                removed_ids = set(self.tombstones)
+                removed_array = np.array(sorted(removed_ids), dtype=np.int64)
+                base = await ingest_pool.run(self._mutable_base)
+                removed = await ingest_pool.run(self._remove_from_segments, base, removed_array)
+                self.tombstones -= removed_ids
+                
+                await self._save_index()
+                
+                logger.info(f"Compacted FAISS index: reclaimed {removed} vectors, {self.index.ntotal} remain")
+                return removed
+                
+            except Exception as e:
+                logger.error(f"Failed to compact FAISS index: {e}")
+                return 0
+    
+    def _remove_from_segments(self, base: faiss.Index, ids: np.ndarray) -> int:
+        with self._segment_lock.write():
+            removed = base.remove_ids(ids) + self.delta_index.remove_ids(ids)
+            self.index = base
+            return removed
+    
+    def _target_index_type(self) -> str:
+        """Index type the store should use for its current size"""
+        if self.ann_index_type == "flat" or len(self.chunk_ids) < self.ann_threshold:
+            return "flat"
+        return self.ann_index_type
+    
+    def _maybe_reindex(self):
+        """Upgrade to the ANN tier, or retrain IVF centroids once the corpus has drifted"""
+        current_type = FAISSIndexFactory.index_type_of(self.index)
+        target_type = self._target_index_type()
+        
+        if current_type != target_type and current_type == "flat":
+            logger.info(f"FAISS corpus reached {len(self.chunk_ids)} chunks, moving to {target_type} index")
+            self._schedule_rebuild(target_type)
+        elif current_type == "ivf_flat" and self.vectors_since_train > self.retrain_ratio * max(self.trained_size, 1):
+            logger.info(f"{self.vectors_since_train} vectors added since IVF training, retraining centroids")
+            self._schedule_rebuild(current_type)
+    
+    def _schedule_rebuild(self, index_type: str):
+        """Rebuild the index in the background if no rebuild is running"""
+        self._schedule_background("_rebuild_task", self._rebuild_index, index_type)
+    
+    def _build_index(self, index_type: str, ids: np.ndarray, vectors: np.ndarray) -> faiss.Index:
+        """Build and train a new index from stored vectors (runs off the event loop)"""
+        index = FAISSIndexFactory.create_index(index_type, EMBEDDING_DIMENSION, len(ids), self.vector_archive)
+        max_training_points = index.nlist * 256 if index_type == "ivf_flat" else 65536
+        FAISSIndexFactory.train(index, vectors, max_training_points=max_training_points)
+        if len(ids) > 0:
+            index.add_with_ids(vectors, ids)
+        FAISSIndexFactory.apply_search_params(index)
+        return index
+    
+    async def _rebuild_index(self, index_type: str):
+        """Rebuild the index from its own stored vectors, without re-embedding"""
+        try:
+            # Snapshot settled live vectors of both segments; writes during the build are caught up below
+            snapshot_upto = self._settled_upto()
+            snapshot_ids = np.array(sorted(cid for cid in self.chunk_ids if cid < snapshot_upto), dtype=np.int64)
+            vectors = await ingest_pool.run(self.vector_archive.get, snapshot_ids)
             
-            # Extract all embeddings and rebuild index
-            all_contents = [doc["content"] for doc in self.documents]
-            embeddings_list = self.embeddings.embed_documents(all_contents)
-            embeddings_array = np.array(embeddings_list, dtype=np.float32)
-            
-            # Normalize embeddings
-            faiss.normalize_L2(embeddings_array)
-            
-            # Create new index and add all embeddings
-            self.index = faiss.IndexFlatIP(384)
-            self.index.add(embeddings_array)
+            new_index = await ingest_pool.run(self._build_index, index_type, snapshot_ids, vectors)
             
-            # Save the rebuilt index
-            import asyncio
-            asyncio.create_task(self._save_index())
+            async with self._write_transaction():
+                # Chunks merged into the old base while the build was running move back to the delta
+                merged_ids = np.array(
+                    sorted(cid for cid in self.chunk_ids if snapshot_upto <= cid < self.indexed_upto), dtype=np.int64
+                )
+                merged_vectors = await ingest_pool.run(self.vector_archive.get, merged_ids)
+                
+                # Chunks deleted while the build was running, and deleted delta chunks
+                snapshot_set = set(snapshot_ids.tolist())
+                base_deleted = set()
+                if FAISSIndexFactory.supports_removal(new_index):
+                    base_deleted = snapshot_set - self.chunk_ids
+                delta_deleted = {cid for cid in self.tombstones if cid >= snapshot_upto}
+                deleted_ids = base_deleted | delta_deleted
+                
+                await ingest_pool.run(
+                    self._swap_base, new_index, snapshot_upto, merged_ids, merged_vectors,
+                    np.array(sorted(base_deleted), dtype=np.int64), np.array(sorted(delta_deleted), dtype=np.int64)
+                )
+                self.indexed_upto = snapshot_upto
+                # Keep tombstones for vectors that are still in one of the segments
+                self.tombstones = {
+                    cid for cid in self.tombstones
+                    if cid not in deleted_ids and (cid in snapshot_set or cid >= snapshot_upto)
+                }
+                self.trained_size = len(snapshot_ids)
+                self.vectors_since_train = sum(1 for cid in self.chunk_ids if cid >= snapshot_upto)
+                
+                await self._save_index()
+                logger.info(f"Rebuilt FAISS {index_type} index with {self.index.ntotal} vectors")
             
         except Exception as e:
             logger.error(f"Failed to rebuild FAISS index: {e}")
+    
+    def _swap_base(
+        self,
+        new_index: faiss.Index,
+        snapshot_upto: int,
+        merged_ids: np.ndarray,
+        merged_vectors: np.ndarray,
+        base_deleted: np.ndarray,
+        delta_deleted: np.ndarray
+    ):
+        """Install a rebuilt base; the delta keeps every chunk from snapshot_upto on"""
+        if len(base_deleted):
+            new_index.remove_ids(base_deleted)
+        with self._segment_lock.write():
+            # Adds still in flight keep writing to the same delta object
+            self.delta_index.remove_ids(faiss.IDSelectorRange(0, snapshot_upto))
+            if len(merged_ids):
+                self.delta_index.add_with_ids(merged_vectors, merged_ids)
+            if len(delta_deleted):
+                self.delta_index.remove_ids(delta_deleted)
+            self.index = new_index
+    
+    async def evaluate_index_modes(self, modes: Optional[List[str]] = None, sample_size: int = 200, k: int = 10) -> List[Dict[str, Any]]:
+        """Report memory footprint, recall@k and latency of index modes against the flat baseline"""
+        if not self.initialized:
+            await self.initialize()
+        await self.refresh()
+        
+        modes = modes or list(FAISSIndexFactory.INDEX_TYPES)
+        corpus_ids = np.array(sorted(self.chunk_ids), dtype=np.int64)
+        if len(corpus_ids) == 0:
+            return []
+        
+        # An admin job: everything runs on the ingest pool, so searches keep the query pool,
+        # and indexes are built from at most FAISS_REPORT_MAX_VECTORS sampled chunks
+        rng = np.random.default_rng(0)
+        max_vectors = int(os.getenv("FAISS_REPORT_MAX_VECTORS", "50000"))
+        sampled = len(corpus_ids) > max_vectors
+        ids = np.sort(rng.choice(corpus_ids, max_vectors, replace=False)) if sampled else corpus_ids
+        vectors = await ingest_pool.run(self.vector_archive.get, ids)
+        queries = vectors[rng.choice(len(ids), min(sample_size, len(ids)), replace=False)]
+        k = min(k, len(ids))
+        
+        # Exact ground truth from the uncompressed vectors
+        baseline = await ingest_pool.run(self._build_index, "flat", ids, vectors)
+        _, expected = await ingest_pool.run(baseline.search, queries, k)
+        baseline_bytes = FAISSIndexFactory.memory_bytes(baseline)
+        current_type = FAISSIndexFactory.index_type_of(self.index)
+        
+        reports = []
+        for mode in modes:
+            try:
+                if not sampled and mode == current_type and not self.tombstones and self.delta_index.ntotal == 0:
+                    index = self.index
+                else:
+                    index = await ingest_pool.run(self._build_index, mode, ids, vectors)
+                
+                _, found, search_time = await ingest_pool.run(self._timed_search, index, queries, k)
+                
+                recall = np.mean([
+                    len(set(found[row]) & set(expected[row])) / k
+                    for row in range(len(queries))
+                ])
+                memory_bytes = FAISSIndexFactory.memory_bytes(index)
+                
+                reports.append({
+                    "index_type": mode,
+                    "active": mode == current_type,
+                    "vectors": int(index.ntotal),
+                    "corpus_vectors": len(corpus_ids),
+                    "memory_bytes": memory_bytes,
+                    "bytes_per_vector": round(memory_bytes / max(index.ntotal, 1), 1),
+                    "compression_ratio": round(baseline_bytes / max(memory_bytes, 1), 1),
+                    f"recall_at_{k}": round(float(recall), 4),
+                    "search_ms_per_query": round(search_time * 1000 / len(queries), 3)
+                })
+            except Exception as e:
+                logger.error(f"Failed to evaluate FAISS {mode} index: {e}")
+                reports.append({"index_type": mode, "error": str(e)})
+        
+        return reports
+    
+    def _timed_search(self, index: faiss.Index, queries: np.ndarray, k: int):
+        with self._segment_lock.read():
+            start_time = time.time()
+            scores, labels = index.search(queries, k)
+            return scores, labels, time.time() - start_time
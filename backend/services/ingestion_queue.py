@@ -0,0 +1,200 @@
+"""
+Ingestion Queue - background extraction, embedding and indexing of uploaded documents
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from services.document_processor import DocumentProcessor
+from utils.compute_pool import ingest_pool
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class IngestionQueueFullError(RuntimeError):
+    """Raised when INGEST_JOB_QUEUE jobs are already waiting"""
+
+@dataclass
+class IngestionJob:
+    job_id: str
+    filename: str
+    title: str
+    metadata: Dict[str, Any]
+    source: Any = None  # spooled upload, closed once the text is extracted
+    status: str = "queued"  # queued -> extracting -> embedding -> indexing -> completed | failed
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    pages: Optional[int] = None
+    total_chunks: int = 0
+    embedded_chunks: int = 0
+    document_id: Optional[str] = None
+    error: Optional[str] = None
+    _stage_started: float = 0.0
+
+    def enter_stage(self, status: str):
+        now = time.time()
+        if self.status not in ("queued", "completed", "failed"):
+            self.stage_seconds[self.status] = round(now - self._stage_started, 3)
+        self.status = status
+        self._stage_started = now
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "title": self.title,
+            "status": self.status,
+            "pages": self.pages,
+            "total_chunks": self.total_chunks,
+            "embedded_chunks": self.embedded_chunks,
+            "document_id": self.document_id,
+            "error": self.error,
+            "queued_seconds": round((self.started_at or now) - self.created_at, 3),
+            "stage_seconds": self.stage_seconds,
+            "total_seconds": round((self.finished_at or now) - self.created_at, 3),
+            "created_at": self.created_at
+        }
+
+class IngestionQueue:
+    """
+    Bounded queue of upload jobs served by a fixed number of async workers.
+
+    Uploads return a job ID immediately; extraction and embedding run in the
+    ingest compute pool, so a burst of uploads queues here instead of holding
+    requests open or taking query pool threads away from Q&A.
+    """
+
+    def __init__(self, vector_store, workers: Optional[int] = None, max_queue: Optional[int] = None, history: Optional[int] = None):
+        self.vector_store = vector_store
+        self.worker_count = workers or int(os.getenv("INGEST_JOB_WORKERS", "1"))
+        self.max_queue = max_queue or int(os.getenv("INGEST_JOB_QUEUE", "16"))
+        self.history = history or int(os.getenv("INGEST_JOB_HISTORY", "500"))
+        self.jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [
+            asyncio.get_running_loop().create_task(self._worker(i)) for i in range(self.worker_count)
+        ]
+        logger.info(f"Ingestion queue started with {self.worker_count} workers (queue size {self.max_queue})")
+
+    async def stop(self):
+        """Stop the workers; queued jobs are marked failed"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            self._fail(job, "Server shut down before the job ran")
+
+    def submit(self, source, filename: str, title: str, metadata: Dict[str, Any]) -> IngestionJob:
+        """Queue a document for ingestion; takes ownership of source"""
+        if self._queue is None:
+            raise RuntimeError("Ingestion queue is not started")
+
+        job = IngestionJob(job_id=str(uuid.uuid4()), filename=filename, title=title, metadata=metadata, source=source)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise IngestionQueueFullError(f"{self.max_queue} uploads are already waiting, try again later")
+
+        self.jobs[job.job_id] = job
+        self._trim_history()
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self.jobs.get(job_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.worker_count,
+            "max_queue": self.max_queue,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "jobs_by_status": counts
+        }
+
+    def _trim_history(self):
+        # Forget the oldest finished jobs; running and queued jobs are always kept
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.history:
+                break
+            if self.jobs[job_id].status in ("completed", "failed"):
+                del self.jobs[job_id]
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                self._fail(job, "Server shut down while the job was running")
+                raise
+            except Exception as e:
+                logger.error(f"Ingestion job {job.job_id} ({job.filename}) failed: {e}")
+                self._fail(job, str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob):
+        job.started_at = time.time()
+
+        job.enter_stage("extracting")
+        processor = DocumentProcessor()
+        try:
+            text = await ingest_pool.run(processor.extract_text, job.source, job.filename)
+        finally:
+            self._close_source(job)
+        job.pages = processor.last_stats.get("pages")
+        if job.pages:
+            job.metadata["page_count"] = job.pages
+        if not text.strip():
+            # Stores return an ID without indexing anything for an empty document
+            raise ValueError(f"{job.filename} has no extractable text (scanned or image-only document?)")
+
+        job.enter_stage("embedding")
+
+        def on_progress(progress: Dict[str, Any]):
+            # Runs in an ingest pool thread; plain attribute writes only
+            job.total_chunks = progress["total_chunks"]
+            job.embedded_chunks = progress["embedded_chunks"]
+            if job.embedded_chunks >= job.total_chunks:
+                job.enter_stage("indexing")
+
+        document_ids = await self.vector_store.add_documents(
+            [{"title": job.title, "content": text, "metadata": job.metadata}],
+            progress_callback=on_progress
+        )
+        job.document_id = document_ids[0]
+
+        job.enter_stage("completed")
+        job.finished_at = time.time()
+        logger.info(
+            f"Ingested '{job.title}': {job.total_chunks} chunks in {job.finished_at - job.started_at:.2f}s "
+            f"(stages: {job.stage_seconds})"
+        )
+
+    def _fail(self, job: IngestionJob, error: str):
+        self._close_source(job)
+        job.enter_stage("failed")
+        job.error = error
+        job.finished_at = time.time()
+
+    def _close_source(self, job: IngestionJob):
+        if job.source is not None:
+            job.source.close()
+            job.source = None
@@ -0,0 +1,174 @@
+"""
+Legal Text Splitter - chunks Indonesian legislation along BAB / Bagian / Pasal / ayat / huruf boundaries
+"""
+import os
+import re
+from typing import List, Dict, Any, Tuple
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+_BAB = re.compile(r"^BAB\s+([IVXLCDM]+)\s*$")
+_BAGIAN = re.compile(r"^Bagian\s+(Ke\w+)\s*$", re.IGNORECASE)
+_PARAGRAF = re.compile(r"^Paragraf\s+(\d+)\s*$", re.IGNORECASE)
+_PASAL = re.compile(r"^Pasal\s+(\d+[A-Z]?)\s*$")
+_AYAT = re.compile(r"^\((\d+[a-z]?)\)\s")
+_HURUF = re.compile(r"^(?:[a-z]|\d+)\.\s")
+_AYAT_NUMBERS = re.compile(r"^\s*\((\d+[a-z]?)\)\s", re.MULTILINE)
+
+class LegalTextSplitter:
+    """
+    Splits legislation into one chunk per Pasal (the preamble is one unit too).
+
+    Each chunk starts with its BAB / Bagian heading and carries the Pasal
+    number as metadata. A Pasal longer than max_chunk_size is split at ayat,
+    then at huruf/angka items, and only then by characters; chunks do not
+    overlap. Text without any Pasal heading (e.g. internal HR policies)
+    goes to the character splitter used before.
+    """
+
+    def __init__(self, max_chunk_size: int = None, structure_aware: bool = None):
+        self.max_chunk_size = max_chunk_size or int(os.getenv("LEGAL_CHUNK_MAX_SIZE", "1500"))
+        if structure_aware is None:
+            structure_aware = os.getenv("CHUNKING_STRATEGY", "legal").lower() == "legal"
+        self.structure_aware = structure_aware
+        self.fallback_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=200,
+            length_function=len,
+        )
+
+    def split_text(self, text: str) -> List[str]:
+        return [content for content, _ in self.split_with_metadata(text)]
+
+    def split_with_metadata(self, text: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """(chunk text, structural metadata) pairs in document order"""
+        units = self._parse_units(text) if self.structure_aware else []
+        if not any("pasal" in context for context, _ in units):
+            return [(chunk, {}) for chunk in self.fallback_splitter.split_text(text)]
+
+        chunks = []
+        for context, lines in units:
+            heading = self._heading(context)
+            budget = self.max_chunk_size - len(heading) - 1
+            for piece in self._split_unit(lines, budget):
+                metadata = {key: value for key, value in context.items() if not key.endswith("_title")}
+                ayat_numbers = _AYAT_NUMBERS.findall(piece)
+                if ayat_numbers:
+                    metadata["ayat"] = ayat_numbers[0] if len(ayat_numbers) == 1 else f"{ayat_numbers[0]}-{ayat_numbers[-1]}"
+                chunks.append((f"{heading}\n{piece}" if heading else piece, metadata))
+        return chunks
+
+    def _parse_units(self, text: str) -> List[Tuple[Dict[str, str], List[str]]]:
+        """Group lines into (heading context, lines) units: the preamble and each Pasal"""
+        units = []
+        context = {}
+        current = ({"section": "pembukaan"}, [])
+        pending_title = None
+        lines = text.splitlines()
+        after_break = True  # the start of the text counts as a paragraph break
+
+        for index, line in enumerate(lines):
+            stripped = line.strip()
+            bab, bagian, paragraf = (pattern.match(stripped) for pattern in (_BAB, _BAGIAN, _PARAGRAF))
+            # "Pasal N" alone on a line is also how a wrapped cross-reference ("dimaksud dalam /
+            # Pasal 5 / ayat (2)") breaks; it is a heading only at a paragraph boundary
+            pasal = None
+            if after_break or self._starts_paragraph(lines, index + 1):
+                pasal = _PASAL.match(stripped)
+            # Blank lines and BAB / Bagian / Paragraf headings and their titles end a paragraph
+            after_break = not stripped or bool(bab or bagian or paragraf) or bool(pending_title and not pasal)
+
+            if bab or bagian or paragraf:
+                # A heading closes the open Pasal; its title is on the next line
+                if bab:
+                    context, pending_title = {"bab": bab.group(1)}, "bab_title"
+                elif bagian:
+                    context = {key: value for key, value in context.items() if key.startswith("bab")}
+                    context["bagian"], pending_title = bagian.group(1), "bagian_title"
+                else:
+                    context = {key: value for key, value in context.items() if not key.startswith("paragraf")}
+                    context["paragraf"], pending_title = paragraf.group(1), "paragraf_title"
+                continue
+
+            if pending_title and stripped and not pasal:
+                context[pending_title] = stripped
+                pending_title = None
+                continue
+
+            if pasal:
+                units.append(current)
+                current = ({**context, "pasal": pasal.group(1)}, [stripped])
+                pending_title = None
+                continue
+
+            current[1].append(line.rstrip())
+
+        units.append(current)
+        return [(context, lines) for context, lines in units if any(line.strip() for line in lines)]
+
+    def _starts_paragraph(self, lines: List[str], index: int) -> bool:
+        """Whether lines[index] opens a paragraph: blank, an ayat, or a capitalised sentence"""
+        if index >= len(lines):
+            return True
+        following = lines[index].strip()
+        return not following or bool(_AYAT.match(following)) or following[0].isupper()
+
+    def _heading(self, context: Dict[str, str]) -> str:
+        parts = []
+        if "bab" in context:
+            parts.append(f"BAB {context['bab']} {context.get('bab_title', '')}".strip())
+        if "bagian" in context:
+            parts.append(f"Bagian {context['bagian']} {context.get('bagian_title', '')}".strip())
+        if "paragraf" in context:
+            parts.append(f"Paragraf {context['paragraf']} {context.get('paragraf_title', '')}".strip())
+        return " - ".join(parts)
+
+    def _split_unit(self, lines: List[str], budget: int) -> List[str]:
+        text = "\n".join(lines).strip()
+        if len(text) <= budget:
+            return [text]
+
+        # Oversized Pasal: one piece per group of ayat, each repeating the Pasal line
+        title = lines[0] if _PASAL.match(lines[0]) else ""
+        body = lines[1:] if title else lines
+        pieces = self._pack(self._blocks(body, _AYAT), budget - len(title) - 1)
+        return [f"{title}\n{piece}" if title else piece for piece in pieces]
+
+    def _blocks(self, lines: List[str], pattern: re.Pattern) -> List[List[str]]:
+        """Cut lines into blocks that each start at a line matching pattern"""
+        blocks = []
+        for line in lines:
+            if not line.strip():
+                continue
+            if not blocks or pattern.match(line.strip()):
+                blocks.append([line])
+            else:
+                blocks[-1].append(line)
+        return blocks
+
+    def _pack(self, blocks: List[List[str]], budget: int) -> List[str]:
+        """Greedily join consecutive blocks into pieces of at most budget characters"""
+        pieces = []
+        current = []
+        for block in blocks:
+            text = "\n".join(block)
+            if len(text) > budget:
+                if current:
+                    pieces.append("\n".join(current))
+                    current = []
+                pieces.extend(self._split_oversized(block, budget))
+                continue
+            if current and len("\n".join(current)) + 1 + len(text) > budget:
+                pieces.append("\n".join(current))
+                current = []
+            current.append(text)
+        if current:
+            pieces.append("\n".join(current))
+        return pieces
+
+    def _split_oversized(self, block: List[str], budget: int) -> List[str]:
+        """Split one ayat at its huruf/angka items, or by characters as a last resort"""
+        items = self._blocks(block, _HURUF)
+        if len(items) > 1:
+            return self._pack(items, budget)
+        splitter = RecursiveCharacterTextSplitter(chunk_size=max(budget, 200), chunk_overlap=0, length_function=len)
+        return splitter.split_text("\n".join(block))
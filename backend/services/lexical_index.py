@@ -0,0 +1,158 @@
+"""
+Lexical Index - BM25 inverted index over chunks (SQLite FTS5), fused with vector results
+"""
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Kata umum Bahasa Indonesia (plus sedikit bahasa Inggris) yang tidak membedakan dokumen
+STOPWORDS = frozenset("""
+    ada adalah adanya agar akan antara apa apabila apakah atas atau bagaimana bagi bahwa
+    banyak baru beberapa begitu belum berapa bila bisa boleh dalam dan dapat dari daripada
+    demikian dengan di dia dilakukan harus hal hanya ia ialah ini itu jadi jika juga kami kamu
+    kapan karena ke kecuali kepada ketika kita lagi lain lebih maka masih mau melalui memiliki
+    mengenai menjadi menurut mereka merupakan meski misalnya mungkin namun oleh pada para
+    pula saat saja sama sampai sangat saya sebagai sebelum sedang sehingga sejak sekitar
+    selain semua seperti serta siapa suatu sudah supaya tanpa tentang tersebut tetapi tidak
+    untuk ya yaitu yakni yang
+    a an and are as at be by for from how in is it of on or that the this to was what when
+    where which who why will with
+""".split())
+
+# Partikel dan kata ganti enklitik: "pegawainya" -> "pegawai", "bolehkah" -> "boleh"
+_ENCLITICS = ("nya", "lah", "kah", "pun")
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word and number tokens without stopwords and enclitic particles"""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text).lower()):
+        token = token.strip("_")
+        if not token or token in STOPWORDS:
+            continue
+        for suffix in _ENCLITICS:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+                token = token[:-len(suffix)]
+                break
+        tokens.append(token)
+    return tokens
+
+class LexicalIndex:
+    """
+    BM25 index of chunk text, keyed by the vector store's chunk ID.
+
+    Text is tokenized in Python (Indonesian stopwords, enclitics) and the
+    tokens are stored in an FTS5 table, so exact terms such as "Pasal 12"
+    or "PNS" are found with one inverted-index lookup.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS lexical USING fts5(
+                chunk_key UNINDEXED,
+                category UNINDEXED,
+                title,
+                body,
+                tokenize = 'unicode61 remove_diacritics 0'
+            )
+        """)
+        self.conn.commit()
+        self.title_weight = float(os.getenv("LEXICAL_TITLE_WEIGHT", "2.0"))
+
+    def add(self, entries: Iterable[Tuple[str, str, str, Optional[str]]]):
+        """Index (chunk_key, title, content, category) tuples in one transaction"""
+        rows = [
+            (str(chunk_key), category, " ".join(tokenize(title)), " ".join(tokenize(content)))
+            for chunk_key, title, content, category in entries
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO lexical (chunk_key, category, title, body) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def delete(self, chunk_keys: Iterable[Any]):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM lexical WHERE chunk_key = ?", [(str(chunk_key),) for chunk_key in chunk_keys]
+            )
+
+    def search(self, query: str, limit: int = 10, category: Optional[str] = None) -> List[Tuple[str, float]]:
+        """(chunk_key, BM25 score) of the best matching chunks, best first"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        # Tokens are plain word characters, so quoting them makes a safe FTS5 query
+        match = " OR ".join(f'"{token}"' for token in tokens)
+        sql = "SELECT chunk_key, bm25(lexical, 0, 0, ?, 1.0) AS score FROM lexical WHERE lexical MATCH ?"
+        params = [self.title_weight, match]
+        if category:
+            sql += " AND category = ?"
+            params.append(category)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        # FTS5 bm25() is negative, lower is better
+        return [(chunk_key, -score) for chunk_key, score in rows]
+
+    def search_many(self, queries: List[str], limit: int = 10, category: Optional[str] = None) -> List[List[Tuple[str, float]]]:
+        return [self.search(query, limit, category) for query in queries]
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM lexical").fetchone()[0]
+
+    def reset(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM lexical")
+
+    def close(self):
+        self.conn.close()
+
+def hybrid_search_enabled() -> bool:
+    return os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+
+def fuse_results(
+    vector_results: List[Dict[str, Any]],
+    lexical_results: List[Dict[str, Any]],
+    limit: int,
+    k: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Reciprocal-rank fusion of vector and BM25 results of one query
+
+    Args:
+        vector_results: Formatted results in vector rank order, each with a "chunk_id"
+        lexical_results: Formatted results in BM25 rank order, each with a "bm25_score"
+        limit: Number of fused results to return
+        k: RRF constant; larger values flatten the rank weights. Defaults to RRF_K
+
+    Returns:
+        Results sorted by "rrf_score", with "vector_rank", "lexical_rank" and "bm25_score"
+    """
+    k = k or int(os.getenv("RRF_K", "60"))
+    fused = {}
+    for ranking, rank_field in ((vector_results, "vector_rank"), (lexical_results, "lexical_rank")):
+        for rank, result in enumerate(ranking, start=1):
+            entry = fused.get(result["chunk_id"])
+            if entry is None:
+                entry = fused[result["chunk_id"]] = {**result, "bm25_score": 0.0, "rrf_score": 0.0}
+            if "bm25_score" in result:
+                entry["bm25_score"] = result["bm25_score"]
+            entry[rank_field] = rank
+            entry["rrf_score"] += 1.0 / (k + rank)
+
+    ranked = sorted(fused.values(), key=lambda result: result["rrf_score"], reverse=True)
+    return ranked[:limit]
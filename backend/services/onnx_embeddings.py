@@ -0,0 +1,121 @@
+"""
+ONNX Runtime embedding backend - CPU inference for the sentence-transformer model
+"""
+import os
+from typing import List, Optional
+import numpy as np
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+
+class ONNXEmbeddings:
+    """
+    Runs an exported ONNX (optionally int8-quantized) copy of a sentence-transformer.
+
+    Applies the same mean pooling as the PyTorch model, so it is a drop-in
+    replacement for HuggingFaceEmbeddings behind CachedEmbeddings. Create the
+    model files with export_onnx_model().
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        model_file: str = ONNX_MODEL_FILE,
+        num_threads: Optional[int] = None,
+        max_length: int = 128,
+        batch_size: int = 32
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length  # max_seq_length of paraphrase-multilingual-MiniLM-L12-v2
+        self.batch_size = batch_size
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        logger.info(f"Loaded ONNX embedding model {model_file} from {model_dir} (threads={num_threads or 'auto'})")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in length-sorted batches so little time is spent on padding"""
+        if not texts:
+            return []
+
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch_order = order[start:start + self.batch_size]
+            batch_vectors = self._encode([texts[i] for i in batch_order])
+            for i, vector in zip(batch_order, batch_vectors):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        inputs = {name: encoded[name].astype(np.int64) for name in encoded if name in self.input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, as in the sentence-transformers Pooling layer
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True) -> str:
+    """
+    Export a sentence-transformer's transformer to ONNX, plus an int8 copy
+
+    Args:
+        model_name: Hugging Face model name
+        output_dir: Directory for the tokenizer and model files
+        quantize: Also write a dynamically int8-quantized model
+
+    Returns:
+        The output directory
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(output_dir)
+
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    sample = tokenizer(["Contoh kalimat kebijakan"], return_tensors="pt")
+    dynamic_axes = {"input_ids": {0: "batch", 1: "sequence"}, "attention_mask": {0: "batch", 1: "sequence"}}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            model_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={**dynamic_axes, "last_hidden_state": {0: "batch", 1: "sequence"}},
+            opset_version=14
+        )
+    logger.info(f"Exported {model_name} to {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        int8_path = os.path.join(output_dir, ONNX_INT8_MODEL_FILE)
+        # Weights to int8, activations quantized on the fly: no calibration data needed
+        quantize_dynamic(model_path, int8_path, weight_type=QuantType.QInt8)
+        logger.info(f"Wrote int8-quantized model to {int8_path}")
+
+    return output_dir
@@ -1,10 +1,11 @@
 import os
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Optional
 from dataclasses import dataclass
 from enum import Enum
 import json
 from openai import AsyncOpenAI
+from utils.llm_scheduler import llm_scheduler, LLMRequest, batch_priority
 from utils.logger import setup_logger
 import time
 
@@ -93,38 +94,34 @@ class OptimizedLLMService:
         query: str, 
         context: List[Dict[str, Any]], 
         language: str = "id",
-        task_type: TaskType = TaskType.QA
+        task_type: TaskType = TaskType.QA,
+        request: Optional[LLMRequest] = None
     ) -> Dict[str, Any]:
-        """Optimized answer generation with model selection and async processing"""
+        """
+        Optimized answer generation with model selection and async processing
+
+        Args:
+            request: Scheduling priority and caller of the LLM call (see utils.llm_scheduler);
+                interactive if omitted
+        """
         start_time = time.time()
         
         try:
-            # Select optimal model for task
-            model_config = self.select_optimal_model(task_type)
-            
             # Check if using localhost and no proper API key, show fallback
-            if not self.is_localhost and (not self.api_key or self.api_key == "your_llama_api_key_here"):
+            if not self._api_configured():
                 return self._fallback_response(query, context, task_type)
             
-            # Prepare optimized context (memory-efficient)
-            optimized_context = self._optimize_context(context, model_config.context_length)
+            model_config, optimized_context, messages = self._prepare_generation(query, context, language, task_type)
             
-            # Create structured prompt based on task type
-            system_prompt, user_prompt = self._create_structured_prompts(
-                query, optimized_context, language, task_type
-            )
-            
-            # Async generation with optimal settings
-            response = await self.client.chat.completions.create(
-                model=model_config.name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=model_config.temperature,
-                max_tokens=model_config.max_tokens,
-                stream=False  # Set to True for streaming responses
-            )
+            # Async generation with optimal settings, once the scheduler grants a slot
+            async with llm_scheduler.slot(request):
+                response = await self.client.chat.completions.create(
+                    model=model_config.name,
+                    messages=messages,
+                    temperature=model_config.temperature,
+                    max_tokens=model_config.max_tokens,
+                    stream=False
+                )
             
             processing_time = time.time() - start_time
             
@@ -143,6 +140,104 @@ class OptimizedLLMService:
                 return self._error_response_localhost(str(e), task_type)
             raise
 
+    async def stream_answer_optimized(
+        self,
+        query: str,
+        context: List[Dict[str, Any]],
+        language: str = "id",
+        task_type: TaskType = TaskType.QA,
+        request: Optional[LLMRequest] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_answer_optimized
+
+        Yields {"type": "token", "content": ...} as the model produces text, then
+        one {"type": "done", ...} event with the fields generate_answer_optimized
+        returns (the full answer included).
+        """
+        start_time = time.time()
+        
+        if not self._api_configured():
+            response = self._fallback_response(query, context, task_type)
+            yield {"type": "token", "content": response["answer"]}
+            yield {"type": "done", **response}
+            return
+        
+        model_config, optimized_context, messages = self._prepare_generation(query, context, language, task_type)
+        tokens = []
+        first_token_time = None
+        try:
+            # The slot is held until the last token: the model server is busy for the whole stream
+            async with llm_scheduler.slot(request):
+                stream = await self.client.chat.completions.create(
+                    model=model_config.name,
+                    messages=messages,
+                    temperature=model_config.temperature,
+                    max_tokens=model_config.max_tokens,
+                    stream=True
+                )
+                try:
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        content = chunk.choices[0].delta.content
+                        if not content:
+                            continue
+                        if first_token_time is None:
+                            first_token_time = time.time() - start_time
+                        tokens.append(content)
+                        yield {"type": "token", "content": content}
+                finally:
+                    # Client went away or generation failed: stop the model instead of letting it finish
+                    await stream.close()
+        except Exception as e:
+            logger.error(f"Failed to stream optimized answer: {e}")
+            if not self.is_localhost or tokens:
+                raise
+            response = self._error_response_localhost(str(e), task_type)
+            yield {"type": "token", "content": response["answer"]}
+            yield {"type": "done", **response}
+            return
+        
+        yield {
+            "type": "done",
+            "answer": "".join(tokens),
+            "model_used": f"{model_config.name} ({model_config.quantization})",
+            "task_type": task_type.value,
+            "processing_time": round(time.time() - start_time, 2),
+            "time_to_first_token": round(first_token_time, 2) if first_token_time is not None else None,
+            "context_chunks": len(optimized_context),
+            "optimization_applied": True
+        }
+
+    def _api_configured(self) -> bool:
+        # A remote endpoint needs a real API key; localhost Ollama does not
+        return self.is_localhost or bool(self.api_key and self.api_key != "your_llama_api_key_here")
+
+    def _prepare_generation(
+        self,
+        query: str,
+        context: List[Dict[str, Any]],
+        language: str,
+        task_type: TaskType
+    ) -> tuple:
+        """(model config, context that fits its window, chat messages) for a generation request"""
+        # Select optimal model for task
+        model_config = self.select_optimal_model(task_type)
+        
+        # Prepare optimized context (memory-efficient)
+        optimized_context = self._optimize_context(context, model_config.context_length)
+        
+        # Create structured prompt based on task type
+        system_prompt, user_prompt = self._create_structured_prompts(
+            query, optimized_context, language, task_type
+        )
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        return model_config, optimized_context, messages
+
     def _optimize_context(self, context: List[Dict[str, Any]], max_length: int) -> List[Dict[str, Any]]:
         """Memory-efficient context optimization"""
         if not context:
@@ -325,9 +420,10 @@ Format analisis:
 
     async def batch_process_queries(
         self, 
-        queries: List[Dict[str, Any]]
+        queries: List[Dict[str, Any]],
+        caller: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Batch processing for multiple queries"""
+        """Batch processing for multiple queries; the scheduler runs them by their priority"""
         tasks = []
         
         for query_data in queries:
@@ -335,7 +431,8 @@ Format analisis:
                 query=query_data["query"],
                 context=query_data["context"],
                 language=query_data.get("language", "id"),
-                task_type=TaskType(query_data.get("task_type", "qa"))
+                task_type=TaskType(query_data.get("task_type", "qa")),
+                request=LLMRequest(batch_priority(query_data.get("priority", 1)), caller or "anonymous")
             )
             tasks.append(task)
         
@@ -1,15 +1,31 @@
 import asyncio
+import copy
 import json
-from typing import List, Dict, Any, Optional
+import os
+from typing import List, Dict, Any, AsyncIterator, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import time
 from services.optimized_llm_service import OptimizedLLMService, TaskType
 from services.vector_store_factory import VectorStoreFactory
+from services.semantic_cache import SemanticCache, semantic_cache_enabled
+from utils.llm_scheduler import llm_scheduler, batch_priority, LLMRequest, MAX_JOB_PRIORITY, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+from utils.result_cache import ResultCache, normalize_query
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Default result lifetime per task; override with PIPELINE_CACHE_TTL_<TASK> (seconds, 0 disables)
+DEFAULT_CACHE_TTLS = {
+    TaskType.QA: 3600,
+    TaskType.SUMMARIZATION: 7200,
+    TaskType.POLICY_DRAFTING: 600,
+    TaskType.CLASSIFICATION: 86400
+}
+
+# Scheduling priority of semantic cache audits, above every batch job priority
+AUDIT_PRIORITY = MAX_JOB_PRIORITY + 1
+
 @dataclass
 class QueryPipeline:
     query: str
@@ -26,11 +42,40 @@ class ProcessedResult:
     metadata: Dict[str, Any]
     processing_stats: Dict[str, Any]
 
+@dataclass
+class InFlightQuery:
+    task: asyncio.Task
+    llm_request: LLMRequest
+    waiters: int = 0
+    shared: bool = False
+
 class OptimizedPipelineService:
-    def __init__(self):
-        self.llm_service = OptimizedLLMService()
-        self.vector_store = VectorStoreFactory.create_vector_store()
-        self.cache = {}  # Simple in-memory cache
+    def __init__(self, vector_store=None, llm_service: Optional[OptimizedLLMService] = None):
+        self.llm_service = llm_service or OptimizedLLMService()
+        self.vector_store = vector_store or VectorStoreFactory.create_vector_store()
+        # Answers, dropped when the corpus version changes (any document added or deleted)
+        self.cache = ResultCache(
+            "pipeline",
+            max_entries=int(os.getenv("PIPELINE_CACHE_SIZE", "1000")),
+            default_ttl=DEFAULT_CACHE_TTLS[TaskType.QA]
+        )
+        self.cache_ttls = {
+            task_type: float(os.getenv(f"PIPELINE_CACHE_TTL_{task_type.name}", str(ttl)))
+            for task_type, ttl in DEFAULT_CACHE_TTLS.items()
+        }
+        # "Not found" answers are kept briefly, so repeated misses skip retrieval
+        self.negative_cache = ResultCache(
+            "pipeline_not_found",
+            max_entries=int(os.getenv("PIPELINE_NEGATIVE_CACHE_SIZE", "500")),
+            default_ttl=float(os.getenv("PIPELINE_NEGATIVE_CACHE_TTL", "60"))
+        )
+        # Answers of near-duplicate questions, matched by query embedding
+        self.semantic_cache = SemanticCache() if semantic_cache_enabled() else None
+        self._audit_tasks = set()
+        # Pipeline runs in progress by cache key; identical concurrent queries share one run
+        self._in_flight: Dict[tuple, InFlightQuery] = {}
+        self.coalesced_queries = 0
+        self.abandoned_runs = 0
         self.processing_queue = []
         
     async def process_query_pipeline(
@@ -39,9 +84,88 @@ class OptimizedPipelineService:
         language: str = "id",
         category: Optional[str] = None,
         limit: int = 5,
-        task_type: TaskType = TaskType.QA
+        task_type: TaskType = TaskType.QA,
+        search_results: Optional[List[Dict[str, Any]]] = None,
+        use_cache: bool = True,
+        priority: int = PRIORITY_INTERACTIVE,
+        caller: Optional[str] = None
+    ) -> ProcessedResult:
+        """
+        Optimized end-to-end query processing pipeline
+
+        Concurrent calls with the same cache key wait for one shared run and
+        each get their own copy of its result. The run's LLM call takes the
+        best priority of its callers. A cancelled caller stops waiting without
+        affecting the others; the run itself is cancelled once no caller is
+        waiting for it.
+
+        Args:
+            search_results: Results prefetched by a batched search; skips the vector search step
+            use_cache: False answers from the documents even if a cached answer exists,
+                and leaves the caches untouched (semantic cache audits)
+            priority: Scheduling priority of the LLM call (see utils.llm_scheduler)
+            caller: Client the query is answered for, for fair LLM scheduling
+        """
+        llm_request = LLMRequest(priority, caller or "anonymous")
+        if not use_cache:
+            return await self._run_pipeline(
+                query, language, category, limit, task_type, search_results, False, llm_request
+            )
+
+        cache_key = self._cache_key(query, language, category, task_type)
+        flight = self._in_flight.get(cache_key)
+        coalesced = flight is not None and not flight.task.done()
+        if not coalesced:
+            flight = InFlightQuery(asyncio.create_task(
+                self._run_pipeline(query, language, category, limit, task_type, search_results, True, llm_request)
+            ), llm_request)
+            self._in_flight[cache_key] = flight
+            flight.task.add_done_callback(lambda _: self._end_flight(cache_key, flight))
+        else:
+            flight.shared = True
+            # An interactive caller joining a batch run must not wait behind batch traffic
+            llm_scheduler.promote(flight.llm_request, priority)
+            self.coalesced_queries += 1
+            logger.info("Joined in-flight pipeline run for identical query")
+
+        flight.waiters += 1
+        try:
+            # shield: a waiter's cancellation must not cancel the run the others wait for
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                self._end_flight(cache_key, flight)
+                flight.task.cancel()
+                self.abandoned_runs += 1
+            raise
+        finally:
+            flight.waiters -= 1
+
+        if not flight.shared:
+            return result
+        # Every caller of a shared run gets a private copy
+        result = copy.deepcopy(result)
+        if coalesced:
+            result.metadata["coalesced"] = True
+        return result
+
+    def _end_flight(self, cache_key: tuple, flight: InFlightQuery):
+        # Later callers start a new run (or hit the cache) instead of joining a finished or abandoned one
+        if self._in_flight.get(cache_key) is flight:
+            del self._in_flight[cache_key]
+
+    async def _run_pipeline(
+        self,
+        query: str,
+        language: str = "id",
+        category: Optional[str] = None,
+        limit: int = 5,
+        task_type: TaskType = TaskType.QA,
+        search_results: Optional[List[Dict[str, Any]]] = None,
+        use_cache: bool = True,
+        llm_request: Optional[LLMRequest] = None
     ) -> ProcessedResult:
-        """Optimized end-to-end query processing pipeline"""
+        """One run of the query pipeline (see process_query_pipeline)"""
         start_time = time.time()
         pipeline_stats = {
             "start_time": datetime.now().isoformat(),
@@ -49,31 +173,43 @@ class OptimizedPipelineService:
         }
         
         try:
-            # Step 1: Check cache
-            cache_key = f"{query}:{language}:{category}:{task_type.value}"
-            if cache_key in self.cache:
+            # Step 1: Check cache (hits are private copies)
+            cache_key = self._cache_key(query, language, category, task_type)
+            corpus_version = await self.vector_store.corpus_version()
+            cached_result = None
+            if use_cache:
+                cached_result = self.cache.get(cache_key, corpus_version) or self.negative_cache.get(cache_key, corpus_version)
+            if cached_result is not None:
                 logger.info("Cache hit for query")
-                cached_result = self.cache[cache_key]
                 cached_result.metadata["from_cache"] = True
                 return cached_result
             
+            # Step 1b: Near-duplicate of an answered question (same language, category and task)
+            query_vector = None
+            if self.semantic_cache is not None and use_cache:
+                query_vector = await self.vector_store.embed_query(query)
+                semantic_hit = self.semantic_cache.lookup(query_vector, cache_key[1:], corpus_version)
+                if semantic_hit is not None:
+                    return self._semantic_hit(semantic_hit, query, language, category, task_type)
+            
             step_start = time.time()
             
             # Step 2: Vector search optimization
-            search_results = await self._optimized_vector_search(
-                query, category, limit, task_type
-            )
+            if search_results is None:
+                search_results = await self._optimized_vector_search(
+                    query, category, limit, task_type
+                )
             pipeline_stats["steps"]["vector_search"] = time.time() - step_start
             
             # Enhanced filtering: check if we have truly relevant results
             if not search_results:
-                return self._empty_result(query, pipeline_stats)
+                return self._not_found(query, pipeline_stats, cache_key, corpus_version, store=use_cache)
             
             # Additional relevance check: ensure at least one result has good similarity
             best_distance = min(result.get('distance', float('inf')) for result in search_results)
             if best_distance > 8.0:  # Very strict threshold for relevance
                 logger.info(f"No sufficiently relevant documents found (best distance: {best_distance:.2f})")
-                return self._empty_result(query, pipeline_stats)
+                return self._not_found(query, pipeline_stats, cache_key, corpus_version, store=use_cache)
             
             # Step 3: Context optimization and ranking
             step_start = time.time()
@@ -86,7 +222,8 @@ class OptimizedPipelineService:
                 query=query,
                 context=optimized_context,
                 language=language,
-                task_type=task_type
+                task_type=task_type,
+                request=llm_request
             )
             pipeline_stats["steps"]["llm_processing"] = time.time() - step_start
             
@@ -105,14 +242,15 @@ class OptimizedPipelineService:
             # Check if confidence is too low - if so, return empty result
             if final_result.confidence_score < 0.4:  # Raised threshold for better filtering
                 logger.info(f"Confidence too low ({final_result.confidence_score:.3f}), returning empty result")
-                return self._empty_result(query, pipeline_stats)
-            
-            # Cache the result
-            self.cache[cache_key] = final_result
+                return self._not_found(query, pipeline_stats, cache_key, corpus_version, store=use_cache)
             
             total_time = time.time() - start_time
             final_result.processing_stats["total_time"] = round(total_time, 2)
             
+            # Cache a copy of the result for the corpus version it was answered from
+            if use_cache:
+                await self._store_result(cache_key, query, query_vector, final_result, corpus_version, task_type)
+            
             logger.info(f"Pipeline completed in {total_time:.2f}s for task {task_type.value}")
             return final_result
             
@@ -120,6 +258,209 @@ class OptimizedPipelineService:
             logger.error(f"Pipeline error: {e}")
             return self._error_result(str(e), pipeline_stats)
 
+    async def stream_query_pipeline(
+        self,
+        query: str,
+        language: str = "id",
+        category: Optional[str] = None,
+        limit: int = 5,
+        task_type: TaskType = TaskType.QA,
+        caller: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_query_pipeline
+
+        Yields {"type": "sources"} as soon as retrieval and ranking finish,
+        {"type": "token"} events while the LLM generates, and one
+        {"type": "done"} event with the final answer, confidence score and
+        step timings. The finished answer is cached like a regular one;
+        cached answers are sent as a single token.
+        """
+        start_time = time.time()
+        pipeline_stats = {
+            "start_time": datetime.now().isoformat(),
+            "steps": {}
+        }
+        
+        cache_key = self._cache_key(query, language, category, task_type)
+        corpus_version = await self.vector_store.corpus_version()
+        cached_result = self.cache.get(cache_key, corpus_version) or self.negative_cache.get(cache_key, corpus_version)
+        if cached_result is not None:
+            cached_result.metadata["from_cache"] = True
+        
+        query_vector = None
+        if cached_result is None and self.semantic_cache is not None:
+            query_vector = await self.vector_store.embed_query(query)
+            semantic_hit = self.semantic_cache.lookup(query_vector, cache_key[1:], corpus_version)
+            if semantic_hit is not None:
+                cached_result = self._semantic_hit(semantic_hit, query, language, category, task_type)
+        
+        if cached_result is not None:
+            logger.info("Cache hit for streamed query")
+            async for event in self._stream_result(cached_result):
+                yield event
+            return
+        
+        step_start = time.time()
+        search_results = await self._optimized_vector_search(query, category, limit, task_type)
+        pipeline_stats["steps"]["vector_search"] = time.time() - step_start
+        
+        if not search_results or min(result.get('distance', float('inf')) for result in search_results) > 8.0:
+            async for event in self._stream_result(self._not_found(query, pipeline_stats, cache_key, corpus_version)):
+                yield event
+            return
+        
+        step_start = time.time()
+        optimized_context = self._rank_and_filter_context(search_results, query, task_type)
+        pipeline_stats["steps"]["context_optimization"] = time.time() - step_start
+        
+        # Sources go out before generation starts: time to first byte is retrieval time
+        yield {"type": "sources", "sources": self._format_sources(optimized_context)}
+        pipeline_stats["time_to_sources"] = round(time.time() - start_time, 3)
+        
+        step_start = time.time()
+        llm_response = {}
+        llm_events = self.llm_service.stream_answer_optimized(
+            query=query,
+            context=optimized_context,
+            language=language,
+            task_type=task_type,
+            request=LLMRequest(PRIORITY_INTERACTIVE, caller or "anonymous")
+        )
+        try:
+            async for event in llm_events:
+                if event["type"] == "done":
+                    llm_response = event
+                else:
+                    yield event
+        finally:
+            # A disconnected client closes this generator; stop the generation right away
+            await llm_events.aclose()
+        pipeline_stats["steps"]["llm_processing"] = time.time() - step_start
+        pipeline_stats["time_to_first_token"] = llm_response.get("time_to_first_token")
+        
+        step_start = time.time()
+        parsed_result = self._parse_and_validate_output(llm_response, optimized_context, query)
+        pipeline_stats["steps"]["output_parsing"] = time.time() - step_start
+        
+        final_result = self._create_final_result(parsed_result, optimized_context, pipeline_stats, query)
+        if final_result.confidence_score < 0.4:
+            logger.info(f"Confidence too low ({final_result.confidence_score:.3f}), returning empty result")
+            final_result = self._not_found(query, pipeline_stats, cache_key, corpus_version)
+        else:
+            final_result.processing_stats["total_time"] = round(time.time() - start_time, 2)
+            await self._store_result(cache_key, query, query_vector, final_result, corpus_version, task_type)
+        
+        logger.info(f"Streamed pipeline completed in {time.time() - start_time:.2f}s for task {task_type.value}")
+        yield self._done_event(final_result)
+
+    async def _stream_result(self, result: ProcessedResult) -> AsyncIterator[Dict[str, Any]]:
+        """Events of an already complete result: sources, the answer as one token, done"""
+        yield {"type": "sources", "sources": result.sources}
+        yield {"type": "token", "content": result.answer}
+        yield self._done_event(result)
+
+    def _done_event(self, result: ProcessedResult) -> Dict[str, Any]:
+        # The answer is repeated in full: a low-confidence result replaces the streamed text
+        return {
+            "type": "done",
+            "answer": result.answer,
+            "confidence_score": result.confidence_score,
+            "sources": result.sources,
+            "metadata": result.metadata,
+            "processing_stats": result.processing_stats
+        }
+
+    async def _store_result(
+        self,
+        cache_key: tuple,
+        query: str,
+        query_vector: Optional[List[float]],
+        result: ProcessedResult,
+        corpus_version: int,
+        task_type: TaskType
+    ):
+        """Cache an answer for its exact query and, by embedding, for near-duplicates"""
+        self.cache.put(cache_key, result, corpus_version, ttl=self.cache_ttls[task_type])
+        if self.semantic_cache is not None and self.cache_ttls[task_type] > 0:
+            if query_vector is None:
+                query_vector = await self.vector_store.embed_query(query)
+            self.semantic_cache.add(query, query_vector, cache_key[1:], result, corpus_version)
+
+    def _cache_key(self, query: str, language: str, category: Optional[str], task_type: TaskType) -> tuple:
+        # Case, spacing and trailing punctuation do not change the answer
+        return (normalize_query(query), language, category, task_type.value)
+
+    def _not_found(
+        self,
+        query: str,
+        stats: Dict[str, Any],
+        cache_key: tuple,
+        corpus_version: int,
+        store: bool = True
+    ) -> ProcessedResult:
+        result = self._empty_result(query, stats)
+        if store:
+            self.negative_cache.put(cache_key, result, corpus_version)
+        return result
+
+    def _semantic_hit(
+        self,
+        semantic_hit: tuple,
+        query: str,
+        language: str,
+        category: Optional[str],
+        task_type: TaskType
+    ) -> ProcessedResult:
+        """Serve a semantic cache hit, auditing a sample of hits against a fresh answer"""
+        result, similarity, cached_query = semantic_hit
+        logger.info(f"Semantic cache hit (similarity {similarity:.3f})")
+        result.metadata["from_cache"] = True
+        result.metadata["semantic_cache"] = {"matched_query": cached_query, "similarity": round(similarity, 4)}
+        
+        if self.semantic_cache.should_audit():
+            task = asyncio.create_task(self._audit_semantic_hit(result, query, language, category, task_type))
+            # Keep a reference until the audit finishes
+            self._audit_tasks.add(task)
+            task.add_done_callback(self._audit_tasks.discard)
+        return result
+
+    async def _audit_semantic_hit(
+        self,
+        cached_result: ProcessedResult,
+        query: str,
+        language: str,
+        category: Optional[str],
+        task_type: TaskType
+    ):
+        """Answer the query without caches and count the hit as false if the sources disagree"""
+        # Audits are background work: they queue behind interactive and batch LLM calls
+        fresh_result = await self.process_query_pipeline(
+            query, language=language, category=category, task_type=task_type, use_cache=False,
+            priority=PRIORITY_BATCH + AUDIT_PRIORITY, caller="semantic-cache-audit"
+        )
+        if "error" in fresh_result.metadata:
+            return
+        if self.semantic_cache.record_audit(cached_result, fresh_result):
+            logger.warning(
+                f"Semantic cache false hit: '{query}' matched '{cached_result.metadata['semantic_cache']['matched_query']}'"
+            )
+
+    def _is_cached(self, cache_key: tuple, corpus_version: int) -> bool:
+        return self.cache.contains(cache_key, corpus_version) or self.negative_cache.contains(cache_key, corpus_version)
+
+    def cache_metrics(self) -> Dict[str, Any]:
+        return {
+            "results": self.cache.metrics(),
+            "not_found": self.negative_cache.metrics(),
+            "semantic": self.semantic_cache.metrics() if self.semantic_cache is not None else None,
+            "single_flight": {
+                "in_flight": len(self._in_flight),
+                "coalesced_queries": self.coalesced_queries,
+                "abandoned_runs": self.abandoned_runs
+            }
+        }
+
     async def _optimized_vector_search(
         self, 
         query: str, 
@@ -128,6 +469,43 @@ class OptimizedPipelineService:
         task_type: TaskType
     ) -> List[Dict[str, Any]]:
         """Optimized vector search with task-specific parameters"""
+        search_limit, similarity_threshold = self._search_params_for_task(limit, task_type)
+        
+        # Ensure vector store is initialized
+        await self.vector_store.initialize()
+        
+        # Perform search
+        results = await self.vector_store.search_documents(
+            query=query,
+            limit=search_limit,
+            category=category
+        )
+        
+        return self._filter_search_results(results, task_type, similarity_threshold)
+
+    async def _batch_vector_search(
+        self,
+        pipelines: List[QueryPipeline],
+        limit: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """Vector search for many pipelines with one batched store search"""
+        params = [self._search_params_for_task(limit, pipeline.task_type) for pipeline in pipelines]
+        
+        await self.vector_store.initialize()
+        
+        # Search once with the largest task limit, then trim per query
+        batch_results = await self.vector_store.search_documents_batch(
+            queries=[pipeline.query for pipeline in pipelines],
+            limit=max(search_limit for search_limit, _ in params)
+        )
+        
+        return [
+            self._filter_search_results(results[:search_limit], pipeline.task_type, similarity_threshold)
+            for pipeline, results, (search_limit, similarity_threshold) in zip(pipelines, batch_results, params)
+        ]
+
+    def _search_params_for_task(self, limit: int, task_type: TaskType) -> tuple:
+        """Search limit and similarity threshold for a task type"""
         
         # Adjust search parameters based on task type
         if task_type == TaskType.QA:
@@ -146,15 +524,15 @@ class OptimizedPipelineService:
             search_limit = limit
             similarity_threshold = 0.2
         
-        # Ensure vector store is initialized
-        await self.vector_store.initialize()
-        
-        # Perform search
-        results = await self.vector_store.search_documents(
-            query=query,
-            limit=search_limit,
-            category=category
-        )
+        return search_limit, similarity_threshold
+
+    def _filter_search_results(
+        self,
+        results: List[Dict[str, Any]],
+        task_type: TaskType,
+        similarity_threshold: float
+    ) -> List[Dict[str, Any]]:
+        """Drop search results beyond the task's distance threshold"""
         
         # Filter by similarity threshold (for distance-based similarity)
         # Lower distance = higher similarity, so we want results with distance below threshold
@@ -179,9 +557,12 @@ class OptimizedPipelineService:
         if not search_results:
             return []
         
+        # Hybrid search scores exact terms with BM25; normalize against the best hit
+        max_bm25 = max((result.get('bm25_score', 0.0) for result in search_results), default=0.0)
+        
         # Calculate relevance scores
         for result in search_results:
-            score = self._calculate_relevance_score(result, query, task_type)
+            score = self._calculate_relevance_score(result, query, task_type, max_bm25)
             result['relevance_score'] = score
         
         # Sort by relevance score
@@ -203,7 +584,8 @@ class OptimizedPipelineService:
         self, 
         result: Dict[str, Any], 
         query: str, 
-        task_type: TaskType
+        task_type: TaskType,
+        max_bm25: float = 0.0
     ) -> float:
         """Calculate comprehensive relevance score"""
         
@@ -222,7 +604,7 @@ class OptimizedPipelineService:
         type_factor = self._get_type_relevance(doc_type, task_type)
         
         # Keyword matching in title/content
-        keyword_factor = self._calculate_keyword_match(result, query)
+        keyword_factor = self._calculate_keyword_match(result, query, max_bm25)
         
         # Weighted combination
         final_score = (
@@ -268,8 +650,12 @@ class OptimizedPipelineService:
         
         return type_relevance.get(task_type, {}).get(doc_type, 0.5)
 
-    def _calculate_keyword_match(self, result: Dict[str, Any], query: str) -> float:
+    def _calculate_keyword_match(self, result: Dict[str, Any], query: str, max_bm25: float = 0.0) -> float:
         """Calculate keyword matching score"""
+        if 'bm25_score' in result:
+            # Already matched against the inverted index at search time
+            return result['bm25_score'] / max_bm25 if max_bm25 > 0 else 0.0
+        
         content = result.get('content', '').lower()
         title = result.get('metadata', {}).get('title', '').lower()
         query_lower = query.lower()
@@ -436,18 +822,7 @@ class OptimizedPipelineService:
     ) -> ProcessedResult:
         """Create final structured result"""
         
-        # Format sources with relevance scores
-        sources = []
-        for doc in context:
-            source = {
-                "title": doc['metadata'].get('title', 'Unknown'),
-                "content_preview": doc['content'][:200] + "...",
-                "category": doc['metadata'].get('category', 'Unknown'),
-                "document_type": doc['metadata'].get('document_type', 'Unknown'),
-                "relevance_score": doc.get('relevance_score', 0),
-                "distance": doc.get('distance', 1)
-            }
-            sources.append(source)
+        sources = self._format_sources(context)
         
         # Calculate overall confidence score
         confidence = self._calculate_confidence_score(parsed_result, context)
@@ -466,6 +841,21 @@ class OptimizedPipelineService:
             processing_stats=pipeline_stats
         )
 
+    def _format_sources(self, context: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format sources with relevance scores"""
+        return [
+            {
+                "title": doc['metadata'].get('title', 'Unknown'),
+                "content_preview": doc['content'][:200] + "...",
+                "category": doc['metadata'].get('category', 'Unknown'),
+                "document_type": doc['metadata'].get('document_type', 'Unknown'),
+                "pasal": doc['metadata'].get('pasal'),
+                "relevance_score": doc.get('relevance_score', 0),
+                "distance": doc.get('distance', 1)
+            }
+            for doc in context
+        ]
+
     def _calculate_confidence_score(
         self, 
         parsed_result: Dict[str, Any], 
@@ -522,9 +912,15 @@ class OptimizedPipelineService:
 
     async def batch_process_pipeline(
         self, 
-        queries: List[Dict[str, Any]]
+        queries: List[Dict[str, Any]],
+        caller: Optional[str] = None
     ) -> List[ProcessedResult]:
-        """Batch processing with pipeline optimization"""
+        """
+        Batch processing with pipeline optimization
+
+        All pipelines start at once, but their LLM calls queue in the LLM
+        scheduler behind interactive traffic, in order of pipeline priority.
+        """
         
         # Create pipelines
         pipelines = []
@@ -538,8 +934,22 @@ class OptimizedPipelineService:
             )
             pipelines.append(pipeline)
         
-        # Sort by priority
-        pipelines.sort(key=lambda x: x.priority)
+        # Retrieve context for every uncached query with one batched search
+        corpus_version = await self.vector_store.corpus_version()
+        uncached = [
+            pipeline for pipeline in pipelines
+            if not self._is_cached(self._cache_key(pipeline.query, pipeline.language, None, pipeline.task_type), corpus_version)
+        ]
+        prefetched = {}
+        if uncached:
+            try:
+                search_start = time.time()
+                batch_results = await self._batch_vector_search(uncached)
+                prefetched = {id(pipeline): results for pipeline, results in zip(uncached, batch_results)}
+                logger.info(f"Batched vector search for {len(uncached)} queries in {time.time() - search_start:.2f}s")
+            except Exception as e:
+                # Fall back to per-query search inside each pipeline
+                logger.error(f"Batched vector search failed: {e}")
         
         # Process in batches
         tasks = []
@@ -547,7 +957,10 @@ class OptimizedPipelineService:
             task = self.process_query_pipeline(
                 query=pipeline.query,
                 language=pipeline.language,
-                task_type=pipeline.task_type
+                task_type=pipeline.task_type,
+                search_results=prefetched.get(id(pipeline)),
+                priority=batch_priority(pipeline.priority),
+                caller=caller
             )
             tasks.append(task)
         
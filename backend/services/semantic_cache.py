@@ -0,0 +1,170 @@
+"""
+Semantic Cache - reuses answers of earlier questions whose embeddings are close to a new query
+"""
+import copy
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import faiss
+import numpy as np
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def semantic_cache_enabled() -> bool:
+    return os.getenv("SEMANTIC_CACHE", "true").lower() == "true"
+
+@dataclass
+class SemanticEntry:
+    partition: Tuple[str, Optional[str], str]
+    query: str
+    result: Any
+    expires_at: float
+
+class SemanticCache:
+    """
+    Answered questions indexed by normalized query embedding.
+
+    Each (language, category, task type) has its own flat inner-product
+    index, so a hit always comes from the same kind of question. A query
+    whose cosine similarity to a cached question is at least the threshold
+    gets a copy of that answer. Like the exact cache, entries are dropped
+    when the corpus version changes.
+
+    False hits are measured by audits: a sample of hits is answered again
+    without caches, and a hit whose fresh answer cites none of the cached
+    answer's documents is counted as false.
+    """
+
+    # Neighbours examined per lookup, so an expired nearest entry does not hide a live one
+    SEARCH_K = 8
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        audit_rate: Optional[float] = None
+    ):
+        self.threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")) if threshold is None else threshold
+        self.max_entries = int(os.getenv("SEMANTIC_CACHE_SIZE", "2000")) if max_entries is None else max_entries
+        self.ttl = float(os.getenv("SEMANTIC_CACHE_TTL", "3600")) if ttl is None else ttl
+        self.audit_rate = float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0.05")) if audit_rate is None else audit_rate
+        self.version = None
+        self._indexes: Dict[Tuple, faiss.Index] = {}
+        self._entries: "OrderedDict[int, SemanticEntry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.hit_similarity_total = 0.0
+        self.audits = 0
+        self.false_hits = 0
+        self.invalidations = 0
+
+    def lookup(self, query_vector: List[float], partition: Tuple, version: int) -> Optional[Tuple[Any, float, str]]:
+        """(copy of the cached result, similarity, cached question) of the closest live entry, or None"""
+        vector = self._normalize(query_vector)
+        with self._lock:
+            self.lookups += 1
+            index = self._indexes.get(partition) if self._check_version(version) else None
+            if index is None or index.ntotal == 0:
+                return None
+
+            similarities, ids = index.search(vector, min(self.SEARCH_K, index.ntotal))
+            now = time.monotonic()
+            for similarity, entry_id in zip(similarities[0].tolist(), ids[0].tolist()):
+                # Neighbours come best first: nothing further can reach the threshold
+                if entry_id == -1 or similarity < self.threshold:
+                    return None
+                entry = self._entries.get(entry_id)
+                if entry is None:
+                    continue
+                if entry.expires_at <= now:
+                    self._remove(entry_id)
+                    continue
+
+                self._entries.move_to_end(entry_id)
+                self.hits += 1
+                self.hit_similarity_total += similarity
+                result, cached_query = entry.result, entry.query
+                break
+            else:
+                return None
+        return copy.deepcopy(result), similarity, cached_query
+
+    def add(self, query: str, query_vector: List[float], partition: Tuple, result: Any, version: int):
+        vector = self._normalize(query_vector)
+        result = copy.deepcopy(result)
+        with self._lock:
+            if not self._check_version(version):
+                return
+            index = self._indexes.get(partition)
+            if index is None:
+                index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+                self._indexes[partition] = index
+
+            entry_id = self._next_id
+            self._next_id += 1
+            index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = SemanticEntry(partition, query, result, time.monotonic() + self.ttl)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def should_audit(self) -> bool:
+        return random.random() < self.audit_rate
+
+    def record_audit(self, cached_result: Any, fresh_result: Any) -> bool:
+        """Count an audited hit; a hit is false if the fresh answer shares no source document"""
+        cached_titles = {source.get("title") for source in cached_result.sources}
+        fresh_titles = {source.get("title") for source in fresh_result.sources}
+        is_false_hit = bool(cached_titles) and not (cached_titles & fresh_titles)
+        with self._lock:
+            self.audits += 1
+            self.false_hits += is_false_hit
+        return is_false_hit
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "avg_hit_similarity": round(self.hit_similarity_total / self.hits, 4) if self.hits else None,
+                "audits": self.audits,
+                "false_hits": self.false_hits,
+                "false_hit_rate": round(self.false_hits / self.audits, 3) if self.audits else None,
+                "invalidations": self.invalidations,
+                "corpus_version": self.version
+            }
+
+    def _normalize(self, query_vector: List[float]) -> np.ndarray:
+        vector = np.array([query_vector], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _remove(self, entry_id: int):
+        # Callers hold self._lock
+        entry = self._entries.pop(entry_id)
+        self._indexes[entry.partition].remove_ids(np.array([entry_id], dtype=np.int64))
+
+    def _check_version(self, version: int) -> bool:
+        """Move to a newer corpus version, dropping all entries; False if version is older"""
+        # Callers hold self._lock
+        if self.version is not None and version < self.version:
+            return False
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._indexes.clear()
+            self.version = version
+        return True
@@ -0,0 +1,95 @@
+"""
+Service Container - process-wide services created once at startup and injected into routes
+"""
+from services.embeddings import create_embeddings
+from services.vector_store_factory import VectorStoreFactory
+from services.llm_service import LLMService
+from services.optimized_llm_service import OptimizedLLMService
+from services.pipeline_service import OptimizedPipelineService
+from services.document_processor import shutdown_pdf_pool
+from services.ingestion_queue import IngestionQueue
+from utils.compute_pool import query_pool, ingest_pool
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class ServiceContainer:
+    """
+    Owns the embedding model, vector store, LLM clients and pipeline.
+
+    Everything is built once in startup() and shared by all requests, so no
+    request loads a transformer model or re-reads the index from disk.
+    """
+
+    def __init__(self):
+        self.embeddings = None
+        self.vector_store = None
+        self.llm_service = None
+        self.optimized_llm_service = None
+        self.pipeline_service = None
+        self.ingestion_queue = None
+        self.started = False
+
+    async def startup(self):
+        """Load the embedding model and index and create the LLM clients"""
+        if self.started:
+            return
+
+        self.embeddings = create_embeddings()
+        self.vector_store = VectorStoreFactory.create_vector_store(embeddings=self.embeddings)
+        await self.vector_store.initialize()
+
+        self.llm_service = LLMService()
+        self.optimized_llm_service = OptimizedLLMService()
+        self.pipeline_service = OptimizedPipelineService(
+            vector_store=self.vector_store,
+            llm_service=self.optimized_llm_service
+        )
+        self.ingestion_queue = IngestionQueue(vector_store=self.vector_store)
+        self.ingestion_queue.start()
+        self.started = True
+        logger.info("Services started")
+
+    async def shutdown(self):
+        """Flush the vector store, close clients and stop the compute pools"""
+        if not self.started:
+            return
+
+        try:
+            # Stop ingestion first so no job writes to a closed store
+            await self.ingestion_queue.stop()
+            if hasattr(self.vector_store, "close"):
+                await self.vector_store.close()
+            await self.optimized_llm_service.client.close()
+            self.llm_service.client.close()
+            self.embeddings.cache.close()
+        except Exception as e:
+            logger.error(f"Error during service shutdown: {e}")
+        finally:
+            query_pool.shutdown()
+            ingest_pool.shutdown()
+            shutdown_pdf_pool()
+            self.started = False
+            logger.info("Services stopped")
+
+    def require(self, name: str):
+        service = getattr(self, name)
+        if service is None:
+            raise RuntimeError(f"Service '{name}' is not available before startup")
+        return service
+
+# Global instance
+services = ServiceContainer()
+
+# Dependencies
+def get_vector_store():
+    return services.require("vector_store")
+
+def get_llm_service() -> LLMService:
+    return services.require("llm_service")
+
+def get_pipeline_service() -> OptimizedPipelineService:
+    return services.require("pipeline_service")
+
+def get_ingestion_queue() -> IngestionQueue:
+    return services.require("ingestion_queue")
@@ -0,0 +1,71 @@
+"""
+Vector Archive - float32 embeddings on disk, addressed by chunk ID
+"""
+import os
+import numpy as np
+from typing import Optional
+
+class VectorArchive:
+    """
+    Stores the original (uncompressed) embedding of every chunk in a flat file.
+
+    Row ``i`` holds the vector of chunk ID ``i``, so lookups are a single
+    memory-mapped slice. Compressed indexes use it for exact rescoring and
+    every index type uses it to rebuild without calling the embedding model.
+    """
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self.row_bytes = dimension * np.dtype(np.float32).itemsize
+        self._view: Optional[np.memmap] = None
+        self._view_size = 0
+
+    def __len__(self) -> int:
+        """Number of rows (highest chunk ID + 1) stored on disk"""
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path) // self.row_bytes
+
+    def write(self, ids: np.ndarray, vectors: np.ndarray, fsync: bool = False):
+        """Write vectors at the rows of their chunk IDs, optionally forcing them to disk"""
+        if len(ids) == 0:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        # O_CREAT without truncation: concurrent adds write disjoint rows of the same file
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        with os.fdopen(fd, "r+b") as f:
+            if np.all(np.diff(ids) == 1):
+                # Contiguous ID range (the common case for a fresh document): one write
+                f.seek(int(ids[0]) * self.row_bytes)
+                f.write(vectors.tobytes())
+            else:
+                for chunk_id, vector in zip(ids, vectors):
+                    f.seek(int(chunk_id) * self.row_bytes)
+                    f.write(vector.tobytes())
+
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def get(self, ids: np.ndarray) -> np.ndarray:
+        """Read the vectors of the given chunk IDs"""
+        if len(ids) == 0:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.array(self._memmap()[np.asarray(ids, dtype=np.int64)])
+
+    def reset(self):
+        """Drop all stored vectors"""
+        self._view = None
+        self._view_size = 0
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _memmap(self) -> np.memmap:
+        """Read-only mapping of the file, remapped when the file has grown"""
+        size = os.path.getsize(self.path)
+        if self._view is None or size != self._view_size:
+            self._view = np.memmap(self.path, dtype=np.float32, mode="r", shape=(size // self.row_bytes, self.dimension))
+            self._view_size = size
+        return self._view
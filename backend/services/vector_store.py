@@ -1,28 +1,39 @@
 import os
+import time
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from typing import List, Dict, Any, Optional, Callable
 import uuid
+import numpy as np
+from services.embeddings import create_embeddings, embed_in_batches, QueryEmbeddingBatcher
+from services.legal_text_splitter import LegalTextSplitter
+from services.lexical_index import LexicalIndex, fuse_results, hybrid_search_enabled
+from services.document_catalog import DocumentCatalog, summarize_chunks
+from utils.compute_pool import query_pool, ingest_pool
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 class VectorStoreService:
-    def __init__(self):
+    def __init__(self, embeddings=None):
         self.client = None
         self.collection = None
-        self.embeddings = None
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
+        self.embeddings = embeddings
+        self.query_batcher = None
+        # BM25 index over the collection's chunk IDs, fused with vector hits at search time
+        self.lexical_index = None
+        self.hybrid_search = hybrid_search_enabled()
+        # Per-document rows for listings and stats, updated with every add and delete
+        self.catalog = None
+        # One chunk per Pasal for legislation; character chunks for other documents
+        self.text_splitter = LegalTextSplitter()
         self.initialized = False
     
     async def initialize(self):
         """Initialize ChromaDB and embeddings"""
+        if self.initialized:
+            return
+        
         try:
             # Initialize ChromaDB
             self.client = chromadb.PersistentClient(
@@ -36,172 +47,328 @@ class VectorStoreService:
                 metadata={"description": "Policy documents collection"}
             )
             
-            # Initialize embeddings
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-            )
+            # Initialize embeddings unless a shared model was injected
+            if self.embeddings is None:
+                self.embeddings = create_embeddings()
+            # Coalesces query embeddings of concurrent searches into one forward pass
+            self.query_batcher = QueryEmbeddingBatcher(self.embeddings)
+            
+            self.lexical_index = LexicalIndex("./data/chroma_lexical.db")
+            await ingest_pool.run(self._sync_lexical_index)
+            self.catalog = DocumentCatalog("./data/chroma_catalog.db")
+            await ingest_pool.run(self._sync_catalog)
             
+            self.initialized = True
             logger.info("Vector store initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize vector store: {e}")
             raise
     
+    def _sync_lexical_index(self, page_size: int = 1000):
+        """Rebuild the BM25 index from the collection if it is missing or out of step"""
+        total = self.collection.count()
+        if self.lexical_index.count() == total:
+            return
+        
+        self.lexical_index.reset()
+        for offset in range(0, total, page_size):
+            page = self.collection.get(include=["metadatas", "documents"], limit=page_size, offset=offset)
+            self.lexical_index.add(
+                (chunk_id, metadata.get("title", ""), document, metadata.get("category"))
+                for chunk_id, metadata, document in zip(page["ids"], page["metadatas"], page["documents"])
+            )
+        logger.info(f"Built BM25 index for {total} chunks")
+    
+    def _sync_catalog(self, page_size: int = 1000):
+        """Rebuild the document catalog from the collection if it is missing or out of step"""
+        total = self.collection.count()
+        if self.catalog.total_chunks() == total:
+            return
+        
+        def chunks():
+            for offset in range(0, total, page_size):
+                page = self.collection.get(include=["metadatas", "documents"], limit=page_size, offset=offset)
+                # Chunks stored before document IDs existed get one ID per title
+                legacy = [i for i, metadata in enumerate(page["metadatas"]) if not metadata.get("document_id")]
+                for i in legacy:
+                    page["metadatas"][i]["document_id"] = str(uuid.uuid5(uuid.NAMESPACE_URL, page["metadatas"][i].get("title", "Unknown")))
+                if legacy:
+                    self.collection.update(
+                        ids=[page["ids"][i] for i in legacy],
+                        metadatas=[page["metadatas"][i] for i in legacy]
+                    )
+                yield from zip(page["ids"], page["metadatas"], page["documents"])
+        
+        self.catalog.rebuild(chunks())
+        logger.info(f"Built document catalog for {total} chunks")
+    
     async def add_document(self, title: str, content: str, metadata: Dict[str, Any]) -> str:
         """Add a document to the vector store"""
+        document_ids = await self.add_documents([{"title": title, "content": content, "metadata": metadata}])
+        return document_ids[0]
+    
+    async def add_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[str]:
+        """Add many documents with batched embedding across documents"""
         try:
-            # Split document into chunks
-            chunks = self.text_splitter.split_text(content)
+            start_time = time.time()
+            
+            # Split every document into chunks and prepare metadata for each chunk
+            document_ids = [str(uuid.uuid4()) for _ in documents]
+            chunks = []
+            chunk_metadata = []
+            for document, document_id in zip(documents, document_ids):
+                document_chunks = self.text_splitter.split_with_metadata(document["content"])
+                for i, (chunk, unit_metadata) in enumerate(document_chunks):
+                    chunk_meta = document["metadata"].copy()
+                    chunk_meta.update(unit_metadata)
+                    chunk_meta.update({
+                        "title": document["title"],
+                        "chunk_index": i,
+                        "total_chunks": len(document_chunks),
+                        "document_id": document_id
+                    })
+                    chunks.append(chunk)
+                    chunk_metadata.append(chunk_meta)
             
-            # Generate embeddings for chunks
-            embeddings = self.embeddings.embed_documents(chunks)
+            if not chunks:
+                return document_ids
+            
+            # Generate embeddings in large batches spanning documents
+            embeddings = await ingest_pool.run(embed_in_batches, self.embeddings, chunks, batch_size, progress_callback)
             
             # Create unique IDs for chunks
             chunk_ids = [f"{uuid.uuid4()}" for _ in chunks]
             
-            # Prepare metadata for each chunk
-            chunk_metadata = []
-            for i, chunk in enumerate(chunks):
-                chunk_meta = metadata.copy()
-                chunk_meta.update({
-                    "title": title,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
-                })
-                chunk_metadata.append(chunk_meta)
-            
-            # Add to ChromaDB
-            self.collection.add(
-                embeddings=embeddings,
-                documents=chunks,
-                metadatas=chunk_metadata,
-                ids=chunk_ids
-            )
+            # Add to ChromaDB, in as few calls as its batch limit allows
+            max_batch_size = getattr(self.client, "max_batch_size", len(chunks)) or len(chunks)
+            for start in range(0, len(chunks), max_batch_size):
+                end = start + max_batch_size
+                await ingest_pool.run(
+                    self.collection.add,
+                    embeddings=embeddings[start:end],
+                    documents=chunks[start:end],
+                    metadatas=chunk_metadata[start:end],
+                    ids=chunk_ids[start:end]
+                )
+            lexical_entries = [
+                (chunk_id, meta.get("title", ""), chunk, meta.get("category"))
+                for chunk_id, meta, chunk in zip(chunk_ids, chunk_metadata, chunks)
+            ]
+            await ingest_pool.run(self.lexical_index.add, lexical_entries)
+            await ingest_pool.run(self.catalog.add, summarize_chunks(zip(chunk_ids, chunk_metadata, chunks)))
             
-            logger.info(f"Added document '{title}' with {len(chunks)} chunks")
-            return str(uuid.uuid4())
+            elapsed = time.time() - start_time
+            logger.info(
+                f"Added {len(documents)} documents with {len(chunks)} chunks "
+                f"in {elapsed:.2f}s ({len(chunks) / max(elapsed, 1e-9):.1f} chunks/sec)"
+            )
+            return document_ids
             
         except Exception as e:
-            logger.error(f"Failed to add document: {e}")
+            logger.error(f"Failed to add documents: {e}")
             raise
     
     async def search_documents(self, query: str, limit: int = 5, category: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search for relevant documents"""
+        results = await self.search_documents_batch([query], limit, category)
+        return results[0]
+    
+    async def search_documents_batch(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        category: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search many queries with one embedding pass and one ChromaDB query"""
         try:
-            # Ensure embeddings are initialized
-            if not self.embeddings:
+            # Ensure the store is initialized
+            if not self.initialized:
                 await self.initialize()
+            
+            if not queries:
+                return []
                 
-            # Generate query embedding
-            query_embedding = self.embeddings.embed_query(query)
+            # Generate query embeddings in one forward pass, batched with concurrent searches
+            query_embeddings = await self.query_batcher.embed_queries(queries)
             
             # Prepare where clause for filtering
             where_clause = {}
             if category:
                 where_clause["category"] = category
             
+            # Hybrid search fuses a deeper candidate list from each retriever
+            candidate_limit = limit * 3 if self.hybrid_search else limit
+            
             # Search in ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=limit,
+            results = await query_pool.run(
+                self.collection.query,
+                query_embeddings=query_embeddings,
+                n_results=candidate_limit,
                 where=where_clause if where_clause else None
             )
             
             # Format results
-            formatted_results = []
-            for i in range(len(results['documents'][0])):
-                formatted_results.append({
-                    "content": results['documents'][0][i],
-                    "metadata": results['metadatas'][0][i],
-                    "distance": results['distances'][0][i] if 'distances' in results else 0
-                })
+            batch_results = []
+            for row in range(len(queries)):
+                formatted_results = []
+                for i in range(len(results['documents'][row])):
+                    formatted_results.append({
+                        "chunk_id": results['ids'][row][i],
+                        "content": results['documents'][row][i],
+                        "metadata": results['metadatas'][row][i],
+                        "distance": results['distances'][row][i] if 'distances' in results else 0
+                    })
+                batch_results.append(formatted_results)
+            
+            if not self.hybrid_search:
+                return batch_results
             
-            return formatted_results
+            lexical_rows = await query_pool.run(self.lexical_index.search_many, queries, candidate_limit, category)
+            lexical_results = await query_pool.run(self._lexical_results, query_embeddings, lexical_rows)
+            return [
+                fuse_results(vector_results, lexical_row_results, limit)
+                for vector_results, lexical_row_results in zip(batch_results, lexical_results)
+            ]
             
         except Exception as e:
             logger.error(f"Failed to search documents: {e}")
             raise
     
+    def _lexical_results(self, query_embeddings: List[List[float]], lexical_rows: List[List[tuple]]) -> List[List[Dict[str, Any]]]:
+        """Format BM25 hits, with the same L2 distance ChromaDB reports for vector hits"""
+        chunk_ids = list({chunk_id for row in lexical_rows for chunk_id, _ in row})
+        if not chunk_ids:
+            return [[] for _ in lexical_rows]
+        
+        fetched = self.collection.get(ids=chunk_ids, include=["metadatas", "documents", "embeddings"])
+        chunks = {
+            chunk_id: (document, metadata, np.asarray(embedding, dtype=np.float32))
+            for chunk_id, document, metadata, embedding in zip(
+                fetched["ids"], fetched["documents"], fetched["metadatas"], fetched["embeddings"]
+            )
+        }
+        
+        batch_results = []
+        for query_embedding, row in zip(query_embeddings, lexical_rows):
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            formatted_results = []
+            for chunk_id, bm25_score in row:
+                if chunk_id not in chunks:
+                    continue
+                document, metadata, embedding = chunks[chunk_id]
+                formatted_results.append({
+                    "chunk_id": chunk_id,
+                    "content": document,
+                    "metadata": metadata,
+                    "distance": float(np.sum((embedding - query_vector) ** 2)),
+                    "bm25_score": round(bm25_score, 4)
+                })
+            batch_results.append(formatted_results)
+        return batch_results
+    
     async def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the collection"""
         try:
-            count = self.collection.count()
             return {
-                "total_documents": count,
-                "collection_name": "policy_documents"
+                **await query_pool.run(self.catalog.stats),
+                "collection_name": "policy_documents",
+                "embedding_cache": self.embeddings.cache.stats()
             }
         except Exception as e:
             logger.error(f"Failed to get collection stats: {e}")
             return {"total_documents": 0, "collection_name": "policy_documents"}
     
-    async def get_all_documents(self) -> List[Dict[str, Any]]:
-        """Get all documents with their metadata"""
-        try:
-            # Get all documents from the collection
-            results = self.collection.get(
-                include=["metadatas", "documents"]
-            )
-            
-            # Group by document title to avoid duplicates (since we have chunks)
-            documents_map = {}
-            
-            for i, metadata in enumerate(results["metadatas"]):
-                title = metadata.get("title", "Unknown")
-                
-                # If document not yet in map, add it
-                if title not in documents_map:
-                    documents_map[title] = {
-                        "title": title,
-                        "category": metadata.get("category", "general"),
-                        "document_type": metadata.get("document_type", "regulation"),
-                        "source": metadata.get("source", "unknown"),
-                        "date_created": metadata.get("date_created", "unknown"),
-                        "language": metadata.get("language", "id"),
-                        "chunk_count": 1,
-                        "preview": results["documents"][i][:200] + "..." if len(results["documents"][i]) > 200 else results["documents"][i]
-                    }
-                else:
-                    # Increment chunk count for existing document
-                    documents_map[title]["chunk_count"] += 1
-            
-            # Convert to list and sort by date_created
-            documents_list = list(documents_map.values())
-            documents_list.sort(key=lambda x: x.get("date_created", ""), reverse=True)
-            
-            return documents_list
-            
-        except Exception as e:
-            logger.error(f"Failed to get all documents: {e}")
-            return []
+    async def corpus_version(self) -> int:
+        """Counter that changes whenever a document is added or deleted"""
+        return await query_pool.run(self.catalog.version)
+    
+    async def embed_query(self, query: str) -> List[float]:
+        """Query embedding from the shared cache and batcher, as used by search"""
+        if not self.initialized:
+            await self.initialize()
+        return await self.query_batcher.embed_query(query)
+    
+    async def list_documents(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: str = "date_created",
+        descending: bool = True,
+        category: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """One page of documents from the catalog, with the total and the cursor of the next page"""
+        documents, next_cursor = await query_pool.run(self.catalog.page, limit, cursor, sort, descending, category)
+        return {
+            "documents": documents,
+            "total": await query_pool.run(self.catalog.count, category),
+            "next_cursor": next_cursor
+        }
+    
+    async def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """A document's catalog row and its chunks in order"""
+        document = await query_pool.run(self.catalog.get, document_id)
+        if document is None:
+            return None
+        
+        results = await query_pool.run(
+            self.collection.get,
+            where={"document_id": document_id},
+            include=["metadatas", "documents"]
+        )
+        chunks = sorted(
+            zip(results["ids"], results["metadatas"], results["documents"]),
+            key=lambda chunk: chunk[1].get("chunk_index", 0)
+        )
+        return {
+            **document,
+            "chunks": [
+                {"chunk_id": chunk_id, "content": content, "metadata": metadata}
+                for chunk_id, metadata, content in chunks
+            ]
+        }
+    
+    async def delete_document(self, document_id: str) -> Dict[str, Any]:
+        """Delete one document by its ID"""
+        return await self._delete_where({"document_id": document_id}, [document_id], f"Document '{document_id}'")
     
-    def delete_document_by_title(self, title: str) -> Dict[str, Any]:
-        """Delete all chunks of a document by title"""
+    async def delete_document_by_title(self, title: str) -> Dict[str, Any]:
+        """Delete every document uploaded under a title"""
+        documents = await query_pool.run(self.catalog.find_by_title, title)
+        return await self._delete_where(
+            {"title": title}, [document["document_id"] for document in documents], f"Document '{title}'"
+        )
+    
+    async def _delete_where(self, where: Dict[str, Any], document_ids: List[str], label: str) -> Dict[str, Any]:
+        """Delete the chunks matching a metadata filter and the given catalog rows"""
         try:
-            # Get all documents with the specified title
-            results = self.collection.get(
-                where={"title": title},
-                include=["metadatas"]
-            )
+            results = await query_pool.run(self.collection.get, where=where, include=[])
             
             if not results["ids"]:
                 return {
                     "success": False,
-                    "message": f"Document '{title}' not found"
+                    "message": f"{label} not found"
                 }
             
-            # Delete all chunks with this title
             chunk_ids = results["ids"]
-            self.collection.delete(ids=chunk_ids)
+            await query_pool.run(self.collection.delete, ids=chunk_ids)
+            await query_pool.run(self.lexical_index.delete, chunk_ids)
+            await query_pool.run(self.catalog.remove, document_ids)
             
-            logger.info(f"Deleted document '{title}' with {len(chunk_ids)} chunks")
+            logger.info(f"Deleted {label} with {len(chunk_ids)} chunks")
             
             return {
                 "success": True,
-                "message": f"Document '{title}' deleted successfully",
+                "message": f"{label} deleted successfully",
                 "deleted_chunks": len(chunk_ids)
             }
             
         except Exception as e:
-            logger.error(f"Failed to delete document '{title}': {e}")
+            logger.error(f"Failed to delete {label}: {e}")
             return {
                 "success": False,
                 "message": f"Error deleting document: {str(e)}"
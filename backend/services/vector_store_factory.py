@@ -8,12 +8,13 @@ from services.faiss_vector_store import FAISSVectorStoreService
 
 class VectorStoreFactory:
     @staticmethod
-    def create_vector_store(store_type: str = None) -> Union[VectorStoreService, FAISSVectorStoreService]:
+    def create_vector_store(store_type: str = None, embeddings=None) -> Union[VectorStoreService, FAISSVectorStoreService]:
         """
         Create vector store instance based on configuration
         
         Args:
             store_type: 'chromadb' or 'faiss'. If None, uses environment variable VECTOR_STORE_TYPE
+            embeddings: Shared embeddings to use instead of loading a new model in initialize()
         
         Returns:
             Vector store instance
@@ -24,8 +25,8 @@ class VectorStoreFactory:
         store_type = store_type.lower()
         
         if store_type == "faiss":
-            return FAISSVectorStoreService()
+            return FAISSVectorStoreService(embeddings)
         elif store_type == "chromadb":
-            return VectorStoreService()
+            return VectorStoreService(embeddings)
         else:
             raise ValueError(f"Unsupported vector store type: {store_type}. Use 'chromadb' or 'faiss'")
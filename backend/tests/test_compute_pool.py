@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.compute_pool import ComputePool, ComputePoolSaturatedError
+
+def test_runs_call_and_counts_it():
+    pool = ComputePool("test", max_workers=2, max_queue=2)
+
+    assert asyncio.run(pool.run(sum, [1, 2, 3])) == 6
+    metrics = pool.metrics()
+    assert (metrics["submitted"], metrics["completed"], metrics["failed"], metrics["in_flight"]) == (1, 1, 0, 0)
+    pool.shutdown()
+
+def test_failure_propagates_and_is_counted():
+    pool = ComputePool("test", max_workers=1, max_queue=0)
+
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(pool.run(lambda: 1 / 0))
+    assert pool.metrics()["failed"] == 1
+    pool.shutdown()
+
+def test_call_past_capacity_is_rejected_after_queue_timeout():
+    pool = ComputePool("test", max_workers=1, max_queue=0, queue_timeout=0.05)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        try:
+            with pytest.raises(ComputePoolSaturatedError):
+                await pool.run(time.sleep, 0)
+        finally:
+            release.set()
+        await running
+
+    asyncio.run(scenario())
+    assert pool.metrics()["rejected"] == 1
+    pool.shutdown()
+
+def test_cancelled_caller_keeps_its_slot_until_the_thread_finishes():
+    pool = ComputePool("test", max_workers=1, max_queue=0, queue_timeout=0.05)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+        # The worker thread is still busy, so a new call must not be admitted
+        try:
+            with pytest.raises(ComputePoolSaturatedError):
+                await asyncio.wait_for(pool.run(time.sleep, 0), timeout=1)
+        finally:
+            release.set()
+        await asyncio.sleep(0.05)
+        return await pool.run(lambda: "admitted")
+
+    assert asyncio.run(scenario()) == "admitted"
+    assert pool.metrics()["in_flight"] == 0
+    pool.shutdown()
@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("langchain")
+
+from services.legal_text_splitter import LegalTextSplitter
+
+UNDANG_UNDANG = """PERATURAN TENTANG CUTI PEGAWAI
+
+BAB I
+KETENTUAN UMUM
+Pasal 1
+Dalam peraturan ini yang dimaksud dengan pegawai adalah pegawai tetap.
+
+Pasal 2
+(1) Pegawai berhak atas cuti tahunan.
+(2) Cuti tahunan diberikan paling lama 12 hari kerja.
+
+BAB II
+CUTI
+Bagian Kesatu
+Cuti Tahunan
+Pasal 3
+(1) Permohonan cuti tahunan sebagaimana dimaksud dalam
+Pasal 2
+ayat (2) diajukan secara tertulis.
+(2) Cuti tahunan yang tidak diambil dapat ditangguhkan.
+Pasal 4
+Ketentuan lebih lanjut diatur oleh pimpinan.
+"""
+
+def split(text):
+    return LegalTextSplitter(max_chunk_size=1500, structure_aware=True).split_with_metadata(text)
+
+def test_one_chunk_per_pasal_with_bab_and_bagian_context():
+    chunks = split(UNDANG_UNDANG)
+
+    pasal = [metadata.get("pasal") for _, metadata in chunks]
+    assert pasal == [None, "1", "2", "3", "4"]
+    content, metadata = chunks[3]
+    assert metadata["bab"] == "II" and metadata["bagian"] == "Kesatu"
+    assert content.startswith("BAB II CUTI - Bagian Kesatu Cuti Tahunan\nPasal 3")
+
+def test_wrapped_cross_reference_does_not_start_a_pasal():
+    content, metadata = split(UNDANG_UNDANG)[3]
+
+    assert metadata["pasal"] == "3"
+    assert "sebagaimana dimaksud dalam\nPasal 2\nayat (2) diajukan secara tertulis." in content
+    assert metadata["ayat"] == "1-2"
+
+def test_pasal_heading_after_sentence_without_blank_line():
+    text = "Pasal 1\nPegawai berhak atas cuti.\nPasal 2\n(1) Cuti diajukan tertulis.\nPasal 3\nDihapus."
+
+    assert [metadata["pasal"] for _, metadata in split(text)] == ["1", "2", "3"]
+
+def test_text_without_pasal_uses_character_splitter():
+    chunks = split("Kebijakan kerja dari rumah berlaku untuk semua divisi.")
+
+    assert chunks == [("Kebijakan kerja dari rumah berlaku untuk semua divisi.", {})]
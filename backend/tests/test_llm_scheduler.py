@@ -0,0 +1,138 @@
+import asyncio
+
+from utils.llm_scheduler import LLMRequest, LLMScheduler, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+
+async def _hold(scheduler, request, release, order=None, name=None):
+    async with scheduler.slot(request):
+        if order is not None:
+            order.append(name)
+        await release.wait()
+
+def test_interactive_calls_go_before_batch_calls():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0)
+        release, order = asyncio.Event(), []
+        first = asyncio.create_task(_hold(scheduler, LLMRequest(), release))
+        await asyncio.sleep(0)
+        tasks = [
+            asyncio.create_task(_hold(scheduler, LLMRequest(PRIORITY_BATCH, "batch"), release, order, "batch")),
+            asyncio.create_task(_hold(scheduler, LLMRequest(PRIORITY_INTERACTIVE, "user"), release, order, "user"))
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, *tasks)
+        return order, scheduler
+
+    order, scheduler = asyncio.run(scenario())
+    assert order == ["user", "batch"]
+    assert scheduler.in_flight == 0
+
+def test_waiting_batch_call_ages_past_new_interactive_calls():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0.01)
+        release, order = asyncio.Event(), []
+        first = asyncio.create_task(_hold(scheduler, LLMRequest(), release))
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(_hold(scheduler, LLMRequest(PRIORITY_BATCH, "batch"), release, order, "batch"))
+        # Longer than PRIORITY_BATCH aging steps: the batch call now ranks above interactive work
+        await asyncio.sleep(0.2)
+        user = asyncio.create_task(_hold(scheduler, LLMRequest(PRIORITY_INTERACTIVE, "user"), release, order, "user"))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, batch, user)
+        return order
+
+    assert asyncio.run(scenario()) == ["batch", "user"]
+
+def test_callers_at_one_level_take_turns():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0)
+        release, order = asyncio.Event(), []
+        first = asyncio.create_task(_hold(scheduler, LLMRequest(), release))
+        await asyncio.sleep(0)
+        tasks = [
+            asyncio.create_task(_hold(scheduler, LLMRequest(PRIORITY_BATCH, caller), release, order, f"{caller}{i}"))
+            for caller, i in [("a", 0), ("a", 1), ("a", 2), ("b", 0)]
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, *tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["a0", "b0", "a1", "a2"]
+
+def test_promote_moves_a_waiting_request_ahead():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0)
+        release, order = asyncio.Event(), []
+        first = asyncio.create_task(_hold(scheduler, LLMRequest(), release))
+        await asyncio.sleep(0)
+        other = asyncio.create_task(_hold(scheduler, LLMRequest(PRIORITY_BATCH + 1, "other"), release, order, "other"))
+        request = LLMRequest(PRIORITY_BATCH + 5, "shared")
+        shared = asyncio.create_task(_hold(scheduler, request, release, order, "shared"))
+        await asyncio.sleep(0)
+        scheduler.promote(request, PRIORITY_INTERACTIVE)
+        release.set()
+        await asyncio.gather(first, other, shared)
+        return order, request
+
+    order, request = asyncio.run(scenario())
+    assert order == ["shared", "other"]
+    assert request.priority == PRIORITY_INTERACTIVE
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0)
+        release = asyncio.Event()
+        first = asyncio.create_task(_hold(scheduler, LLMRequest(), release))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_hold(scheduler, LLMRequest(), release))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        queued = scheduler.metrics()["queued"]
+        release.set()
+        await first
+        return scheduler, queued
+
+    scheduler, queued = asyncio.run(scenario())
+    assert queued == 0
+    assert scheduler.in_flight == 0
+    assert scheduler.cancelled_waiting == 1
+
+def test_waiter_cancelled_as_its_slot_frees_is_skipped():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0)
+        async with scheduler.slot():
+            cancelled = asyncio.create_task(_hold(scheduler, LLMRequest(), asyncio.Event()))
+            second = asyncio.create_task(_hold(scheduler, LLMRequest(), asyncio.Event()))
+            await asyncio.sleep(0)
+            # Cancelled but not yet resumed when the slot is handed on
+            cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        await asyncio.sleep(0)
+        in_flight = scheduler.in_flight
+        second.cancel()
+        await asyncio.gather(second, return_exceptions=True)
+        return scheduler, in_flight
+
+    scheduler, in_flight = asyncio.run(scenario())
+    # The slot went to the second waiter, and came back when it was cancelled
+    assert in_flight == 1
+    assert scheduler.in_flight == 0
+    assert scheduler.metrics()["queued"] == 0
+
+def test_waiter_cancelled_after_its_grant_returns_the_slot():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0)
+        async with scheduler.slot():
+            granted = asyncio.create_task(_hold(scheduler, LLMRequest(), asyncio.Event()))
+            await asyncio.sleep(0)
+        # The slot was handed to the waiter, which is cancelled before it resumes
+        granted.cancel()
+        await asyncio.gather(granted, return_exceptions=True)
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.in_flight == 0
+    assert scheduler.metrics()["queued"] == 0
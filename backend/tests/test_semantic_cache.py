@@ -0,0 +1,77 @@
+import time
+
+from services.semantic_cache import SemanticCache
+
+PARTITION = ("id", None, "qa")
+
+def make_cache(**settings):
+    defaults = {"threshold": 0.9, "max_entries": 10, "ttl": 60, "audit_rate": 0}
+    return SemanticCache(**{**defaults, **settings})
+
+def test_near_duplicate_query_hits_and_gets_a_copy():
+    cache = make_cache()
+    cache.add("berapa hari cuti tahunan", [1.0, 0.0, 0.0], PARTITION, {"answer": "12 hari"}, version=1)
+
+    result, similarity, cached_query = cache.lookup([0.99, 0.05, 0.0], PARTITION, version=1)
+
+    assert result == {"answer": "12 hari"}
+    assert similarity > 0.9
+    assert cached_query == "berapa hari cuti tahunan"
+    result["answer"] = "diubah"
+    assert cache.lookup([1.0, 0.0, 0.0], PARTITION, version=1)[0] == {"answer": "12 hari"}
+
+def test_dissimilar_query_and_other_partition_miss():
+    cache = make_cache()
+    cache.add("cuti", [1.0, 0.0, 0.0], PARTITION, "cuti", version=1)
+
+    assert cache.lookup([0.0, 1.0, 0.0], PARTITION, version=1) is None
+    assert cache.lookup([1.0, 0.0, 0.0], ("en", None, "qa"), version=1) is None
+
+def test_expired_nearest_neighbour_does_not_hide_a_live_one():
+    cache = make_cache(ttl=0)
+    cache.add("expired", [1.0, 0.0, 0.0], PARTITION, "expired", version=1)
+    cache.ttl = 60
+    cache.add("live", [0.98, 0.2, 0.0], PARTITION, "live", version=1)
+
+    result, _, cached_query = cache.lookup([1.0, 0.0, 0.0], PARTITION, version=1)
+
+    assert (result, cached_query) == ("live", "live")
+    # The expired entry was evicted during the lookup
+    assert cache.metrics()["entries"] == 1
+
+def test_new_corpus_version_drops_entries():
+    cache = make_cache()
+    cache.add("cuti", [1.0, 0.0, 0.0], PARTITION, "cuti", version=1)
+
+    assert cache.lookup([1.0, 0.0, 0.0], PARTITION, version=2) is None
+    metrics = cache.metrics()
+    assert metrics["entries"] == 0
+    assert metrics["invalidations"] == 1
+    assert metrics["corpus_version"] == 2
+
+def test_answer_from_an_older_version_is_not_stored():
+    cache = make_cache()
+    cache.add("baru", [0.0, 1.0, 0.0], PARTITION, "baru", version=2)
+    cache.add("lama", [1.0, 0.0, 0.0], PARTITION, "lama", version=1)
+
+    assert cache.lookup([1.0, 0.0, 0.0], PARTITION, version=2) is None
+    assert cache.metrics()["entries"] == 1
+
+def test_oldest_entries_are_evicted_beyond_max_entries():
+    cache = make_cache(max_entries=2)
+    for i, vector in enumerate(([1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0])):
+        cache.add(f"q{i}", vector, PARTITION, i, version=1)
+
+    assert cache.metrics()["entries"] == 2
+    assert cache.lookup([1.0, 0.0, 0.0], PARTITION, version=1) is None
+    assert cache.lookup([0.0, 0.0, 1.0], PARTITION, version=1)[0] == 2
+
+def test_explicit_zero_settings_are_kept(monkeypatch):
+    monkeypatch.setenv("SEMANTIC_CACHE_AUDIT_RATE", "0.5")
+    cache = SemanticCache(threshold=0.9, max_entries=10, ttl=0, audit_rate=0)
+    cache.add("cuti", [1.0, 0.0, 0.0], PARTITION, "cuti", version=1)
+
+    assert cache.audit_rate == 0
+    assert not cache.should_audit()
+    time.sleep(0.001)
+    assert cache.lookup([1.0, 0.0, 0.0], PARTITION, version=1) is None
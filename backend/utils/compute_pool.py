@@ -0,0 +1,173 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class ComputePoolSaturatedError(RuntimeError):
+    """Raised when a call waited longer than the pool's queue timeout for a slot"""
+
+class ComputePool:
+    """
+    Sized thread pool for blocking embedding, FAISS and ChromaDB calls.
+
+    Model inference, FAISS search and SQLite I/O release the GIL, so threads
+    keep the event loop free without copying models into worker processes.
+    At most max_workers + max_queue calls are admitted; further callers wait
+    on the event loop (backpressure) and give up after queue_timeout seconds.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, queue_timeout: Optional[float] = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._semaphore = None
+        self._semaphore_loop = None
+
+        # Metrics
+        self.waiting = 0  # callers blocked on admission
+        self.in_flight = 0  # admitted calls, queued in the executor or running
+        self.max_depth_seen = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_time = 0.0
+        self.total_run_time = 0.0
+
+    def _admission(self) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop; recreate for a new loop (e.g. scripts using asyncio.run)
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers + self.max_queue)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable in the pool and await its result"""
+        semaphore = self._admission()
+        enqueued_at = time.time()
+        self.waiting += 1
+        self.max_depth_seen = max(self.max_depth_seen, self.waiting + self.in_flight)
+
+        try:
+            if self.queue_timeout:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            else:
+                await semaphore.acquire()
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning(f"{self.name} pool saturated: call rejected after {self.queue_timeout}s")
+            raise ComputePoolSaturatedError(f"{self.name} pool is saturated, try again later")
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.submitted += 1
+        self.total_wait_time += time.time() - enqueued_at
+        loop = asyncio.get_running_loop()
+        started_at = time.time()
+        try:
+            future = self.executor.submit(func, *args, **kwargs)
+        except Exception:
+            self._finish(semaphore, started_at)
+            raise
+
+        def on_done(done):
+            try:
+                loop.call_soon_threadsafe(self._finish, semaphore, started_at, done)
+            except RuntimeError:  # the loop closed while the call was running
+                pass
+
+        # The slot is freed when the thread finishes, not when the caller stops awaiting:
+        # a cancelled caller's call keeps running and still occupies a worker
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _finish(self, semaphore: asyncio.Semaphore, started_at: float, future: Optional[Future] = None):
+        self.total_run_time += time.time() - started_at
+        self.in_flight -= 1
+        if future is None or (not future.cancelled() and future.exception() is not None):
+            self.failed += 1
+        elif not future.cancelled():
+            self.completed += 1
+        semaphore.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.waiting + max(self.in_flight - self.max_workers, 0),
+            "waiting_for_admission": self.waiting,
+            "in_flight": self.in_flight,
+            "max_depth_seen": self.max_depth_seen,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_time * 1000 / self.submitted, 2) if self.submitted else 0.0,
+            "avg_run_ms": round(self.total_run_time * 1000 / self.submitted, 2) if self.submitted else 0.0
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+class ReadWriteLock:
+    """Thread lock allowing concurrent readers or a single writer"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writer:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+def _queue_timeout() -> Optional[float]:
+    timeout = float(os.getenv("COMPUTE_QUEUE_TIMEOUT", "30"))
+    return timeout if timeout > 0 else None
+
+# Separate pools so large uploads cannot starve interactive queries
+query_pool = ComputePool(
+    "query",
+    max_workers=int(os.getenv("COMPUTE_QUERY_WORKERS", "4")),
+    max_queue=int(os.getenv("COMPUTE_QUERY_QUEUE", "64")),
+    queue_timeout=_queue_timeout()
+)
+ingest_pool = ComputePool(
+    "ingest",
+    max_workers=int(os.getenv("COMPUTE_INGEST_WORKERS", "2")),
+    max_queue=int(os.getenv("COMPUTE_INGEST_QUEUE", "8")),
+    queue_timeout=_queue_timeout()
+)
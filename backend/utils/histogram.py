@@ -0,0 +1,55 @@
+import threading
+from typing import Dict, Any, Sequence
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative, Prometheus style) with approximate percentiles"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            else:
+                self.counts[-1] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of observations"""
+        if self.count == 0:
+            return 0.0
+        target = fraction * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return bound
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, bucket_count in zip(self.buckets, self.counts):
+                cumulative += bucket_count
+                buckets[f"le_{bound:g}"] = cumulative
+            buckets["le_inf"] = self.count
+
+            return {
+                "count": self.count,
+                "avg": round(self.total / self.count, 3) if self.count else 0.0,
+                "max": round(self.max, 3),
+                "p50": self.percentile(0.5),
+                "p95": self.percentile(0.95),
+                "buckets": buckets
+            }
@@ -0,0 +1,194 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+from utils.histogram import Histogram
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Lower runs first; batch jobs add their own priority on top of PRIORITY_BATCH
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+# Highest (least urgent) priority a batch job may ask for
+MAX_JOB_PRIORITY = 99
+
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120)
+
+def batch_priority(job_priority: Any) -> int:
+    """Scheduler priority of a batch job; the client's own priority is clamped to [0, MAX_JOB_PRIORITY]"""
+    return PRIORITY_BATCH + min(max(0, int(job_priority)), MAX_JOB_PRIORITY)
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    enqueued_at: float
+
+@dataclass
+class LLMRequest:
+    """Scheduling identity of one LLM call; its priority can be raised while it waits"""
+    priority: int = PRIORITY_INTERACTIVE
+    caller: str = "anonymous"
+    _waiter: Optional[_Waiter] = field(default=None, repr=False, compare=False)
+
+class LLMScheduler:
+    """
+    Process-wide admission control for LLM calls.
+
+    At most max_concurrency calls run against the model server at once;
+    the rest wait in per-priority queues. The lowest priority level is served
+    first, and within a level callers take turns (round-robin), so one client
+    submitting a large batch cannot hold every slot. A waiting call gains one
+    level per aging_seconds, so batch work still progresses under constant
+    interactive load.
+    """
+
+    def __init__(self, max_concurrency: int, aging_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.aging_seconds = aging_seconds
+        self.in_flight = 0
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {}
+        self._queued = 0
+
+        # Metrics
+        self.max_queue_seen = 0
+        self.granted = {"interactive": 0, "batch": 0}
+        self.cancelled_waiting = 0
+        self.wait_seconds = {"interactive": Histogram(WAIT_BUCKETS), "batch": Histogram(WAIT_BUCKETS)}
+
+    @asynccontextmanager
+    async def slot(self, request: Optional[LLMRequest] = None):
+        """
+        Hold one LLM slot for the duration of the block
+
+        Args:
+            request: Priority (PRIORITY_INTERACTIVE, or PRIORITY_BATCH plus the job's own
+                priority) and caller identity for round-robin; interactive if omitted
+        """
+        request = request or LLMRequest()
+        await self._acquire(request)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def promote(self, request: LLMRequest, priority: int):
+        """Raise a request to a better (lower) priority, moving it between queues if it waits"""
+        if priority >= request.priority:
+            return
+        waiter = request._waiter
+        if waiter is not None and not waiter.future.done():
+            self._remove(request.priority, request.caller, waiter)
+            self._enqueue(priority, request.caller, waiter)
+        request.priority = priority
+
+    async def _acquire(self, request: LLMRequest):
+        enqueued_at = time.monotonic()
+        if self.in_flight < self.max_concurrency and not self._queued:
+            self.in_flight += 1
+            self._record_grant(request.priority, enqueued_at)
+            return
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), enqueued_at)
+        request._waiter = waiter
+        self._enqueue(request.priority, request.caller, waiter)
+        self.max_queue_seen = max(self.max_queue_seen, self._queued)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted and cancelled in the same iteration: hand the slot on
+                self._release()
+            else:
+                # The priority may have been raised while waiting; remove from the current queue
+                self._discard(request.priority, request.caller, waiter)
+                self.cancelled_waiting += 1
+            raise
+        finally:
+            request._waiter = None
+        self._record_grant(request.priority, enqueued_at)
+
+    def _enqueue(self, priority: int, caller: str, waiter: _Waiter):
+        self._queues.setdefault(priority, OrderedDict()).setdefault(caller, deque()).append(waiter)
+        self._queued += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        while self.in_flight < self.max_concurrency and self._queued:
+            waiter = self._next_waiter()
+            # Cancelled but not yet resumed; its _acquire will find it already dequeued
+            if waiter.future.done():
+                continue
+            waiter.future.set_result(None)
+            self.in_flight += 1
+
+    def _next_waiter(self) -> _Waiter:
+        """Oldest call of the next caller in the level with the best aged priority"""
+        now = time.monotonic()
+        best_level, best_rank = None, None
+        for level, callers in self._queues.items():
+            if not callers:
+                continue
+            oldest = min(waiters[0].enqueued_at for waiters in callers.values())
+            aged = (now - oldest) / self.aging_seconds if self.aging_seconds > 0 else 0.0
+            rank = (level - aged, level)
+            if best_rank is None or rank < best_rank:
+                best_level, best_rank = level, rank
+
+        callers = self._queues[best_level]
+        caller, waiters = next(iter(callers.items()))
+        waiter = waiters.popleft()
+        if waiters:
+            # Round-robin: this caller's next call goes behind the other callers
+            callers.move_to_end(caller)
+        else:
+            del callers[caller]
+        self._queued -= 1
+        return waiter
+
+    def _remove(self, priority: int, caller: str, waiter: _Waiter):
+        callers = self._queues[priority]
+        callers[caller].remove(waiter)
+        if not callers[caller]:
+            del callers[caller]
+        self._queued -= 1
+
+    def _discard(self, priority: int, caller: str, waiter: _Waiter):
+        """Remove a waiter if it is still queued; _release may already have popped it"""
+        waiters = self._queues.get(priority, {}).get(caller)
+        if waiters is not None and waiter in waiters:
+            self._remove(priority, caller, waiter)
+
+    def _record_grant(self, priority: int, enqueued_at: float):
+        traffic = "interactive" if priority < PRIORITY_BATCH else "batch"
+        self.granted[traffic] += 1
+        self.wait_seconds[traffic].observe(time.monotonic() - enqueued_at)
+
+    def metrics(self) -> Dict[str, Any]:
+        queued = {"interactive": 0, "batch": 0}
+        callers = set()
+        for level, level_callers in self._queues.items():
+            traffic = "interactive" if level < PRIORITY_BATCH else "batch"
+            for caller, waiters in level_callers.items():
+                queued[traffic] += len(waiters)
+                callers.add(caller)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self._queued,
+            "queued_by_traffic": queued,
+            "queued_callers": len(callers),
+            "max_queue_seen": self.max_queue_seen,
+            "granted": self.granted,
+            "cancelled_while_waiting": self.cancelled_waiting,
+            "wait_seconds": {traffic: histogram.snapshot() for traffic, histogram in self.wait_seconds.items()}
+        }
+
+# One scheduler per server process: every LLM call to the model server goes through it
+llm_scheduler = LLMScheduler(
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "2")),
+    aging_seconds=float(os.getenv("LLM_PRIORITY_AGING_SECONDS", "3"))
+)
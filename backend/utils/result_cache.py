@@ -0,0 +1,109 @@
+import copy
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+
+def normalize_query(query: str) -> str:
+    """Cache-key form of a query: NFKC, lowercased, single spaces, no trailing punctuation"""
+    text = unicodedata.normalize("NFKC", query).lower()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+class ResultCache:
+    """
+    Bounded LRU cache with per-entry TTL, tied to a corpus version.
+
+    Values are deep-copied on the way in and out, so callers may modify what
+    they get without touching the cached entry. When the version passed to
+    get/put differs from the one the entries were stored under (documents
+    were added or deleted), the whole cache is dropped.
+    """
+
+    def __init__(self, name: str, max_entries: int, default_ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.version = None
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(version) else None
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def contains(self, key: Hashable, version: int) -> bool:
+        """Whether a live entry exists, without counting a hit or refreshing its LRU position"""
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(version) else None
+            return entry is not None and entry[0] > time.monotonic()
+
+    def put(self, key: Hashable, value: Any, version: int, ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            # A result computed before the corpus changed must not be served afterwards
+            if not self._check_version(version):
+                self.stale_puts += 1
+                return
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_puts": self.stale_puts,
+                "corpus_version": self.version
+            }
+
+    def _check_version(self, version: int) -> bool:
+        """Move to a newer version, dropping all entries; False if version is older than the cache's"""
+        # Callers hold self._lock
+        if self.version is not None and version < self.version:
+            return False
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self.version = version
+        return True
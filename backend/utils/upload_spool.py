@@ -0,0 +1,70 @@
+import asyncio
+import os
+import tempfile
+from typing import Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Settings are read per upload, not at import, so values loaded from .env later still apply
+def upload_max_bytes() -> int:
+    return int(float(os.getenv("UPLOAD_MAX_MB", "100")) * 1024 * 1024)
+
+def _spool_memory_bytes() -> int:
+    # Uploads up to this size stay in memory; larger ones roll over to a temp file on disk
+    return int(float(os.getenv("UPLOAD_SPOOL_MEMORY_MB", "1")) * 1024 * 1024)
+
+def _chunk_bytes() -> int:
+    return int(os.getenv("UPLOAD_CHUNK_KB", "1024")) * 1024
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds UPLOAD_MAX_MB"""
+
+async def spool_upload(
+    upload,
+    max_bytes: Optional[int] = None,
+    memory_bytes: Optional[int] = None,
+    chunk_bytes: Optional[int] = None
+) -> tempfile.SpooledTemporaryFile:
+    """
+    Copy an UploadFile into a SpooledTemporaryFile chunk by chunk
+
+    Args:
+        upload: FastAPI UploadFile (or any object with an async read(size))
+        max_bytes: Abort with UploadTooLargeError once this many bytes were read
+        memory_bytes: Size kept in memory before the spool rolls over to disk
+        chunk_bytes: Bytes read per chunk
+
+    Returns:
+        The spool, positioned at its start; the caller closes it
+    """
+    max_bytes = max_bytes or upload_max_bytes()
+    chunk_bytes = chunk_bytes or _chunk_bytes()
+    spool = tempfile.SpooledTemporaryFile(max_size=memory_bytes or _spool_memory_bytes())
+    loop = asyncio.get_running_loop()
+    size = 0
+
+    try:
+        while True:
+            chunk = await upload.read(chunk_bytes)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+            # Past the memory threshold this is disk I/O, so keep it off the event loop
+            await loop.run_in_executor(None, spool.write, chunk)
+
+        spool.seek(0)
+        return spool
+
+    except Exception:
+        spool.close()
+        raise
+
+def spool_size(spool) -> int:
+    position = spool.tell()
+    spool.seek(0, os.SEEK_END)
+    size = spool.tell()
+    spool.seek(position)
+    return size
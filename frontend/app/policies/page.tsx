@@ -26,28 +26,15 @@ export default function PoliciesPage() {
   useEffect(() => {
     const fetchStats = async () => {
       try {
-        const response = await fetch('http://localhost:8000/api/policies/documents');
+        // Totals per category and type are kept by the server's document catalog
+        const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/stats`);
         if (response.ok) {
           const data = await response.json();
-          // Process stats from the documents
-          const categoryStats: Record<string, number> = {};
-          const typeStats: Record<string, number> = {};
-          let recentCount = 0;
-          const oneWeekAgo = new Date(Date.now() - 7 * 24 * 60 * 60 * 1000);
-
-          data.documents?.forEach((doc: any) => {
-            categoryStats[doc.category] = (categoryStats[doc.category] || 0) + 1;
-            typeStats[doc.document_type] = (typeStats[doc.document_type] || 0) + 1;
-            if (new Date(doc.created_at) > oneWeekAgo) {
-              recentCount++;
-            }
-          });
-
           setStats({
-            total: data.total || 0,
-            byCategory: categoryStats,
-            byType: typeStats,
-            recent: recentCount
+            total: data.totalPolicies || 0,
+            byCategory: data.policiesByCategory || {},
+            byType: data.policiesByType || {},
+            recent: data.recentPolicies || 0
           });
         }
       } catch (error) {
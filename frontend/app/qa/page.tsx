@@ -13,6 +13,7 @@ interface PolicyAnswer {
     relevance_score: number;
   }>;
   confidence_score: number;
+  streaming?: boolean;
 }
 
 export default function QAPage() {
@@ -36,7 +37,7 @@ export default function QAPage() {
     setAnswer(null);
 
     try {
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/qa/ask`, {
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/qa/ask-stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -48,12 +49,11 @@ export default function QAPage() {
         }),
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error('Failed to get answer');
       }
 
-      const data = await response.json();
-      setAnswer(data);
+      await readAnswerStream(response.body);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Terjadi kesalahan dalam sistem');
     } finally {
@@ -61,6 +61,38 @@ export default function QAPage() {
     }
   };
 
+  // Server-Sent Events: sources first, then answer tokens, then the final confidence
+  const readAnswerStream = async (body: ReadableStream<Uint8Array>) => {
+    const reader = body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      const events = buffer.split('\n\n');
+      buffer = events.pop() || '';
+      for (const rawEvent of events) {
+        const type = rawEvent.match(/^event: (.*)$/m)?.[1];
+        const data = rawEvent.match(/^data: (.*)$/m)?.[1];
+        if (!type || !data) continue;
+        const payload = JSON.parse(data);
+
+        if (type === 'sources') {
+          setAnswer({ answer: '', sources: payload.sources, confidence_score: 0, streaming: true });
+        } else if (type === 'token') {
+          setAnswer(prev => prev && { ...prev, answer: prev.answer + payload.content });
+        } else if (type === 'done') {
+          setAnswer({ answer: payload.answer, sources: payload.sources, confidence_score: payload.confidence_score });
+        } else if (type === 'error') {
+          throw new Error(payload.detail);
+        }
+      }
+    }
+  };
+
   const exampleQuestions = [
     {
       category: "Kepegawaian",
@@ -260,9 +292,15 @@ export default function QAPage() {
                         <p className="text-sm text-gray-500">Berdasarkan peraturan dan kebijakan resmi</p>
                       </div>
                     </div>
-                    <div className={`px-4 py-2 rounded-full border text-sm font-semibold ${getConfidenceColor(answer.confidence_score)}`}>
-                      Akurasi: {Math.round(answer.confidence_score * 100)}% ({getConfidenceLabel(answer.confidence_score)})
-                    </div>
+                    {answer.streaming ? (
+                      <div className="px-4 py-2 rounded-full border text-sm font-semibold text-blue-600 bg-blue-50 border-blue-200">
+                        Menyusun jawaban...
+                      </div>
+                    ) : (
+                      <div className={`px-4 py-2 rounded-full border text-sm font-semibold ${getConfidenceColor(answer.confidence_score)}`}>
+                        Akurasi: {Math.round(answer.confidence_score * 100)}% ({getConfidenceLabel(answer.confidence_score)})
+                      </div>
+                    )}
                   </div>
                   
                   <div className="prose max-w-none text-gray-700 leading-relaxed">
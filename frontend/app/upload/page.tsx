@@ -9,6 +9,17 @@ interface UploadResult {
   message: string;
   document_id?: string;
   processed_chunks: number;
+  job_id?: string;
+  status?: string;
+}
+
+interface IngestionJob {
+  job_id: string;
+  status: string;
+  total_chunks: number;
+  embedded_chunks: number;
+  document_id?: string;
+  error?: string;
 }
 
 export default function UploadPage() {
@@ -71,14 +82,26 @@ export default function UploadPage() {
       });
 
       clearInterval(progressInterval);
-      setUploadProgress(100);
 
       if (!response.ok) {
         throw new Error('Upload failed');
       }
 
-      const result = await response.json();
-      setUploadResult(result);
+      // The server processes the document in the background; poll its job until it finishes
+      const result: UploadResult = await response.json();
+      const job = await waitForJob(result.job_id as string);
+      setUploadProgress(100);
+
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Pemrosesan dokumen gagal');
+      }
+
+      setUploadResult({
+        success: true,
+        message: result.message.replace('queued for processing', 'uploaded and processed successfully'),
+        document_id: job.document_id,
+        processed_chunks: job.total_chunks
+      });
     } catch (error) {
       clearInterval(progressInterval);
       setUploadResult({
@@ -92,6 +115,24 @@ export default function UploadPage() {
     }
   };
 
+  const waitForJob = async (jobId: string): Promise<IngestionJob> => {
+    while (true) {
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/policies/jobs/${jobId}`);
+      if (!response.ok) {
+        throw new Error('Status pemrosesan tidak tersedia');
+      }
+
+      const job: IngestionJob = await response.json();
+      if (job.status === 'completed' || job.status === 'failed') {
+        return job;
+      }
+      if (job.total_chunks > 0) {
+        setUploadProgress(90 + Math.floor((job.embedded_chunks / job.total_chunks) * 9));
+      }
+      await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+  };
+
   const handleDrop = (e: React.DragEvent) => {
     e.preventDefault();
     setIsDragOver(false);
@@ -4,6 +4,7 @@ import { useState, useEffect } from 'react';
 import { FileText, Calendar, Eye, RefreshCw, Trash2 } from 'lucide-react';
 
 interface PolicyDocument {
+  document_id: string;
   title: string;
   category: string;
   document_type: string;
@@ -27,26 +28,34 @@ export default function PolicyList({ showPreview = true, maxItems }: PolicyListP
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState('');
   const [deletingDocument, setDeletingDocument] = useState<string | null>(null);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+
+  const fetchPage = async (cursor: string | null) => {
+    // The server returns one page at a time; next_cursor points at the following page
+    const params = new URLSearchParams({ limit: String(maxItems || 50) });
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+
+    const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/policies/documents?${params}`);
+    if (!response.ok) {
+      throw new Error('Failed to fetch documents');
+    }
+
+    const data = await response.json();
+    setTotal(data.total || 0);
+    setNextCursor(data.next_cursor || null);
+    return (data.documents || []) as PolicyDocument[];
+  };
 
   const fetchDocuments = async () => {
     setIsLoading(true);
     setError('');
     
     try {
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/policies/documents`);
-      if (!response.ok) {
-        throw new Error('Failed to fetch documents');
-      }
-      
-      const data = await response.json();
-      let docs = data.documents || [];
-      
-      // Limit items if maxItems is specified
-      if (maxItems && docs.length > maxItems) {
-        docs = docs.slice(0, maxItems);
-      }
-      
-      setDocuments(docs);
+      setDocuments(await fetchPage(null));
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Terjadi kesalahan');
     } finally {
@@ -54,15 +63,28 @@ export default function PolicyList({ showPreview = true, maxItems }: PolicyListP
     }
   };
 
-  const handleDeleteDocument = async (title: string) => {
+  const loadMoreDocuments = async () => {
+    setIsLoadingMore(true);
+
+    try {
+      const docs = await fetchPage(nextCursor);
+      setDocuments(prev => [...prev, ...docs]);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'Terjadi kesalahan');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
+  const handleDeleteDocument = async (documentId: string, title: string) => {
     if (!confirm(`Apakah Anda yakin ingin menghapus dokumen "${title}"?`)) {
       return;
     }
 
-    setDeletingDocument(title);
+    setDeletingDocument(documentId);
     
     try {
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/policies/${encodeURIComponent(title)}`, {
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/policies/documents/${encodeURIComponent(documentId)}`, {
         method: 'DELETE',
       });
 
@@ -207,7 +229,7 @@ export default function PolicyList({ showPreview = true, maxItems }: PolicyListP
       <div className="flex items-center justify-between mb-6">
         <h3 className="text-lg font-semibold text-gray-900 flex items-center">
           <FileText className="h-5 w-5 mr-2" />
-          Daftar Kebijakan ({documents.length})
+          Daftar Kebijakan ({total})
         </h3>
         <button
           onClick={fetchDocuments}
@@ -220,7 +242,7 @@ export default function PolicyList({ showPreview = true, maxItems }: PolicyListP
 
       <div className="space-y-4">
         {documents.map((doc) => (
-          <div key={doc.title} className="border border-gray-200 rounded-lg p-4 hover:bg-gray-50 transition-colors">
+          <div key={doc.document_id} className="border border-gray-200 rounded-lg p-4 hover:bg-gray-50 transition-colors">
             <div className="flex items-start justify-between mb-3">
               <div className="flex-1">
                 <h4 className="font-medium text-gray-900 mb-1">{doc.title}</h4>
@@ -275,13 +297,13 @@ export default function PolicyList({ showPreview = true, maxItems }: PolicyListP
                   Lihat Detail
                 </button>
                 <button 
-                  onClick={() => handleDeleteDocument(doc.title)}
-                  disabled={deletingDocument === doc.title}
+                  onClick={() => handleDeleteDocument(doc.document_id, doc.title)}
+                  disabled={deletingDocument === doc.document_id}
                   className="text-red-600 hover:text-red-800 text-sm flex items-center transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
                   title="Hapus dokumen"
                 >
                   <Trash2 className="h-4 w-4 mr-1" />
-                  {deletingDocument === doc.title ? 'Menghapus...' : 'Hapus'}
+                  {deletingDocument === doc.document_id ? 'Menghapus...' : 'Hapus'}
                 </button>
               </div>
             </div>
@@ -289,7 +311,19 @@ export default function PolicyList({ showPreview = true, maxItems }: PolicyListP
         ))}
       </div>
 
-      {maxItems && documents.length === maxItems && (
+      {!maxItems && nextCursor && (
+        <div className="mt-4 text-center">
+          <button
+            onClick={loadMoreDocuments}
+            disabled={isLoadingMore}
+            className="text-blue-600 hover:text-blue-800 text-sm disabled:opacity-50"
+          >
+            {isLoadingMore ? 'Memuat...' : 'Muat Lebih Banyak'}
+          </button>
+        </div>
+      )}
+
+      {maxItems && nextCursor && (
         <div className="mt-4 text-center">
           <a href="/policies" className="text-blue-600 hover:text-blue-800 text-sm">
             Lihat Semua Kebijakan →